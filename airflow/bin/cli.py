@@ -54,6 +54,7 @@ from airflow.models import (DagModel, DagBag, TaskInstance,
 
 from airflow.ti_deps.dep_context import (DepContext, SCHEDULER_DEPS)
 from airflow.utils import db as db_utils
+from airflow.utils.dag_processing import DagFileParseCache, DagPickleCache
 from airflow.utils.net import get_hostname
 from airflow.utils.log.logging_mixin import (LoggingMixin, redirect_stderr,
                                              redirect_stdout)
@@ -132,6 +133,26 @@ def get_dag(args):
     return dagbag.dags[args.dag_id]
 
 
+def get_cached_dag(args):
+    """
+    Like get_dag(), but loads the DAG from the local DAG cache of the worker
+    when it is enabled and the DAG file did not change since it was cached.
+    """
+    file_path = process_subdir(args.subdir)
+    if (not conf.getboolean('core', 'worker_dag_cache') or
+            not file_path or not os.path.isfile(file_path)):
+        return get_dag(args)
+
+    cache = DagPickleCache(os.path.expanduser(
+        conf.get('core', 'worker_dag_cache_folder')))
+    signature = DagFileParseCache.get_file_signature(file_path)
+    dag = cache.get(file_path, args.dag_id, signature)
+    if dag is None:
+        dag = get_dag(args)
+        cache.set(file_path, args.dag_id, signature, dag)
+    return dag
+
+
 def get_dags(args):
     if not args.dag_regex:
         return [get_dag(args)]
@@ -422,7 +443,7 @@ def run(args, dag=None):
         settings.configure_orm()
 
     if not args.pickle and not dag:
-        dag = get_dag(args)
+        dag = get_cached_dag(args)
     elif not dag:
         session = settings.Session()
         log.info('Loading pickle id {args.pickle}'.format(args=args))
@@ -847,19 +868,86 @@ def scheduler(args):
         job.run()
 
 
-def serve_logs(args):
-    print("Starting flask")
+def sensor_batching(args):
+    print(settings.HEADER)
+    job = jobs.SensorBatchingJob(
+        subdir=process_subdir(args.subdir),
+        num_runs=args.num_runs)
+
+    if args.daemon:
+        pid, stdout, stderr, log_file = setup_locations(
+            "sensor_batching", args.pid, args.stdout, args.stderr, args.log_file)
+        handle = setup_logging(log_file)
+        stdout = open(stdout, 'w+')
+        stderr = open(stderr, 'w+')
+
+        ctx = daemon.DaemonContext(
+            pidfile=TimeoutPIDLockFile(pid, -1),
+            files_preserve=[handle],
+            stdout=stdout,
+            stderr=stderr,
+        )
+        with ctx:
+            job.run()
+
+        stdout.close()
+        stderr.close()
+    else:
+        signal.signal(signal.SIGINT, sigint_handler)
+        signal.signal(signal.SIGTERM, sigint_handler)
+        job.run()
+
+
+def get_serve_logs_app(log_folder):
+    """
+    Returns the Flask app serving the task logs of this machine, see
+    serve_logs. A request with a Range header gets only that part of the log,
+    as the webserver reads logs page by page.
+
+    :param log_folder: the folder to serve the logs of
+    :type log_folder: str
+    """
     import flask
     flask_app = flask.Flask(__name__)
 
     @flask_app.route('/log/<path:filename>')
     def serve_logs(filename):  # noqa
-        log = os.path.expanduser(conf.get('core', 'BASE_LOG_FOLDER'))
-        return flask.send_from_directory(
-            log,
-            filename,
+        match = re.match(r'bytes=(\d+)-(\d*)$',
+                         flask.request.headers.get('Range', ''))
+        if not match:
+            return flask.send_from_directory(
+                log_folder,
+                filename,
+                mimetype="application/json",
+                as_attachment=False)
+
+        path = flask.safe_join(log_folder, filename)
+        if not os.path.isfile(path):
+            flask.abort(404)
+        size = os.path.getsize(path)
+        start = int(match.group(1))
+        if start >= size:
+            return flask.Response(
+                status=416, headers={'Content-Range': 'bytes */{}'.format(size)})
+        end = size - 1
+        if match.group(2):
+            end = min(int(match.group(2)), end)
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start + 1)
+        return flask.Response(
+            data,
+            status=206,
             mimetype="application/json",
-            as_attachment=False)
+            headers={'Content-Range': 'bytes {}-{}/{}'.format(start, end, size)})
+
+    return flask_app
+
+
+def serve_logs(args):
+    print("Starting flask")
+    flask_app = get_serve_logs_app(
+        os.path.expanduser(conf.get('core', 'BASE_LOG_FOLDER')))
 
     WORKER_LOG_SERVER_PORT = \
         int(conf.get('celery', 'WORKER_LOG_SERVER_PORT'))
@@ -1622,6 +1710,12 @@ class CLIFactory(object):
             'args': ('dag_id_opt', 'subdir', 'run_duration', 'num_runs',
                      'do_pickle', 'pid', 'daemon', 'stdout', 'stderr',
                      'log_file'),
+        }, {
+            'func': sensor_batching,
+            'help': ("Start a service poking the sensors waiting in reschedule mode "
+                     "in batches"),
+            'args': ('subdir', 'num_runs', 'pid', 'daemon', 'stdout', 'stderr',
+                     'log_file'),
         }, {
             'func': worker,
             'help': "Start a Celery worker node",
@@ -111,7 +111,32 @@ class GoogleCloudStorageHook(GoogleCloudBaseHook):
         return downloaded_file_bytes
 
     # pylint:disable=redefined-builtin
-    def upload(self, bucket, object, filename, mime_type='application/octet-stream'):
+    def download_range(self, bucket, object, offset, length=None):
+        """
+        Gets part of a file from Google Cloud Storage.
+
+        :param bucket: The bucket to fetch from.
+        :type bucket: string
+        :param object: The object to fetch.
+        :type object: string
+        :param offset: The offset in bytes of the part to fetch.
+        :type offset: int
+        :param length: The number of bytes to fetch, the rest of the object
+            if None.
+        :type length: int
+        """
+        service = self.get_conn()
+        request = service.objects().get_media(bucket=bucket, object=object)
+        if length is None:
+            request.headers['Range'] = 'bytes={}-'.format(offset)
+        else:
+            request.headers['Range'] = 'bytes={}-{}'.format(
+                offset, offset + length - 1)
+        return request.execute()
+
+    # pylint:disable=redefined-builtin
+    def upload(self, bucket, object, filename,
+               mime_type='application/octet-stream', chunk_size=None):
         """
         Uploads a local file to Google Cloud Storage.
 
@@ -123,12 +148,54 @@ class GoogleCloudStorageHook(GoogleCloudBaseHook):
         :type filename: string
         :param mime_type: The MIME type to set when uploading the file.
         :type mime_type: string
+        :param chunk_size: If set, the file is streamed from disk in a
+            resumable upload of chunks of this many bytes, a multiple of
+            256KB, instead of being sent in a single request.
+        :type chunk_size: int
+        """
+        service = self.get_conn()
+        if chunk_size is None:
+            media = MediaFileUpload(filename, mime_type)
+            response = service \
+                .objects() \
+                .insert(bucket=bucket, name=object, media_body=media) \
+                .execute()
+            return
+
+        media = MediaFileUpload(filename, mime_type, chunksize=chunk_size,
+                                resumable=True)
+        request = service \
+            .objects() \
+            .insert(bucket=bucket, name=object, media_body=media)
+        response = None
+        while response is None:
+            _, response = request.next_chunk()
+
+    # pylint:disable=redefined-builtin
+    def compose(self, bucket, source_objects, destination_object):
         """
+        Concatenates objects of a bucket into an object, without downloading
+        them.
+
+        :param bucket: The bucket of the objects.
+        :type bucket: string
+        :param source_objects: The names of the objects to concatenate, in
+            order, at most 32 of them.
+        :type source_objects: list
+        :param destination_object: The name of the object to write, which
+            can be one of the source objects.
+        :type destination_object: string
+        """
+        if not source_objects:
+            raise ValueError('source_objects cannot be empty.')
+
         service = self.get_conn()
-        media = MediaFileUpload(filename, mime_type)
-        response = service \
+        service \
             .objects() \
-            .insert(bucket=bucket, name=object, media_body=media) \
+            .compose(destinationBucket=bucket,
+                     destinationObject=destination_object,
+                     body={'sourceObjects': [{'name': source_object}
+                                             for source_object in source_objects]}) \
             .execute()
 
     # pylint:disable=redefined-builtin
@@ -13,9 +13,11 @@
 # limitations under the License.
 #
 
+import uuid
+
 from airflow.hooks.base_hook import BaseHook
 
-from azure.storage.blob import BlockBlobService
+from azure.storage.blob import BlobBlock, BlockBlobService, BlockListType
 
 
 class WasbHook(BaseHook):
@@ -143,3 +145,92 @@ class WasbHook(BaseHook):
         return self.connection.get_blob_to_text(container_name,
                                                 blob_name,
                                                 **kwargs).content
+
+    def get_blob_size(self, container_name, blob_name, **kwargs):
+        """
+        Get the size of a blob on Azure Blob Storage.
+
+        :param container_name: Name of the container.
+        :type container_name: str
+        :param blob_name: Name of the blob.
+        :type blob_name: str
+        :param kwargs: Optional keyword arguments that
+            `BlockBlobService.get_blob_properties()` takes.
+        :type kwargs: object
+        :return: the size of the blob in bytes
+        :rtype: int
+        """
+        return self.connection.get_blob_properties(
+            container_name, blob_name, **kwargs).properties.content_length
+
+    def read_file_range(self, container_name, blob_name, offset, length=None,
+                        **kwargs):
+        """
+        Read part of a file from Azure Blob Storage and return it as bytes.
+
+        :param container_name: Name of the container.
+        :type container_name: str
+        :param blob_name: Name of the blob.
+        :type blob_name: str
+        :param offset: The offset in bytes of the part to read.
+        :type offset: int
+        :param length: The number of bytes to read, the rest of the blob
+            if None.
+        :type length: int
+        :param kwargs: Optional keyword arguments that
+            `BlockBlobService.get_blob_to_bytes()` takes.
+        :type kwargs: object
+        """
+        end_range = None if length is None else offset + length - 1
+        return self.connection.get_blob_to_bytes(container_name,
+                                                 blob_name,
+                                                 start_range=offset,
+                                                 end_range=end_range,
+                                                 **kwargs).content
+
+    def append_file(self, file_path, container_name, blob_name,
+                    chunk_size=4 * 1024 * 1024, **kwargs):
+        """
+        Append a file to a blob on Azure Blob Storage, or upload it if the
+        blob doesn't exist, without downloading the blob. The file is
+        streamed from disk in blocks that are committed after the blocks of
+        the blob.
+
+        :param file_path: Path to the file to append.
+        :type file_path: str
+        :param container_name: Name of the container.
+        :type container_name: str
+        :param blob_name: Name of the blob.
+        :type blob_name: str
+        :param chunk_size: The size in bytes of the blocks to upload.
+        :type chunk_size: int
+        :param kwargs: Optional keyword arguments that
+            `BlockBlobService.put_block_list()` takes.
+        :type kwargs: object
+        """
+        if not self.check_for_blob(container_name, blob_name):
+            self.load_file(file_path, container_name, blob_name, **kwargs)
+            return
+
+        block_ids = [block.id for block in self.connection.get_block_list(
+            container_name, blob_name,
+            block_list_type=BlockListType.Committed).committed_blocks]
+        if not block_ids:
+            # A blob uploaded in a single request has no blocks, it is
+            # uploaded again once as the first block
+            block_id = uuid.uuid4().hex
+            self.connection.put_block(
+                container_name, blob_name,
+                self.read_file_range(container_name, blob_name, 0), block_id)
+            block_ids.append(block_id)
+
+        with open(file_path, 'rb') as f:
+            for data in iter(lambda: f.read(chunk_size), b''):
+                block_id = uuid.uuid4().hex
+                self.connection.put_block(container_name, blob_name, data,
+                                          block_id)
+                block_ids.append(block_id)
+
+        self.connection.put_block_list(
+            container_name, blob_name,
+            [BlobBlock(id=block_id) for block_id in block_ids], **kwargs)
@@ -16,7 +16,9 @@
 # under the License.
 
 import json
+import threading
 import time
+from collections import defaultdict
 from airflow.utils.log.logging_mixin import LoggingMixin
 from airflow.utils.state import State
 from datetime import datetime as dt
@@ -36,11 +38,174 @@ class PodStatus(object):
     SUCCEEDED = 'succeeded'
 
 
+class PodStatusWatcher(LoggingMixin):
+    """
+    Follows the phases of all the pods of a namespace through a single watch
+    stream and wakes up the launchers waiting for any of them, so that
+    launchers don't poll the API server for the status of their pod. There
+    is one watcher per namespace in a process, see get_watcher.
+
+    The watcher lists and watches the pods with the client of the launcher
+    that started it, so all the launchers of a process watching a namespace
+    must be allowed to see the same pods.
+    """
+    _watchers = {}
+    _watchers_lock = threading.Lock()
+
+    # Seconds after which the watch stream is renewed by the API server
+    watch_timeout = 60
+
+    def __init__(self, kube_client, namespace):
+        """
+        :param kube_client: the client to list and watch the pods with
+        :type kube_client: kubernetes.client.CoreV1Api
+        :param namespace: the namespace of the pods
+        :type namespace: str
+        """
+        super(PodStatusWatcher, self).__init__()
+        self._client = kube_client
+        self._namespace = namespace
+        # Map from pod name to phase
+        self._phases = {}
+        # Map from pod name to number of launchers waiting for the pod
+        self._waiting = defaultdict(int)
+        self._condition = threading.Condition()
+        self._thread = None
+
+    @classmethod
+    def get_watcher(cls, kube_client, namespace):
+        """
+        Returns the watcher of the namespace, starting it if needed or if the
+        thread of the previous one died. The watcher is shared by all the
+        callers for the namespace, whatever client they pass.
+
+        :param kube_client: the client the watcher uses if it's started
+        :type kube_client: kubernetes.client.CoreV1Api
+        :param namespace: the namespace of the pods
+        :type namespace: str
+        :rtype: PodStatusWatcher
+        """
+        with cls._watchers_lock:
+            watcher = cls._watchers.get(namespace)
+            if watcher is None or not watcher.is_alive():
+                watcher = cls(kube_client, namespace)
+                watcher.start()
+                cls._watchers[namespace] = watcher
+            return watcher
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._watch_pods,
+            name="PodStatusWatcher-{}".format(self._namespace))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _set_phase(self, name, phase, deleted=False):
+        # Deleted pods are only remembered for the launchers waiting for them,
+        # which must not wait for a pod that will never finish
+        if deleted and not self._waiting.get(name):
+            self._phases.pop(name, None)
+        elif deleted and phase.lower() != PodStatus.SUCCEEDED:
+            self._phases[name] = PodStatus.FAILED
+        else:
+            self._phases[name] = phase
+
+    def _watch_pods(self):
+        resource_version = None
+        while True:
+            try:
+                if resource_version is None:
+                    # (Re)load the phases of all the pods, the events that
+                    # were missed can't be replayed
+                    pod_list = self._client.list_namespaced_pod(self._namespace)
+                    with self._condition:
+                        self._phases = {}
+                        for pod in pod_list.items:
+                            self._set_phase(pod.metadata.name, pod.status.phase)
+                        self._condition.notify_all()
+                    resource_version = pod_list.metadata.resource_version
+
+                stream = watch.Watch().stream(
+                    self._client.list_namespaced_pod,
+                    self._namespace,
+                    resource_version=resource_version,
+                    timeout_seconds=self.watch_timeout)
+                for event in stream:
+                    if event['type'] == 'ERROR':
+                        # Usually the resource version expired
+                        self.log.info("Watch of namespace %s failed: %s",
+                                      self._namespace, event['object'])
+                        resource_version = None
+                        break
+                    pod = event['object']
+                    resource_version = pod.metadata.resource_version
+                    with self._condition:
+                        self._set_phase(pod.metadata.name, pod.status.phase,
+                                        deleted=event['type'] == 'DELETED')
+                        self._condition.notify_all()
+            except Exception:
+                self.log.exception("Error watching the pods of namespace %s",
+                                   self._namespace)
+                resource_version = None
+                time.sleep(1)
+
+    def wait_for_phase(self, name, predicate, timeout=None):
+        """
+        Blocks until the phase of a pod satisfies a predicate.
+
+        :param name: the name of the pod
+        :type name: str
+        :param predicate: called with the lower case phase of the pod
+        :type predicate: callable
+        :param timeout: how many seconds to wait at most, forever if None
+        :type timeout: float
+        :return: the lower case phase of the pod, None if the predicate was not
+            satisfied in time
+        :rtype: str
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            self._waiting[name] += 1
+            try:
+                while True:
+                    phase = self._phases.get(name)
+                    if phase is not None and predicate(phase.lower()):
+                        return phase.lower()
+                    if deadline is None:
+                        self._condition.wait()
+                    else:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            return None
+                        self._condition.wait(remaining)
+            finally:
+                self._waiting[name] -= 1
+                if not self._waiting[name]:
+                    del self._waiting[name]
+
+
 class PodLauncher(LoggingMixin):
-    def __init__(self, kube_client=None):
+    # Seconds after which a launcher waiting for its pod through the watcher
+    # reads the pod, in case the watch missed its end
+    status_check_interval = 60
+
+    def __init__(self, kube_client=None, watch_pod_status=False):
+        """
+        :param kube_client: the client to the API server
+        :type kube_client: kubernetes.client.CoreV1Api
+        :param watch_pod_status: wait for pods to start and, when their logs
+            aren't followed, to finish through the PodStatusWatcher of their
+            namespace instead of polling their status. Needs the permissions
+            to list and watch the pods of the namespace.
+        :type watch_pod_status: bool
+        """
         super(PodLauncher, self).__init__()
         self._client = kube_client or get_kube_client()
         self._watch = watch.Watch()
+        self._watch_pod_status = watch_pod_status
         self.kube_req_factory = pod_fac.SimplePodRequestFactory()
 
     def run_pod_async(self, pod):
@@ -66,7 +231,14 @@ class PodLauncher(LoggingMixin):
         """
         resp = self.run_pod_async(pod)
         curr_time = dt.now()
-        if resp.status.start_time is None:
+        if resp.status.start_time is None and self._watch_pod_status:
+            watcher = PodStatusWatcher.get_watcher(self._client, pod.namespace)
+            phase = watcher.wait_for_phase(
+                pod.name, lambda phase: phase != PodStatus.PENDING,
+                timeout=startup_timeout)
+            if phase is None and self.pod_not_started(pod):
+                raise AirflowException("Pod took too long to start")
+        elif resp.status.start_time is None:
             while self.pod_not_started(pod):
                 delta = dt.now() - curr_time
                 if delta.seconds >= startup_timeout:
@@ -89,6 +261,17 @@ class PodLauncher(LoggingMixin):
                 _preload_content=False)
             for line in logs:
                 self.log.info(line)
+        elif self._watch_pod_status:
+            while True:
+                watcher = PodStatusWatcher.get_watcher(self._client, pod.namespace)
+                phase = watcher.wait_for_phase(
+                    pod.name,
+                    lambda phase: phase not in (PodStatus.PENDING, PodStatus.RUNNING),
+                    timeout=self.status_check_interval)
+                # The end of the pod can be missed if the watcher died or if
+                # the pod was deleted while the watch was renewed
+                if phase is not None or not self.pod_is_running(pod):
+                    break
         else:
             while self.pod_is_running(pod):
                 self.log.info("Pod {} has state {}".format(pod.name, State.RUNNING))
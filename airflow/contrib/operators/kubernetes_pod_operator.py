@@ -42,7 +42,8 @@ class KubernetesPodOperator(BaseOperator):
                                kube_executor_config=self.kube_executor_config
                                )
 
-            launcher = pod_launcher.PodLauncher(client)
+            launcher = pod_launcher.PodLauncher(
+                client, watch_pod_status=self.watch_pod_status)
             final_state = launcher.run_pod(
                 pod,
                 startup_timeout=self.startup_timeout_seconds,
@@ -65,6 +66,7 @@ class KubernetesPodOperator(BaseOperator):
                  startup_timeout_seconds=120,
                  kube_executor_config=None,
                  get_logs=True,
+                 watch_pod_status=False,
                  *args,
                  **kwargs):
         super(KubernetesPodOperator, self).__init__(*args, **kwargs)
@@ -78,3 +80,4 @@ class KubernetesPodOperator(BaseOperator):
         self.name = name
         self.in_cluster = in_cluster
         self.get_logs = get_logs
+        self.watch_pod_status = watch_pod_status
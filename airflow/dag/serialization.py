@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Serializes the structure of DAGs to JSON and back, so that the webserver can
+render DAGs stored in the database by the scheduler instead of importing
+every DAG file itself. Only what the views need is kept: callables are stored
+as their source code, template fields as their unrendered values, and
+deserialized tasks are SerializedBaseOperator, which can be displayed but
+not executed.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import datetime
+import inspect
+import json
+import time
+from collections import OrderedDict
+
+import pendulum
+import six
+from dateutil.relativedelta import relativedelta
+
+from airflow import configuration
+from airflow.dag.base_dag import BaseDagBag
+from airflow.models import BaseOperator, DAG, SerializedDagModel
+from airflow.utils import timezone
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+# Attributes of the DAGs that are stored, in addition to their tasks
+DAG_FIELDS = [
+    'dag_id', 'fileloc', 'full_filepath', 'description', 'schedule_interval',
+    'start_date', 'end_date', 'default_view', 'orientation', 'catchup',
+    'concurrency', 'max_active_runs', 'dagrun_timeout', 'template_searchpath',
+    'params', 'doc_md',
+]
+
+# Attributes of the tasks that are stored, in addition to their template
+# fields and documentation
+TASK_FIELDS = [
+    'task_id', 'owner', 'email', 'email_on_retry', 'email_on_failure',
+    'retries', 'retry_delay', 'retry_exponential_backoff', 'max_retry_delay',
+    'start_date', 'end_date', 'depends_on_past', 'wait_for_downstream',
+    'trigger_rule', 'queue', 'pool', 'sla', 'execution_timeout',
+    'priority_weight', 'weight_rule', 'run_as_user', 'task_concurrency',
+    'adhoc', 'params', 'ui_color', 'ui_fgcolor', 'template_fields',
+    'template_ext',
+]
+
+# The documentation attributes the task view renders
+TASK_DOC_FIELDS = ['doc', 'doc_md', 'doc_rst', 'doc_json', 'doc_yaml']
+
+RELATIVEDELTA_FIELDS = [
+    'years', 'months', 'days', 'leapdays', 'hours', 'minutes', 'seconds',
+    'microseconds', 'year', 'month', 'day', 'hour', 'minute', 'second',
+    'microsecond',
+]
+
+
+def _serialize(value):
+    """
+    Converts a value to something JSON can encode, wrapping the types JSON
+    has no representation for with their type so they can be restored.
+    Values of any other type are stored as their string representation.
+    """
+    if value is None or isinstance(value, (bool, float) + six.integer_types +
+                                   six.string_types):
+        return value
+    elif isinstance(value, datetime.datetime):
+        return {'__type': 'datetime', '__var': value.isoformat()}
+    elif isinstance(value, datetime.timedelta):
+        return {'__type': 'timedelta', '__var': value.total_seconds()}
+    elif isinstance(value, relativedelta):
+        return {'__type': 'relativedelta',
+                '__var': {field: getattr(value, field)
+                          for field in RELATIVEDELTA_FIELDS
+                          if getattr(value, field)}}
+    elif isinstance(value, dict):
+        return {str(k): _serialize(v) for k, v in value.items()}
+    elif isinstance(value, (set, frozenset)):
+        # The iteration order of sets changes between processes with hash
+        # randomization, sorting them keeps the hash of the DAG stable
+        return sorted((_serialize(v) for v in value),
+                      key=lambda v: json.dumps(v, sort_keys=True))
+    elif isinstance(value, (list, tuple)):
+        return [_serialize(v) for v in value]
+    return str(value)
+
+
+def _deserialize(value):
+    if isinstance(value, list):
+        return [_deserialize(v) for v in value]
+    elif not isinstance(value, dict):
+        return value
+    elif value.get('__type') == 'datetime':
+        return timezone.parse(value['__var'])
+    elif value.get('__type') == 'timedelta':
+        return datetime.timedelta(seconds=value['__var'])
+    elif value.get('__type') == 'relativedelta':
+        return relativedelta(**value['__var'])
+    return {k: _deserialize(v) for k, v in value.items()}
+
+
+class SerializedBaseOperator(BaseOperator):
+    """
+    A task restored from its serialized form. It shows the type of the
+    operator it was serialized from, but it can't be executed.
+    """
+    def __init__(self, task_type='BaseOperator', *args, **kwargs):
+        super(SerializedBaseOperator, self).__init__(*args, **kwargs)
+        self._task_type = task_type
+
+    @property
+    def task_type(self):
+        return self._task_type
+
+
+def serialize_task(task):
+    """
+    Returns the serialized form of a task, as a dict that JSON can encode.
+
+    :param task: the task to serialize
+    :type task: BaseOperator
+    :rtype: dict
+    """
+    data = {field: _serialize(getattr(task, field, None))
+            for field in TASK_FIELDS}
+    data['_task_type'] = task.task_type
+    data['_downstream_task_ids'] = sorted(task.downstream_task_ids)
+    for field in TASK_DOC_FIELDS:
+        if getattr(task, field, None):
+            data[field] = _serialize(getattr(task, field))
+    data['_template_values'] = {
+        field: _serialize(getattr(task, field, None))
+        for field in task.template_fields}
+    python_callable = getattr(task, 'python_callable', None)
+    if python_callable is not None:
+        try:
+            data['python_callable'] = inspect.getsource(python_callable)
+        except (IOError, TypeError):
+            data['python_callable'] = str(python_callable)
+    subdag = getattr(task, 'subdag', None)
+    if task.task_type == 'SubDagOperator' and subdag is not None:
+        data['subdag'] = serialize_dag(subdag)
+    return data
+
+
+def deserialize_task(data):
+    """
+    Restores a task from its serialized form. The task is not assigned to a
+    DAG yet.
+
+    :param data: the serialized form of the task
+    :type data: dict
+    :rtype: SerializedBaseOperator
+    """
+    task = SerializedBaseOperator(task_type=data['_task_type'],
+                                  task_id=data['task_id'])
+    for field in TASK_FIELDS + TASK_DOC_FIELDS + ['python_callable']:
+        if field in data:
+            setattr(task, field, _deserialize(data[field]))
+    for field, value in data['_template_values'].items():
+        setattr(task, field, _deserialize(value))
+    if 'subdag' in data:
+        task.subdag = deserialize_dag(data['subdag'])
+    task._downstream_task_ids = list(data['_downstream_task_ids'])
+    return task
+
+
+def serialize_dag(dag):
+    """
+    Returns the serialized form of a DAG and its tasks, as a dict that JSON
+    can encode. The DAGs of the SubDagOperators are embedded into it.
+
+    :param dag: the DAG to serialize
+    :type dag: DAG
+    :rtype: dict
+    """
+    data = {field: _serialize(getattr(dag, field, None))
+            for field in DAG_FIELDS}
+    data['timezone'] = getattr(dag.timezone, 'name', 'UTC')
+    data['tasks'] = [serialize_task(task) for task in dag.tasks]
+    return data
+
+
+def deserialize_dag(data):
+    """
+    Restores a DAG and its tasks from its serialized form.
+
+    :param data: the serialized form of the DAG
+    :type data: dict
+    :rtype: DAG
+    """
+    kwargs = {field: _deserialize(data[field])
+              for field in DAG_FIELDS if field not in ('fileloc', 'doc_md')}
+    dag = DAG(**kwargs)
+    dag.fileloc = data['fileloc']
+    dag.doc_md = data['doc_md']
+    dag.timezone = pendulum.timezone(data['timezone'])
+
+    for task_data in data['tasks']:
+        task = deserialize_task(task_data)
+        dag.add_task(task)
+        if getattr(task, 'subdag', None) is not None:
+            task.subdag.parent_dag = dag
+            task.subdag.is_subdag = True
+    for task in dag.tasks:
+        for downstream_task_id in task.downstream_task_ids:
+            dag.get_task(downstream_task_id)._upstream_task_ids.append(
+                task.task_id)
+    dag.clear_graph_index()
+    return dag
+
+
+def to_json(data):
+    """
+    Encodes the serialized form of a DAG, always the same way for the same
+    DAG so that it can be compared with what is stored.
+    """
+    return json.dumps(data, sort_keys=True)
+
+
+def from_json(text):
+    return json.loads(text)
+
+
+class SerializedDagBag(BaseDagBag, LoggingMixin):
+    """
+    A collection of the DAGs the scheduler stored in the database, see
+    SerializedDagModel. The DAGs are read when they are first asked for and
+    the most recently used ones are kept, so a process never holds more than
+    `cache_size` DAGs. A DAG is read again when the scheduler stored a newer
+    version of it, which is checked at most every `min_fetch_interval`
+    seconds.
+
+    :param cache_size: the maximum number of DAGs to keep
+    :type cache_size: int
+    :param min_fetch_interval: the number of seconds to trust a kept DAG
+        before checking whether it changed
+    :type min_fetch_interval: float
+    """
+    def __init__(self, cache_size=None, min_fetch_interval=None):
+        if cache_size is None:
+            cache_size = configuration.getint(
+                'webserver', 'serialized_dag_cache_size')
+        if min_fetch_interval is None:
+            min_fetch_interval = configuration.getfloat(
+                'webserver', 'min_serialized_dag_fetch_interval')
+        self.cache_size = max(cache_size, 1)
+        self.min_fetch_interval = min_fetch_interval
+        # Map from the ids of the root DAGs to (dag, last_updated,
+        # last_checked), from the least to the most recently used
+        self._dags = OrderedDict()
+        # Map from the ids of the subdags to the ids of their root DAG
+        self._root_dag_ids = {}
+
+    @property
+    def dag_ids(self):
+        return SerializedDagModel.get_dag_ids()
+
+    def size(self):
+        """
+        :return: the number of DAGs stored in the database
+        """
+        return len(self.dag_ids)
+
+    def collect_dags(self, only_if_updated=True):
+        """
+        Forgets the kept DAGs, so that they are read again when asked for.
+        """
+        self._dags.clear()
+        self._root_dag_ids.clear()
+
+    def get_dag(self, dag_id):
+        """
+        Returns the DAG stored for `dag_id`, or None if there is none. The
+        subdags are found through their root DAG.
+        """
+        root_dag_id = self._root_dag_ids.get(dag_id, dag_id)
+        root_dag = self._get_root_dag(root_dag_id)
+        if root_dag is None and root_dag_id == dag_id and '.' in dag_id:
+            # Not known yet, subdag ids start with the id of their parent
+            parent_dag = self.get_dag(dag_id.rsplit('.', 1)[0])
+            if parent_dag is not None:
+                return self._find_subdag(parent_dag, dag_id)
+            return None
+        if root_dag is None or root_dag_id == dag_id:
+            return root_dag
+        return self._find_subdag(root_dag, dag_id)
+
+    def _find_subdag(self, dag, dag_id):
+        for subdag in dag.subdags:
+            if subdag.dag_id == dag_id:
+                return subdag
+        return None
+
+    def _get_root_dag(self, dag_id):
+        now = time.time()
+        if dag_id in self._dags:
+            dag, last_updated, last_checked = self._dags.pop(dag_id)
+            if now - last_checked < self.min_fetch_interval:
+                self._dags[dag_id] = (dag, last_updated, last_checked)
+                return dag
+            if SerializedDagModel.get_last_updated(dag_id) == last_updated:
+                self._dags[dag_id] = (dag, last_updated, now)
+                return dag
+
+        row = SerializedDagModel.read_dag(dag_id)
+        if row is None:
+            return None
+        dag, last_updated = row
+        self.log.debug("Read DAG %s from the database", dag_id)
+        self._dags[dag_id] = (dag, last_updated, now)
+        for subdag in dag.subdags:
+            self._root_dag_ids[subdag.dag_id] = dag_id
+        while len(self._dags) > self.cache_size:
+            self._dags.popitem(last=False)
+        return dag
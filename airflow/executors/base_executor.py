@@ -11,9 +11,14 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import heapq
 from builtins import range
+from collections import defaultdict
+
+from sqlalchemy import and_, or_
 
 from airflow import configuration
+from airflow.utils.db import provide_session
 from airflow.utils.log.logging_mixin import LoggingMixin
 from airflow.utils.state import State
 
@@ -111,34 +116,85 @@ class BaseExecutor(LoggingMixin):
         self.log.debug("%s in queue", len(self.queued_tasks))
         self.log.debug("%s open slots", open_slots)
 
-        sorted_queue = sorted(
-            [(k, v) for k, v in self.queued_tasks.items()],
-            key=lambda x: x[1][1],
-            reverse=True)
-        for i in range(min((open_slots, len(self.queued_tasks)))):
-            key, (command, _, queue, ti) = sorted_queue.pop(0)
-            # TODO(jlowin) without a way to know what Job ran which tasks,
-            # there is a danger that another Job started running a task
-            # that was also queued to this executor. This is the last chance
-            # to check if that happened. The most probable way is that a
-            # Scheduler tried to run a task that was originally queued by a
-            # Backfill. This fix reduces the probability of a collision but
-            # does NOT eliminate it.
+        # Only pick the tasks to launch out of the queue rather than sorting
+        # all of it
+        tasks_to_launch = heapq.nlargest(
+            min(open_slots, len(self.queued_tasks)),
+            self.queued_tasks.items(),
+            key=lambda x: x[1][1])
+        # TODO(jlowin) without a way to know what Job ran which tasks,
+        # there is a danger that another Job started running a task
+        # that was also queued to this executor. This is the last chance
+        # to check if that happened. The most probable way is that a
+        # Scheduler tried to run a task that was originally queued by a
+        # Backfill. This fix reduces the probability of a collision but
+        # does NOT eliminate it.
+        self._refresh_from_db([ti for _, (_, _, _, ti) in tasks_to_launch])
+        batch = []
+        for key, (command, _, queue, ti) in tasks_to_launch:
             self.queued_tasks.pop(key)
-            ti.refresh_from_db()
             if ti.state != State.RUNNING:
                 self.running[key] = command
-                self.execute_async(key, command=command, queue=queue)
+                batch.append((key, command, queue))
             else:
                 self.log.debug(
                     'Task is already running, not sending to executor: %s',
                     key
                 )
+        if batch:
+            self.execute_async_batch(batch)
 
         # Calling child class sync method
         self.log.debug("Calling the %s sync method", self.__class__)
         self.sync()
 
+    @staticmethod
+    @provide_session
+    def _refresh_from_db(task_instances, session=None):
+        """
+        Refreshes task instances from the database with a single query,
+        like TaskInstance.refresh_from_db does for each of them: the state,
+        start_date, end_date, try_number, max_tries, hostname and pid are
+        reloaded, and the state of the task instances that are not in the
+        database is set to None.
+
+        :param task_instances: the task instances to refresh
+        :type task_instances: list[airflow.models.TaskInstance]
+        """
+        if not task_instances:
+            return
+        # Imported here as the models import the executors
+        from airflow.models import TaskInstance as TI
+
+        refreshed = {}
+        # Bound the number of bind parameters of every query
+        for i in range(0, len(task_instances), 500):
+            task_ids = defaultdict(list)
+            for ti in task_instances[i:i + 500]:
+                task_ids[(ti.dag_id, ti.execution_date)].append(ti.task_id)
+            filter_for_tis = [
+                and_(TI.dag_id == dag_id,
+                     TI.execution_date == execution_date,
+                     TI.task_id.in_(ids))
+                for (dag_id, execution_date), ids in task_ids.items()]
+            rows = (
+                session
+                .query(TI.dag_id, TI.task_id, TI.execution_date, TI.state,
+                       TI.start_date, TI.end_date, TI._try_number,
+                       TI.max_tries, TI.hostname, TI.pid)
+                .filter(or_(*filter_for_tis))
+                .all()
+            )
+            for row in rows:
+                refreshed[tuple(row[:3])] = row[3:]
+
+        for ti in task_instances:
+            if ti.key not in refreshed:
+                ti.state = None
+                continue
+            (ti.state, ti.start_date, ti.end_date, ti.try_number, ti.max_tries,
+             ti.hostname, ti.pid) = refreshed[ti.key]
+
     def change_state(self, key, state):
         self.running.pop(key)
         self.event_buffer[key] = state
@@ -176,6 +232,19 @@ class BaseExecutor(LoggingMixin):
         """
         raise NotImplementedError()
 
+    def execute_async_batch(self, tasks):
+        """
+        This method will execute many commands asynchronously, heartbeat
+        calls it with all the tasks it launches. Executors that can submit
+        many commands at once for less than one at a time should override it,
+        by default execute_async is called for every command.
+
+        :param tasks: the tasks to execute
+        :type tasks: list[tuple(key, command, queue)]
+        """
+        for key, command, queue in tasks:
+            self.execute_async(key, command=command, queue=queue)
+
     def end(self):  # pragma: no cover
         """
         This method is called when the caller is done submitting job and is
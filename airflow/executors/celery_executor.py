@@ -17,6 +17,8 @@ import time
 
 from celery import Celery
 from celery import states as celery_states
+from celery.backends.base import KeyValueStoreBackend
+from celery.backends.database import DatabaseBackend, Task as TaskDb, session_cleanup
 
 from airflow.config_templates.default_celery import DEFAULT_CELERY_CONFIG
 from airflow.exceptions import AirflowException
@@ -55,6 +57,51 @@ def execute_command(command):
         raise AirflowException('Celery command failed')
 
 
+def fetch_celery_task_state(async_results, chunk_size=1000):
+    """
+    Fetches the states of many celery tasks with as few calls to the result
+    backend as possible: one `mget` per chunk of tasks for key/value store
+    backends (e.g. Redis, Memcached), one query per chunk of tasks for the
+    database backend, and one call per task for any other backend.
+
+    :param async_results: the results of the celery tasks
+    :type async_results: list[celery.result.AsyncResult]
+    :param chunk_size: the number of tasks to fetch per call
+    :type chunk_size: int
+    :return: map from celery task id to the state of the task
+    :rtype: dict
+    """
+    states = {}
+    for i in range(0, len(async_results), chunk_size):
+        chunk = async_results[i:i + chunk_size]
+        backend = chunk[0].backend
+        task_ids = [async_result.task_id for async_result in chunk]
+        if isinstance(backend, KeyValueStoreBackend):
+            keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+            values = backend.mget(keys)
+            # Some backends (e.g. Memcached) return a map from key to value
+            if hasattr(values, 'items'):
+                values = [values.get(key) for key in keys]
+            for task_id, value in zip(task_ids, values):
+                if value is None:
+                    states[task_id] = celery_states.PENDING
+                else:
+                    states[task_id] = backend.decode_result(value)['status']
+        elif isinstance(backend, DatabaseBackend):
+            session = backend.ResultSession()
+            with session_cleanup(session):
+                found = dict(
+                    session.query(TaskDb.task_id, TaskDb.status)
+                    .filter(TaskDb.task_id.in_(task_ids))
+                    .all())
+            for task_id in task_ids:
+                states[task_id] = found.get(task_id, celery_states.PENDING)
+        else:
+            for async_result in chunk:
+                states[async_result.task_id] = async_result.state
+    return states
+
+
 class CeleryExecutor(BaseExecutor):
     """
     CeleryExecutor is recommended for production use of Airflow. It allows
@@ -69,42 +116,55 @@ class CeleryExecutor(BaseExecutor):
         self.last_state = {}
 
     def execute_async(self, key, command,
-                      queue=DEFAULT_CELERY_CONFIG['task_default_queue']):
+                      queue=DEFAULT_CELERY_CONFIG['task_default_queue'],
+                      producer=None):
         self.log.info( "[celery] queuing {key} through celery, "
                        "queue={queue}".format(**locals()))
         self.tasks[key] = execute_command.apply_async(
-            args=[command], queue=queue)
+            args=[command], queue=queue, producer=producer)
         self.last_state[key] = celery_states.PENDING
 
+    def execute_async_batch(self, tasks):
+        # Publish all the messages through a single producer rather than
+        # acquiring a connection to the broker for every message
+        with app.producer_or_acquire() as producer:
+            for key, command, queue in tasks:
+                self.execute_async(key, command, queue=queue, producer=producer)
+
     def sync(self):
         self.log.debug("Inquiring about %s celery task(s)", len(self.tasks))
-        for key, async in list(self.tasks.items()):
-            try:
-                state = async.state
-                if self.last_state[key] != state:
-                    if state == celery_states.SUCCESS:
-                        self.success(key)
-                        del self.tasks[key]
-                        del self.last_state[key]
-                    elif state == celery_states.FAILURE:
-                        self.fail(key)
-                        del self.tasks[key]
-                        del self.last_state[key]
-                    elif state == celery_states.REVOKED:
-                        self.fail(key)
-                        del self.tasks[key]
-                        del self.last_state[key]
-                    else:
-                        self.log.info("Unexpected state: %s", async.state)
-                    self.last_state[key] = async.state
-            except Exception as e:
-                self.log.error("Error syncing the celery executor, ignoring it:")
-                self.log.exception(e)
+        try:
+            states = fetch_celery_task_state(list(self.tasks.values()))
+        except Exception as e:
+            self.log.error("Error syncing the celery executor, ignoring it:")
+            self.log.exception(e)
+            return
+
+        for key, async_result in list(self.tasks.items()):
+            state = states.get(async_result.task_id)
+            if state is None or self.last_state[key] == state:
+                continue
+            if state == celery_states.SUCCESS:
+                self.success(key)
+                del self.tasks[key]
+                del self.last_state[key]
+            elif state == celery_states.FAILURE:
+                self.fail(key)
+                del self.tasks[key]
+                del self.last_state[key]
+            elif state == celery_states.REVOKED:
+                self.fail(key)
+                del self.tasks[key]
+                del self.last_state[key]
+            else:
+                self.log.info("Unexpected state: %s", state)
+                self.last_state[key] = state
 
     def end(self, synchronous=False):
         if synchronous:
             while any([
-                    async.state not in celery_states.READY_STATES
-                    for async in self.tasks.values()]):
+                    state not in celery_states.READY_STATES
+                    for state in fetch_celery_task_state(
+                        list(self.tasks.values())).values()]):
                 time.sleep(5)
         self.sync()
@@ -13,41 +13,164 @@
 # limitations under the License.
 
 import distributed
+import multiprocessing
+import os
+import shlex
 import subprocess
+import threading
 import warnings
 
+import dill
+
 from airflow import configuration
+from airflow.exceptions import AirflowException
 from airflow.executors.base_executor import BaseExecutor
+from airflow.utils.dag_processing import DagFileParseCache
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+# The DagBags parsed by the Dask worker running this module, see
+# airflow_run_in_worker. The threads of the worker share them.
+_worker_dag_cache = None
+_worker_dag_cache_lock = threading.Lock()
+
+
+def airflow_run(command):
+    return subprocess.check_call(command, shell=True, close_fds=True)
+
+
+def _get_worker_dag(args):
+    """
+    Returns the DAG of the task of an `airflow run` command out of the DagBags
+    the worker keeps, or None if the command doesn't point at a DAG file.
+    """
+    # Imported here as the cli imports the jobs, which import the executors
+    from airflow.bin.cli import process_subdir
+    from airflow.models import DagBag
+
+    global _worker_dag_cache
+    file_path = process_subdir(args.subdir)
+    if args.pickle or not file_path or not os.path.isfile(file_path):
+        return None
+
+    signature = DagFileParseCache.get_file_signature(file_path)
+    with _worker_dag_cache_lock:
+        if _worker_dag_cache is None:
+            _worker_dag_cache = DagFileParseCache(
+                max_age=configuration.getfloat('dask', 'worker_dag_cache_max_age'))
+        dagbag = _worker_dag_cache.get(file_path, signature)
+    if dagbag is None:
+        dagbag = DagBag(file_path, include_examples=False)
+        # A file that failed to import is parsed again by the next task
+        if not dagbag.import_errors:
+            with _worker_dag_cache_lock:
+                _worker_dag_cache.set(file_path, signature, dagbag)
+    return dagbag.dags.get(args.dag_id)
+
+
+def _run_in_process(command, pickled_dag):
+    """
+    Runs an `airflow run` command through the cli, in the process started by
+    airflow_run_in_worker.
+    """
+    # Imported here as the cli imports the jobs, which import the executors
+    from airflow.bin.cli import get_parser
+
+    # The first token is the airflow executable
+    args = get_parser().parse_args(shlex.split(command)[1:])
+    dag = dill.loads(pickled_dag) if pickled_dag is not None else None
+    args.func(args, dag=dag)
+
+
+def airflow_run_in_worker(command):
+    """
+    Runs an `airflow run` command through the cli in a new Python process
+    instead of through a shell. The DAG of the task is taken out of the DAGs
+    the Dask worker keeps and handed to the process, which only parses the
+    DAG file itself if the DAG can't be pickled.
+
+    The process is spawned rather than forked from the worker, as a fork of
+    its threads could inherit locks held by the others.
+
+    :param command: the command to execute
+    :type command: unicode
+    """
+    if not hasattr(multiprocessing, 'get_context'):
+        # Python 2 can only fork, run the command through a shell instead
+        return airflow_run(command)
+
+    # Imported here as the cli imports the jobs, which import the executors
+    from airflow.bin.cli import get_parser
+
+    args = get_parser().parse_args(shlex.split(command)[1:])
+    pickled_dag = None
+    dag = _get_worker_dag(args)
+    if dag is not None:
+        try:
+            pickled_dag = dill.dumps(dag)
+        except Exception:
+            LoggingMixin().log.debug("Could not pickle DAG %s", dag.dag_id)
+
+    process = multiprocessing.get_context('spawn').Process(
+        target=_run_in_process, args=(command, pickled_dag))
+    process.start()
+    process.join()
+    if process.exitcode:
+        raise AirflowException(
+            'Command {} failed with exit code {}'.format(command, process.exitcode))
 
 
 class DaskExecutor(BaseExecutor):
     """
     DaskExecutor submits tasks to a Dask Distributed cluster.
     """
-    def __init__(self, cluster_address=None):
+    def __init__(self, cluster_address=None, run_in_worker=None):
         if cluster_address is None:
             cluster_address = configuration.get('dask', 'cluster_address')
         if not cluster_address:
             raise ValueError(
                 'Please provide a Dask cluster address in airflow.cfg')
+        if run_in_worker is None:
+            run_in_worker = configuration.getboolean('dask', 'run_in_worker')
         self.cluster_address = cluster_address
+        self.run_in_worker = run_in_worker
         super(DaskExecutor, self).__init__(parallelism=0)
 
     def start(self):
         self.client = distributed.Client(self.cluster_address)
         self.futures = {}
+        # Yields the futures as they complete
+        self.completed = distributed.as_completed()
+
+    @property
+    def _run_function(self):
+        return airflow_run_in_worker if self.run_in_worker else airflow_run
+
+    def _add_future(self, future, key):
+        self.futures[future] = key
+        self.completed.add(future)
 
     def execute_async(self, key, command, queue=None):
         if queue is not None:
             warnings.warn(
-                'DaskExecutor does not support queues. All tasks will be run in the same cluster'
+                'DaskExecutor does not support queues. '
+                'All tasks will be run in the same cluster'
             )
 
-        def airflow_run():
-            return subprocess.check_call(command, shell=True, close_fds=True)
+        future = self.client.submit(self._run_function, command, pure=False)
+        self._add_future(future, key)
 
-        future = self.client.submit(airflow_run, pure=False)
-        self.futures[future] = key
+    def execute_async_batch(self, tasks):
+        if any(queue is not None for _, _, queue in tasks):
+            warnings.warn(
+                'DaskExecutor does not support queues. '
+                'All tasks will be run in the same cluster'
+            )
+
+        # Submit all the commands to the scheduler of the cluster at once
+        futures = self.client.map(
+            self._run_function, [command for _, command, _ in tasks], pure=False)
+        for future, (key, _, _) in zip(futures, tasks):
+            self._add_future(future, key)
 
     def _process_future(self, future):
         if future.done():
@@ -63,12 +186,12 @@ class DaskExecutor(BaseExecutor):
             self.futures.pop(future)
 
     def sync(self):
-        # make a copy so futures can be popped during iteration
-        for future in self.futures.copy():
+        # Only look at the futures that completed since the last sync
+        for future in self.completed.next_batch(block=False):
             self._process_future(future)
 
     def end(self):
-        for future in distributed.as_completed(self.futures.copy()):
+        for future in self.completed:
             self._process_future(future)
 
     def terminate(self):
@@ -33,6 +33,13 @@ the LocalExecutor, the worker processes are running waiting for tasks, once the
 LocalExecutor receives the call to shutdown the executor a poison token is sent to the
 workers to terminate them. Processes used in this strategy are of class QueuedLocalWorker.
 
+With `local_executor_fork_tasks` enabled, workers don't start a Bash shell for the
+`airflow run` commands they receive. Instead they fork and run the command through
+the cli in the child, which already imported Airflow, so every task still runs in its
+own process without booting an interpreter. Workers don't pause after a task in this
+mode and, with unlimited parallelism, idle workers are reused instead of starting a
+process per task.
+
 Arguably, `SequentialExecutor` could be thought as a LocalExecutor with limited
 parallelism of just 1 worker, i.e. `self.parallelism = 1`.
 This option could lead to the unification of the executor implementations, running
@@ -40,12 +47,16 @@ locally, into just one `LocalExecutor` with multiple modes.
 """
 
 import multiprocessing
+import os
+import shlex
+import signal
 import subprocess
 import time
 
 from builtins import range
 
-from airflow.executors.base_executor import BaseExecutor
+from airflow import configuration, settings
+from airflow.executors.base_executor import BaseExecutor, PARALLELISM
 from airflow.utils.log.logging_mixin import LoggingMixin
 from airflow.utils.state import State
 
@@ -55,14 +66,18 @@ class LocalWorker(multiprocessing.Process, LoggingMixin):
     """LocalWorker Process implementation to run airflow commands. Executes the given
     command and puts the result into a result queue when done, terminating execution."""
 
-    def __init__(self, result_queue):
+    def __init__(self, result_queue, fork_tasks=False):
         """
         :param result_queue: the queue to store result states tuples (key, State)
         :type result_queue: multiprocessing.Queue
+        :param fork_tasks: run airflow commands in a forked process instead of
+            through a Bash shell
+        :type fork_tasks: bool
         """
         super(LocalWorker, self).__init__()
         self.daemon = True
         self.result_queue = result_queue
+        self.fork_tasks = fork_tasks
         self.key = None
         self.command = None
 
@@ -77,6 +92,10 @@ class LocalWorker(multiprocessing.Process, LoggingMixin):
         if key is None:
             return
         self.log.info("%s running %s", self.__class__.__name__, command)
+        if self.fork_tasks and command.startswith('airflow '):
+            state = self._execute_work_in_fork(command)
+            self.result_queue.put((key, state))
+            return
         command = "exec bash -c '{0}'".format(command)
         try:
             subprocess.check_call(command, shell=True, close_fds=True)
@@ -88,9 +107,52 @@ class LocalWorker(multiprocessing.Process, LoggingMixin):
             # raise e
         self.result_queue.put((key, state))
 
+    def _execute_work_in_fork(self, command):
+        """
+        Runs an airflow command through the cli in a forked process.
+
+        :param command: the command to execute
+        :type command: string
+        :return: the state of the execution
+        :rtype: unicode
+        """
+        # The forked process must not inherit pooled connections, their
+        # sockets would be shared with this process
+        settings.engine.dispose()
+        pid = os.fork()
+        if pid:
+            _, status = os.waitpid(pid, 0)
+            if status == 0:
+                return State.SUCCESS
+            self.log.error("Failed to execute task, exit status %s.", status)
+            return State.FAILED
+
+        return_code = 1
+        try:
+            # Imported here as the cli imports the jobs, which import the
+            # executors
+            from airflow.bin.cli import get_parser
+
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            # Never use the sessions of the executor
+            settings.configure_orm(disable_connection_pool=True)
+            # The first token is the airflow executable
+            args = get_parser().parse_args(shlex.split(command)[1:])
+            args.func(args)
+            return_code = 0
+        except SystemExit as e:
+            return_code = 1 if e.code else 0
+        except Exception:
+            self.log.exception("Failed to execute task %s.", command)
+        finally:
+            # Never return into the code of the worker
+            os._exit(return_code)
+
     def run(self):
         self.execute_work(self.key, self.command)
-        time.sleep(1)
+        if not self.fork_tasks:
+            time.sleep(1)
 
 
 class QueuedLocalWorker(LocalWorker):
@@ -99,8 +161,9 @@ class QueuedLocalWorker(LocalWorker):
     continue executing commands as they become available in the queue. It will terminate
     execution once the poison token is found."""
 
-    def __init__(self, task_queue, result_queue):
-        super(QueuedLocalWorker, self).__init__(result_queue=result_queue)
+    def __init__(self, task_queue, result_queue, fork_tasks=False):
+        super(QueuedLocalWorker, self).__init__(result_queue=result_queue,
+                                                fork_tasks=fork_tasks)
         self.task_queue = task_queue
 
     def run(self):
@@ -112,7 +175,8 @@ class QueuedLocalWorker(LocalWorker):
                 break
             self.execute_work(key, command)
             self.task_queue.task_done()
-            time.sleep(1)
+            if not self.fork_tasks:
+                time.sleep(1)
 
 
 class LocalExecutor(BaseExecutor):
@@ -122,9 +186,25 @@ class LocalExecutor(BaseExecutor):
     of tasks.
     """
 
+    def __init__(self, parallelism=PARALLELISM, fork_tasks=None):
+        """
+        :param parallelism: how many jobs should run at one time. Set to
+            ``0`` for infinity
+        :type parallelism: int
+        :param fork_tasks: run airflow commands in processes forked from the
+            workers instead of through a Bash shell, defaults to the
+            local_executor_fork_tasks setting
+        :type fork_tasks: bool
+        """
+        super(LocalExecutor, self).__init__(parallelism=parallelism)
+        if fork_tasks is None:
+            fork_tasks = configuration.getboolean('core', 'local_executor_fork_tasks')
+        self.fork_tasks = fork_tasks
+
     class _UnlimitedParallelism(object):
         """Implements LocalExecutor with unlimited parallelism, starting one process
-        per each command to execute."""
+        per each command to execute. When tasks are forked, workers are kept and a new
+        one is only started when all of them are busy."""
 
         def __init__(self, executor):
             """
@@ -136,6 +216,8 @@ class LocalExecutor(BaseExecutor):
         def start(self):
             self.executor.workers_used = 0
             self.executor.workers_active = 0
+            if self.executor.fork_tasks:
+                self.executor.queue = multiprocessing.JoinableQueue()
 
         def execute_async(self, key, command):
             """
@@ -144,6 +226,18 @@ class LocalExecutor(BaseExecutor):
             :param command: the command to execute
             :type command: string
             """
+            if self.executor.fork_tasks:
+                if self.executor.workers_active >= len(self.executor.workers):
+                    worker = QueuedLocalWorker(self.executor.queue,
+                                               self.executor.result_queue,
+                                               fork_tasks=True)
+                    self.executor.workers.append(worker)
+                    self.executor.workers_used += 1
+                    worker.start()
+                self.executor.workers_active += 1
+                self.executor.queue.put((key, command))
+                return
+
             local_worker = LocalWorker(self.executor.result_queue)
             local_worker.key = key
             local_worker.command = command
@@ -162,6 +256,12 @@ class LocalExecutor(BaseExecutor):
                 self.executor.sync()
                 time.sleep(0.5)
 
+            if self.executor.fork_tasks:
+                # Sending poison pill to all worker
+                for _ in self.executor.workers:
+                    self.executor.queue.put((None, None))
+                self.executor.queue.join()
+
     class _LimitedParallelism(object):
         """Implements LocalExecutor with limited parallelism using a task queue to
         coordinate work distribution."""
@@ -173,7 +273,8 @@ class LocalExecutor(BaseExecutor):
             self.executor.queue = multiprocessing.JoinableQueue()
 
             self.executor.workers = [
-                QueuedLocalWorker(self.executor.queue, self.executor.result_queue)
+                QueuedLocalWorker(self.executor.queue, self.executor.result_queue,
+                                  fork_tasks=self.executor.fork_tasks)
                 for _ in range(self.executor.parallelism)
             ]
 
@@ -25,6 +25,10 @@ class S3Hook(AwsHook):
     Interact with AWS S3, using the boto3 library.
     """
 
+    # The minimum size in bytes of the parts of a multipart upload but the
+    # last one
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
     def get_conn(self):
         return self.get_client_type('s3')
 
@@ -172,6 +176,29 @@ class S3Hook(AwsHook):
         obj = self.get_key(key, bucket_name)
         return obj.get()['Body'].read().decode('utf-8')
 
+    def read_key_range(self, key, offset, length=None, bucket_name=None):
+        """
+        Reads part of a key from S3
+
+        :param key: S3 key that will point to the file
+        :type key: str
+        :param offset: the offset in bytes of the part to read
+        :type offset: int
+        :param length: the number of bytes to read, the rest of the key
+            if None
+        :type length: int
+        :param bucket_name: Name of the bucket in which the file is stored
+        :type bucket_name: str
+        :return: the bytes read
+        :rtype: bytes
+        """
+        if length is None:
+            byte_range = 'bytes={}-'.format(offset)
+        else:
+            byte_range = 'bytes={}-{}'.format(offset, offset + length - 1)
+        obj = self.get_key(key, bucket_name)
+        return obj.get(Range=byte_range)['Body'].read()
+
     def check_for_wildcard_key(self,
                                wildcard_key, bucket_name=None, delimiter=''):
         """
@@ -307,3 +334,83 @@ class S3Hook(AwsHook):
         
         client = self.get_conn()
         client.upload_fileobj(filelike_buffer, bucket_name, key, ExtraArgs=extra_args)
+
+    def append_file(self,
+                    filename,
+                    key,
+                    bucket_name=None,
+                    encrypt=False,
+                    part_size=8 * 1024 * 1024):
+        """
+        Appends a local file to a key in S3, or loads it if the key doesn't
+        exist, without downloading the key. The file is streamed from disk in
+        parts of a multipart upload, the key being copied server-side as its
+        first part when it is large enough to be one.
+
+        :param filename: name of the file to append
+        :type filename: str
+        :param key: S3 key that will point to the file
+        :type key: str
+        :param bucket_name: Name of the bucket in which to store the file
+        :type bucket_name: str
+        :param encrypt: If True, the file will be encrypted on the server-side
+            by S3 and will be stored in an encrypted form while at rest in S3.
+        :type encrypt: bool
+        :param part_size: the size in bytes of the parts of the upload, at
+            least the 5MB S3 accepts for every part but the last one
+        :type part_size: int
+        """
+        if not bucket_name:
+            (bucket_name, key) = self.parse_s3_url(key)
+
+        if not self.check_for_key(key, bucket_name):
+            self.load_file(filename, key, bucket_name=bucket_name,
+                           replace=True, encrypt=encrypt)
+            return
+
+        part_size = max(part_size, self.MIN_PART_SIZE)
+        extra_args = {}
+        if encrypt:
+            extra_args['ServerSideEncryption'] = "AES256"
+
+        client = self.get_conn()
+        size = client.head_object(Bucket=bucket_name, Key=key)['ContentLength']
+        upload_id = client.create_multipart_upload(
+            Bucket=bucket_name, Key=key, **extra_args)['UploadId']
+        parts = []
+        try:
+            # Data of the key that is too small to be copied as a part
+            head = b''
+            if size >= self.MIN_PART_SIZE:
+                response = client.upload_part_copy(
+                    Bucket=bucket_name, Key=key, UploadId=upload_id,
+                    PartNumber=1,
+                    CopySource={'Bucket': bucket_name, 'Key': key})
+                parts.append({'PartNumber': 1,
+                              'ETag': response['CopyPartResult']['ETag']})
+            elif size:
+                head = client.get_object(
+                    Bucket=bucket_name, Key=key)['Body'].read()
+
+            with open(filename, 'rb') as f:
+                while True:
+                    data = head + f.read(part_size - len(head))
+                    head = b''
+                    if not data and parts:
+                        break
+                    part_number = len(parts) + 1
+                    response = client.upload_part(
+                        Bucket=bucket_name, Key=key, UploadId=upload_id,
+                        PartNumber=part_number, Body=data)
+                    parts.append({'PartNumber': part_number,
+                                  'ETag': response['ETag']})
+                    if len(data) < part_size:
+                        break
+
+            client.complete_multipart_upload(
+                Bucket=bucket_name, Key=key, UploadId=upload_id,
+                MultipartUpload={'Parts': parts})
+        except Exception:
+            client.abort_multipart_upload(
+                Bucket=bucket_name, Key=key, UploadId=upload_id)
+            raise
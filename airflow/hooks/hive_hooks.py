@@ -15,6 +15,7 @@
 
 from __future__ import print_function, unicode_literals
 from six.moves import zip
+from six.moves.urllib.parse import unquote
 from past.builtins import basestring
 
 import unicodecsv as csv
@@ -544,6 +545,61 @@ class HiveMetastoreHook(BaseHook):
         finally:
             self.metastore._oprot.trans.close()
 
+    def check_for_named_partitions(self, schema, table, partition_names):
+        """
+        Checks which partitions of a table exist with a single metastore call,
+        instead of one check_for_named_partition call per partition
+
+        :param schema: Name of hive schema (database) @table belongs to
+        :type schema: string
+        :param table: Name of hive table @partition belongs to
+        :type table: string
+        :param partition_names: Names of the partitions to check for
+            (eg `a=b/c=d`)
+        :type partition_names: iterable of strings
+        :return: the names of the partitions that exist
+        :rtype: set
+
+        >>> hh = HiveMetastoreHook()
+        >>> t = 'static_babynames_partitioned'
+        >>> sorted(hh.check_for_named_partitions(
+        ...     'airflow', t, ["ds=2015-01-01", "ds=xxx"]))
+        ['ds=2015-01-01']
+        """
+        partition_names = list(partition_names)
+        self.metastore._oprot.trans.open()
+        try:
+            table_obj = self.metastore.get_table(dbname=schema, tbl_name=table)
+            partitions = self.metastore.get_partitions_by_names(
+                schema, table, partition_names)
+        except hive_metastore.ttypes.NoSuchObjectException:
+            return set()
+        finally:
+            self.metastore._oprot.trans.close()
+
+        # Partitions are compared by their values in the order of the keys of
+        # the table, as the metastore returns them, not by their names: keys
+        # are case insensitive and values are escaped in names
+        keys = [key.name.lower() for key in table_obj.partitionKeys]
+        existing = {tuple(partition.values) for partition in partitions}
+        return {name for name in partition_names
+                if self._get_partition_values(name, keys) in existing}
+
+    @staticmethod
+    def _get_partition_values(partition_name, keys):
+        """
+        Returns the unescaped values of a partition name (eg `a=b/c=d`), in
+        the order of the given lowercase keys, or None if it doesn't have a
+        value for every key.
+        """
+        values = {}
+        for part in partition_name.split('/'):
+            key, _, value = part.partition('=')
+            values[unquote(key).lower()] = unquote(value)
+        if set(values) != set(keys):
+            return None
+        return tuple(values[key] for key in keys)
+
     def get_table(self, table_name, db='default'):
         """Get a metastore table object
 
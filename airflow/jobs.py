@@ -17,7 +17,9 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import copy
 import getpass
+import heapq
 import logging
 import multiprocessing
 import os
@@ -45,21 +47,24 @@ from airflow import executors, models, settings
 from airflow.exceptions import AirflowException
 from airflow.logging_config import configure_logging
 from airflow.models import DAG, DagRun
+from airflow.sensors.base_sensor_operator import BaseSensorOperator, poke_in_batches
 from airflow.settings import Stats
 from airflow.task.task_runner import get_task_runner
 from airflow.ti_deps.dep_context import DepContext, QUEUE_DEPS, RUN_DEPS
 from airflow.utils import asciiart, timezone
 from airflow.utils.dag_processing import (AbstractDagFileProcessor,
+                                          DagFileParseCache,
+                                          DagFileIndex,
                                           DagFileProcessorManager,
                                           SimpleDag,
-                                          SimpleDagBag,
-                                          list_py_file_paths)
+                                          SimpleDagBag)
 from airflow.utils.db import create_session, provide_session
 from airflow.utils.email import send_email
 from airflow.utils.log.logging_mixin import LoggingMixin, set_context, StreamLogWriter
 from airflow.utils.state import State
 from airflow.utils.configuration import tmp_configuration_copy
 from airflow.utils.net import get_hostname
+from airflow.utils.profiling import PhaseTimer, SamplingProfiler
 
 Base = models.Base
 ID_LEN = models.ID_LEN
@@ -341,6 +346,8 @@ class DagFileProcessor(AbstractDagFileProcessor, LoggingMixin):
         def helper():
             # This helper runs in the newly created process
             log = logging.getLogger("airflow.processor")
+            # Don't inherit the profiler handler of the scheduler
+            signal.signal(signal.SIGUSR2, signal.SIG_DFL)
 
             stdout = StreamLogWriter(log, logging.INFO)
             stderr = StreamLogWriter(log, logging.WARN)
@@ -491,6 +498,469 @@ class DagFileProcessor(AbstractDagFileProcessor, LoggingMixin):
         return self._start_time
 
 
+class DagFileProcessorWorker(LoggingMixin):
+    """
+    A long-lived process that calls SchedulerJob.process_file() for every file
+    that is handed to it. The ORM engine and the imported modules are kept
+    between files. The process exits by itself once it processed
+    max_files files or once its memory exceeds max_memory_mb, so that it can
+    be replaced by a fresh one.
+    """
+
+    # Counter that increments everytime an instance of this class is created
+    class_creation_counter = 0
+
+    def __init__(self, pickle_dags, dag_id_white_list, max_files, max_memory_mb):
+        """
+        :param pickle_dags: whether to serialize the DAG objects to the DB
+        :type pickle_dags: bool
+        :param dag_id_white_list: If specified, only look at these DAG ID's
+        :type dag_id_white_list: list[unicode]
+        :param max_files: exit after processing this many files, 0 for no limit
+        :type max_files: int
+        :param max_memory_mb: exit once the resident memory of the process
+        exceeds this many megabytes, 0 for no limit
+        :type max_memory_mb: int
+        """
+        # Queue that's used to pass file paths to the child process.
+        self._file_path_queue = multiprocessing.Queue()
+        # Queue that's used to pass results from the child process.
+        self._result_queue = multiprocessing.Queue()
+        self._process = None
+        self._pickle_dags = pickle_dags
+        self._dag_id_white_list = dag_id_white_list
+        self._max_files = max_files
+        self._max_memory_mb = max_memory_mb
+        # The result of Scheduler.process_file() for the last file.
+        self.result = None
+        # Whether the child process announced that it exits after the last file
+        self._recycle = False
+        self._instance_id = DagFileProcessorWorker.class_creation_counter
+        DagFileProcessorWorker.class_creation_counter += 1
+
+    @staticmethod
+    def _launch_process(file_path_queue,
+                        result_queue,
+                        pickle_dags,
+                        dag_id_white_list,
+                        max_files,
+                        max_memory_mb,
+                        thread_name):
+        """
+        Launch a process that processes the files put on the file path queue
+        until it receives None, reaches max_files or exceeds max_memory_mb.
+
+        :param file_path_queue: the queue to read the files to process from
+        :type file_path_queue: multiprocessing.Queue
+        :param result_queue: the queue to use for passing back the results,
+        a tuple of the result and whether the process exits afterwards
+        :type result_queue: multiprocessing.Queue
+        :param pickle_dags: whether to pickle the DAGs found in the files and
+        save them to the DB
+        :type pickle_dags: bool
+        :param dag_id_white_list: if specified, only examine DAG ID's that are
+        in this list
+        :type dag_id_white_list: list[unicode]
+        :param max_files: the number of files to process before exiting
+        :type max_files: int
+        :param max_memory_mb: the resident memory to exit at
+        :type max_memory_mb: int
+        :param thread_name: the name to use for the process that is launched
+        :type thread_name: unicode
+        :return: the process that was launched
+        :rtype: multiprocessing.Process
+        """
+        def helper():
+            # This helper runs in the newly created process
+            log = logging.getLogger("airflow.processor")
+            # Don't inherit the profiler handler of the scheduler
+            signal.signal(signal.SIGUSR2, signal.SIG_DFL)
+
+            stdout = StreamLogWriter(log, logging.INFO)
+            stderr = StreamLogWriter(log, logging.WARN)
+
+            try:
+                # redirect stdout/stderr to log
+                sys.stdout = stdout
+                sys.stderr = stderr
+
+                # Re-configure the ORM engine as there are issues with multiple
+                # processes. The engine is then reused for every file.
+                settings.configure_orm()
+
+                threading.current_thread().name = thread_name
+                this_process = psutil.Process(os.getpid())
+                scheduler_job = SchedulerJob(dag_ids=dag_id_white_list, log=log)
+                num_files = 0
+
+                while True:
+                    file_path = file_path_queue.get()
+                    if file_path is None:
+                        break
+
+                    set_context(log, file_path)
+                    start_time = time.time()
+                    log.info("Process (PID=%s) started to work on %s",
+                             os.getpid(), file_path)
+                    try:
+                        result = scheduler_job.process_file(file_path, pickle_dags)
+                    except Exception:
+                        # The process is kept alive, the failure is reported
+                        # to the processor as a missing result.
+                        log.exception("Got an exception while processing %s",
+                                      file_path)
+                        result = None
+                    num_files += 1
+                    log.info("Processing %s took %.3f seconds",
+                             file_path, time.time() - start_time)
+
+                    memory_mb = this_process.memory_info().rss / (1024 * 1024)
+                    recycle = (0 < max_files <= num_files or
+                               0 < max_memory_mb <= memory_mb)
+                    result_queue.put((result, recycle))
+                    if recycle:
+                        log.info("Exiting process (PID=%s) after processing %s "
+                                 "files using %.1f MB", os.getpid(), num_files,
+                                 memory_mb)
+                        break
+            except:
+                # Log exceptions through the logging framework.
+                log.exception("Got an exception! Propagating...")
+                raise
+            finally:
+                sys.stdout = sys.__stdout__
+                sys.stderr = sys.__stderr__
+                # We re-initialized the ORM within this Process above so we need to
+                # tear it down manually here
+                settings.dispose_orm()
+
+        p = multiprocessing.Process(target=helper,
+                                    args=(),
+                                    name="{}-Process".format(thread_name))
+        p.start()
+        return p
+
+    def start(self):
+        """
+        Launch the process.
+        """
+        self._process = DagFileProcessorWorker._launch_process(
+            self._file_path_queue,
+            self._result_queue,
+            self._pickle_dags,
+            self._dag_id_white_list,
+            self._max_files,
+            self._max_memory_mb,
+            "DagFileProcessorWorker{}".format(self._instance_id))
+
+    def process(self, file_path):
+        """
+        Hand a file to the process.
+
+        :param file_path: the file to process
+        :type file_path: unicode
+        """
+        if self._process is None:
+            raise AirflowException("Tried to process a file before starting!")
+        self._file_path_queue.put(file_path)
+
+    def poll(self):
+        """
+        Check if the process is done with the file handed to it. The result
+        of processing the file is then available as ``result``.
+
+        :return: whether the process is done with the file
+        :rtype: bool
+        """
+        if self._process is None:
+            raise AirflowException("Tried to poll before starting!")
+
+        if not self._result_queue.empty():
+            self.result, self._recycle = self._result_queue.get_nowait()
+            return True
+
+        # Potential error case when process dies
+        if not self._process.is_alive():
+            self.result = None
+            # Get the object from the queue or else join() can hang.
+            if not self._result_queue.empty():
+                self.result, self._recycle = self._result_queue.get_nowait()
+            self.log.debug("Waiting for %s", self._process)
+            self._process.join()
+            return True
+
+        return False
+
+    def stop(self):
+        """
+        Ask the process to exit once it is done with the current file.
+        """
+        if self._process is not None and self._process.is_alive():
+            self._file_path_queue.put(None)
+
+    def terminate(self, sigkill=False):
+        """
+        Terminate (and then kill) the process.
+
+        :param sigkill: whether to issue a SIGKILL if SIGTERM doesn't work.
+        :type sigkill: bool
+        """
+        if self._process is None:
+            raise AirflowException("Tried to call stop before starting!")
+        # The queues will likely get corrupted, so remove the references
+        self._file_path_queue = None
+        self._result_queue = None
+        self._process.terminate()
+        # Arbitrarily wait 5s for the process to die
+        self._process.join(5)
+        if sigkill and self._process.is_alive():
+            self.log.warning("Killing PID %s", self._process.pid)
+            os.kill(self._process.pid, signal.SIGKILL)
+
+    @property
+    def pid(self):
+        """
+        :return: the PID of the process
+        :rtype: int
+        """
+        if self._process is None:
+            raise AirflowException("Tried to get PID before starting!")
+        return self._process.pid
+
+    @property
+    def exit_code(self):
+        """
+        :return: the exit code of the process, or None if it is still running
+        :rtype: int
+        """
+        if self._process is None:
+            raise AirflowException("Tried to call retcode before starting!")
+        return self._process.exitcode
+
+    @property
+    def reusable(self):
+        """
+        :return: whether more files can be handed to the process
+        :rtype: bool
+        """
+        return (self._process is not None and
+                self._result_queue is not None and
+                not self._recycle and
+                self._process.is_alive())
+
+
+class DagFileProcessorPool(LoggingMixin):
+    """
+    A pool of DagFileProcessorWorkers. Idle workers are reused for the next
+    file and workers that exited are replaced by new ones on demand, so the
+    number of processes is bounded by the number of processors that are
+    running at once.
+    """
+
+    def __init__(self, pickle_dags, dag_id_white_list, max_files, max_memory_mb):
+        """
+        :param pickle_dags: whether to serialize the DAG objects to the DB
+        :type pickle_dags: bool
+        :param dag_id_white_list: If specified, only look at these DAG ID's
+        :type dag_id_white_list: list[unicode]
+        :param max_files: replace a worker after it processed this many files,
+        0 for no limit
+        :type max_files: int
+        :param max_memory_mb: replace a worker once its resident memory exceeds
+        this many megabytes, 0 for no limit
+        :type max_memory_mb: int
+        """
+        self._pickle_dags = pickle_dags
+        self._dag_id_white_list = dag_id_white_list
+        self._max_files = max_files
+        self._max_memory_mb = max_memory_mb
+        self._idle_workers = []
+        self._busy_workers = []
+
+    def acquire(self):
+        """
+        :return: an idle worker, a new one is started if there is none
+        :rtype: DagFileProcessorWorker
+        """
+        while self._idle_workers:
+            worker = self._idle_workers.pop()
+            if worker.reusable:
+                self._busy_workers.append(worker)
+                return worker
+            self._discard(worker)
+
+        worker = DagFileProcessorWorker(self._pickle_dags,
+                                        self._dag_id_white_list,
+                                        self._max_files,
+                                        self._max_memory_mb)
+        worker.start()
+        self.log.info("Started a DAG file processor worker (PID: %s)", worker.pid)
+        self._busy_workers.append(worker)
+        return worker
+
+    def release(self, worker):
+        """
+        Give back a worker that is done with its file.
+
+        :param worker: the worker to give back
+        :type worker: DagFileProcessorWorker
+        """
+        self._busy_workers.remove(worker)
+        if worker.reusable:
+            self._idle_workers.append(worker)
+        else:
+            self._discard(worker)
+
+    def remove(self, worker):
+        """
+        Remove a worker that was terminated from the pool.
+
+        :param worker: the terminated worker
+        :type worker: DagFileProcessorWorker
+        """
+        if worker in self._busy_workers:
+            self._busy_workers.remove(worker)
+
+    def _discard(self, worker):
+        self.log.info("Replacing DAG file processor worker (PID: %s)", worker.pid)
+        worker.stop()
+
+    def get_all_pids(self):
+        """
+        :return: a list of the PIDs of all the workers of the pool
+        :rtype: list[int]
+        """
+        return [x.pid for x in self._idle_workers + self._busy_workers]
+
+    def terminate(self):
+        """
+        Stops all the workers of the pool
+        """
+        for worker in self._idle_workers:
+            worker.stop()
+        for worker in self._busy_workers:
+            worker.terminate()
+        self._idle_workers = []
+        self._busy_workers = []
+
+
+class PooledDagFileProcessor(AbstractDagFileProcessor, LoggingMixin):
+    """
+    Helps call SchedulerJob.process_file() in a worker of a
+    DagFileProcessorPool instead of a new process.
+    """
+
+    def __init__(self, file_path, pool):
+        """
+        :param file_path: a Python file containing Airflow DAG definitions
+        :type file_path: unicode
+        :param pool: the pool to take the worker processing the file from
+        :type pool: DagFileProcessorPool
+        """
+        self._file_path = file_path
+        self._pool = pool
+        # The worker that processes the file.
+        self._worker = None
+        # The result of Scheduler.process_file(file_path).
+        self._result = None
+        # The exit code, 0 if the worker processed the file and is still alive
+        self._exit_code = None
+        # Whether the worker is done with the file.
+        self._done = False
+        # When the worker started to process the file.
+        self._start_time = None
+
+    @property
+    def file_path(self):
+        return self._file_path
+
+    def start(self):
+        """
+        Hand the file to a worker of the pool.
+        """
+        self._worker = self._pool.acquire()
+        self._worker.process(self.file_path)
+        self._start_time = timezone.utcnow()
+
+    def terminate(self, sigkill=False):
+        """
+        Terminate (and then kill) the worker processing the file.
+        :param sigkill: whether to issue a SIGKILL if SIGTERM doesn't work.
+        :type sigkill: bool
+        """
+        if self._worker is None:
+            raise AirflowException("Tried to call stop before starting!")
+        self._worker.terminate(sigkill)
+        self._pool.remove(self._worker)
+
+    @property
+    def pid(self):
+        """
+        :return: the PID of the worker processing the given file
+        :rtype: int
+        """
+        if self._worker is None:
+            raise AirflowException("Tried to get PID before starting!")
+        return self._worker.pid
+
+    @property
+    def exit_code(self):
+        """
+        After the file is processed, this can be called to get the exit code
+        of the worker, or 1 if processing the file failed in a worker that is
+        still alive.
+        :return: the exit code
+        :rtype: int
+        """
+        if not self._done:
+            raise AirflowException("Tried to call retcode before process was finished!")
+        return self._exit_code
+
+    @property
+    def done(self):
+        """
+        Check if the worker processing this file is done with it.
+        :return: whether the file is processed
+        :rtype: bool
+        """
+        if self._worker is None:
+            raise AirflowException("Tried to see if it's done before starting!")
+
+        if self._done:
+            return True
+
+        if not self._worker.poll():
+            return False
+
+        self._result = self._worker.result
+        self._exit_code = self._worker.exit_code
+        if self._exit_code is None:
+            self._exit_code = 0 if self._result is not None else 1
+        self._done = True
+        self._pool.release(self._worker)
+        return True
+
+    @property
+    def result(self):
+        """
+        :return: result of running SchedulerJob.process_file()
+        :rtype: SimpleDag
+        """
+        if not self.done:
+            raise AirflowException("Tried to get the result before it's done!")
+        return self._result
+
+    @property
+    def start_time(self):
+        """
+        :return: when this started to process the file
+        :rtype: datetime
+        """
+        if self._start_time is None:
+            raise AirflowException("Tried to get start time before it started!")
+        return self._start_time
+
+
 class SchedulerJob(BaseJob):
     """
     This SchedulerJob runs for a specific time interval and schedules the jobs
@@ -542,6 +1012,8 @@ class SchedulerJob(BaseJob):
             self.dag_ids.extend(dag_ids)
 
         self.subdir = subdir
+        # Remembers the files of subdir between the scans for new files
+        self.dag_file_index = DagFileIndex(subdir)
 
         self.num_runs = num_runs
         self.run_duration = run_duration
@@ -575,6 +1047,14 @@ class SchedulerJob(BaseJob):
         self.file_process_interval = file_process_interval
 
         self.max_tis_per_query = conf.getint('scheduler', 'max_tis_per_query')
+
+        # Reuse the DAGs of files that did not change when the same process
+        # processes them again
+        self.parse_cache = None
+        parse_cache_max_age = conf.getint('scheduler', 'parse_cache_max_age')
+        if parse_cache_max_age > 0:
+            self.parse_cache = DagFileParseCache(parse_cache_max_age)
+
         if run_duration is None:
             self.run_duration = conf.getint('scheduler',
                                             'run_duration')
@@ -922,13 +1402,22 @@ class SchedulerJob(BaseJob):
         for run in active_dag_runs:
             self.log.debug("Examining active DAG run: %s", run)
             # this needs a fresh session sometimes tis get detached
-            tis = run.get_task_instances(state=(State.NONE,
-                                                State.UP_FOR_RETRY))
+            tis = run.get_task_instances()
+            finished_states = State.finished() + [State.UPSTREAM_FAILED]
+
+            # all task instances of the run are loaded at once so that the
+            # trigger rules of every candidate are evaluated in memory instead
+            # of with one aggregate query per task instance
+            dep_context = DepContext(
+                flag_upstream_failed=True,
+                finished_tasks=[ti for ti in tis
+                                if ti.state in finished_states])
 
-            # this loop is quite slow as it uses are_dependencies_met for
-            # every task (in ti.is_runnable). This is also called in
-            # update_state above which has already checked these tasks
             for ti in tis:
+                if ti.state not in (State.NONE, State.UP_FOR_RETRY,
+                                    State.UP_FOR_RESCHEDULE):
+                    continue
+
                 task = dag.get_task(ti.task_id)
 
                 # fixme: ti.task is transient but needs to be set
@@ -939,7 +1428,7 @@ class SchedulerJob(BaseJob):
                     continue
 
                 if ti.are_dependencies_met(
-                        dep_context=DepContext(flag_upstream_failed=True),
+                        dep_context=dep_context,
                         session=session):
                     self.log.debug('Queuing task: %s', ti)
                     queue.append(ti.key)
@@ -1002,12 +1491,14 @@ class SchedulerJob(BaseJob):
             )
 
     @provide_session
-    def __get_task_concurrency_map(self, states, session=None):
+    def __get_task_concurrency_map(self, states, dag_ids=None, session=None):
         """
         Returns a map from tasks to number in the states list given.
 
         :param states: List of states to query for
         :type states: List[State]
+        :param dag_ids: if specified, only count task instances of these DAGs
+        :type dag_ids: List[String]
         :return: A map from (dag_id, task_id) to count of tasks in states
         :rtype: Dict[[String, String], Int]
 
@@ -1017,20 +1508,53 @@ class SchedulerJob(BaseJob):
             session
             .query(TI.task_id, TI.dag_id, func.count('*'))
             .filter(TI.state.in_(states))
-            .group_by(TI.task_id, TI.dag_id)
-        ).all()
+        )
+        if dag_ids is not None:
+            ti_concurrency_query = ti_concurrency_query.filter(TI.dag_id.in_(dag_ids))
+        ti_concurrency_query = ti_concurrency_query.group_by(TI.task_id, TI.dag_id).all()
         task_map = defaultdict(int)
         for result in ti_concurrency_query:
             task_id, dag_id, count = result
             task_map[(dag_id, task_id)] = count
         return task_map
 
+    @provide_session
+    def __get_pool_used_slots_map(self, pools, session=None):
+        """
+        Returns a map from pools to the number of slots used by running and
+        queued task instances, like Pool.open_slots() does for a single pool.
+
+        :param pools: List of pools to query for
+        :type pools: List[String]
+        :return: A map from pool to count of running and queued tasks
+        :rtype: Dict[String, Int]
+        """
+        used_slots_map = defaultdict(int)
+        if not pools:
+            return used_slots_map
+
+        TI = models.TaskInstance
+        used_slots_query = (
+            session
+            .query(TI.pool, func.count('*'))
+            .filter(TI.pool.in_(pools))
+            .filter(TI.state.in_([State.RUNNING, State.QUEUED]))
+            .group_by(TI.pool)
+        ).all()
+        for pool, count in used_slots_query:
+            used_slots_map[pool] = count
+        return used_slots_map
+
     @provide_session
     def _find_executable_task_instances(self, simple_dag_bag, states, session=None):
         """
         Finds TIs that are ready for execution with respect to pool limits,
         dag concurrency, executor state, and priority.
 
+        The pool usage and the number of running task instances of every DAG
+        and task are fetched with one grouped query each, the task instances
+        are then assigned to the open slots in memory.
+
         :param simple_dag_bag: TaskInstances associated with DAGs in the
         simple_dag_bag will be fetched from the DB and executed
         :type simple_dag_bag: SimpleDagBag
@@ -1087,7 +1611,23 @@ class SchedulerJob(BaseJob):
         for task_instance in task_instances_to_examine:
             pool_to_task_instances[task_instance.pool].append(task_instance)
 
-        task_concurrency_map = self.__get_task_concurrency_map(states=states_to_count_as_running, session=session)
+        pool_used_slots_map = self.__get_pool_used_slots_map(
+            pools=[pool for pool in pool_to_task_instances if pool in pools],
+            session=session)
+
+        dag_ids = {task_instance.dag_id for task_instance in task_instances_to_examine}
+        task_concurrency_map = self.__get_task_concurrency_map(
+            states=states_to_count_as_running, dag_ids=dag_ids, session=session)
+
+        # Number of running task instances of every DAG, only counting the
+        # tasks that are still part of the DAG
+        # TODO(saguziel): also check against QUEUED state, see AIRFLOW-1104
+        dag_id_to_task_ids = {dag_id: set(simple_dag_bag.get_dag(dag_id).task_ids)
+                              for dag_id in dag_ids}
+        dag_id_to_possibly_running_task_count = defaultdict(int)
+        for (dag_id, task_id), count in task_concurrency_map.items():
+            if task_id in dag_id_to_task_ids.get(dag_id, ()):
+                dag_id_to_possibly_running_task_count[dag_id] += count
 
         # Go through each pool, and queue up a task for execution if there are
         # any open slots in the pool.
@@ -1105,7 +1645,7 @@ class SchedulerJob(BaseJob):
                     )
                     open_slots = 0
                 else:
-                    open_slots = pools[pool].open_slots(session=session)
+                    open_slots = pools[pool].slots - pool_used_slots_map[pool]
 
             num_queued = len(task_instances)
             self.log.info(
@@ -1115,13 +1655,14 @@ class SchedulerJob(BaseJob):
                 )
             )
 
-            priority_sorted_task_instances = sorted(
-                task_instances, key=lambda ti: (-ti.priority_weight, ti.execution_date))
+            # Only the task instances that get a slot need to come out in
+            # priority order, so a heap is enough
+            priority_heap = [
+                (-ti.priority_weight, ti.execution_date, i, ti)
+                for i, ti in enumerate(task_instances)]
+            heapq.heapify(priority_heap)
 
-            # DAG IDs with running tasks that equal the concurrency limit of the dag
-            dag_id_to_possibly_running_task_count = {}
-
-            for task_instance in priority_sorted_task_instances:
+            while priority_heap:
                 if open_slots <= 0:
                     self.log.info(
                         "Not scheduling since there are %s open slots in pool %s",
@@ -1129,23 +1670,15 @@ class SchedulerJob(BaseJob):
                     )
                     # Can't schedule any more since there are no more open slots.
                     break
+                task_instance = heapq.heappop(priority_heap)[-1]
 
                 # Check to make sure that the task concurrency of the DAG hasn't been
                 # reached.
                 dag_id = task_instance.dag_id
                 simple_dag = simple_dag_bag.get_dag(dag_id)
 
-                if dag_id not in dag_id_to_possibly_running_task_count:
-                    # TODO(saguziel): also check against QUEUED state, see AIRFLOW-1104
-                    dag_id_to_possibly_running_task_count[dag_id] = \
-                        DAG.get_num_task_instances(
-                            dag_id,
-                            simple_dag_bag.get_dag(dag_id).task_ids,
-                            states=states_to_count_as_running,
-                            session=session)
-
                 current_task_concurrency = dag_id_to_possibly_running_task_count[dag_id]
-                task_concurrency_limit = simple_dag_bag.get_dag(dag_id).concurrency
+                task_concurrency_limit = simple_dag.concurrency
                 self.log.info(
                     "DAG %s has %s/%s running and queued tasks",
                     dag_id, current_task_concurrency, task_concurrency_limit
@@ -1463,16 +1996,20 @@ class SchedulerJob(BaseJob):
         # running for in seconds.
         # Last Runtime: If the process ran before, how long did it take to
         # finish in seconds
+        # Last Latency: How long the file waited to be processed after it
+        # became due in the previous run.
         # Last Run: When the file finished processing in the previous run.
         headers = ["File Path",
                    "PID",
                    "Runtime",
                    "Last Runtime",
+                   "Last Latency",
                    "Last Run"]
 
         rows = []
         for file_path in known_file_paths:
             last_runtime = processor_manager.get_last_runtime(file_path)
+            last_latency = processor_manager.get_last_latency(file_path)
             processor_pid = processor_manager.get_pid(file_path)
             processor_start_time = processor_manager.get_start_time(file_path)
             runtime = ((timezone.utcnow() - processor_start_time).total_seconds()
@@ -1483,21 +2020,28 @@ class SchedulerJob(BaseJob):
                          processor_pid,
                          runtime,
                          last_runtime,
+                         last_latency,
                          last_run))
 
         # Sort by longest last runtime. (Can't sort None values in python3)
         rows = sorted(rows, key=lambda x: x[3] or 0.0)
 
         formatted_rows = []
-        for file_path, pid, runtime, last_runtime, last_run in rows:
+        for file_path, pid, runtime, last_runtime, last_latency, last_run in rows:
             formatted_rows.append((file_path,
                                    pid,
                                    "{:.2f}s".format(runtime)
                                    if runtime else None,
                                    "{:.2f}s".format(last_runtime)
                                    if last_runtime else None,
+                                   "{:.2f}s".format(last_latency)
+                                   if last_latency is not None else None,
                                    last_run.strftime("%Y-%m-%dT%H:%M:%S")
                                    if last_run else None))
+
+        latencies = [row[4] for row in rows if row[4] is not None]
+        if latencies:
+            Stats.gauge('dag_processing.max_latency', max(latencies), 1)
         log_str = ("\n" +
                    "=" * 80 +
                    "\n" +
@@ -1529,29 +2073,62 @@ class SchedulerJob(BaseJob):
 
         # Build up a list of Python files that could contain DAGs
         self.log.info("Searching for files in %s", self.subdir)
-        known_file_paths = list_py_file_paths(self.subdir)
+        known_file_paths = self.dag_file_index.list_py_file_paths()
         self.log.info("There are %s files in %s", len(known_file_paths), self.subdir)
 
+        # Optionally hand the files to long-lived processes instead of
+        # starting a new process for every file
+        processor_pool = None
+        if conf.getboolean('scheduler', 'use_processor_pool'):
+            processor_pool = DagFileProcessorPool(
+                pickle_dags,
+                self.dag_ids,
+                conf.getint('scheduler', 'processor_pool_max_files'),
+                conf.getint('scheduler', 'processor_pool_max_memory_mb'))
+
         def processor_factory(file_path):
+            if processor_pool is not None:
+                return PooledDagFileProcessor(file_path, processor_pool)
             return DagFileProcessor(file_path,
                                     pickle_dags,
                                     self.dag_ids)
 
-        processor_manager = DagFileProcessorManager(self.subdir,
-                                                    known_file_paths,
-                                                    self.max_threads,
-                                                    self.file_process_interval,
-                                                    self.num_runs,
-                                                    processor_factory)
+        processor_manager = DagFileProcessorManager(
+            self.subdir,
+            known_file_paths,
+            self.max_threads,
+            self.file_process_interval,
+            self.num_runs,
+            processor_factory,
+            conf.getint('scheduler', 'dag_file_processor_timeout'))
+
+        # Sample the scheduler loop if enabled or when receiving SIGUSR2
+        profiler = SamplingProfiler(conf.get('scheduler', 'profiler_output_file'),
+                                    conf.getfloat('scheduler', 'profiler_interval'))
+        previous_sigusr2_handler = None
+        try:
+            # The handler only flags the request, the loop toggles the profiler
+            previous_sigusr2_handler = signal.signal(signal.SIGUSR2,
+                                                     profiler.request_toggle)
+        except ValueError:
+            self.log.warning("Not running in the main thread, the profiler can't "
+                             "be toggled with SIGUSR2")
+        if conf.getboolean('scheduler', 'profiler_enabled'):
+            profiler.start()
 
         try:
-            self._execute_helper(processor_manager)
+            self._execute_helper(processor_manager, profiler)
         finally:
             self.log.info("Exited execute loop")
+            if previous_sigusr2_handler is not None:
+                signal.signal(signal.SIGUSR2, previous_sigusr2_handler)
+            profiler.stop()
 
             # Kill all child processes on exit since we don't want to leave
             # them as orphaned.
             pids_to_kill = processor_manager.get_all_pids()
+            if processor_pool is not None:
+                pids_to_kill = set(pids_to_kill + processor_pool.get_all_pids())
             if len(pids_to_kill) > 0:
                 # First try SIGTERM
                 this_process = psutil.Process(os.getpid())
@@ -1580,10 +2157,12 @@ class SchedulerJob(BaseJob):
                         child.kill()
                         child.wait()
 
-    def _execute_helper(self, processor_manager):
+    def _execute_helper(self, processor_manager, profiler=None):
         """
         :param processor_manager: manager to use
         :type processor_manager: DagFileProcessorManager
+        :param profiler: the profiler to toggle when it was requested
+        :type profiler: airflow.utils.profiling.SamplingProfiler
         :return: None
         """
         self.executor.start()
@@ -1603,11 +2182,17 @@ class SchedulerJob(BaseJob):
         # Use this value initially
         known_file_paths = processor_manager.file_paths
 
+        # Measures the phases of every loop
+        phase_timer = PhaseTimer('scheduler.loop')
+
         # For the execute duration, parse and schedule DAGs
         while (timezone.utcnow() - execute_start_time).total_seconds() < \
                 self.run_duration or self.run_duration < 0:
             self.log.debug("Starting Loop...")
             loop_start_time = time.time()
+            phase_timer.reset()
+            if profiler is not None:
+                profiler.handle_requests()
 
             # Traverse the DAG directory for Python files containing DAGs
             # periodically
@@ -1615,25 +2200,30 @@ class SchedulerJob(BaseJob):
                                           last_dag_dir_refresh_time).total_seconds()
 
             if elapsed_time_since_refresh > self.dag_dir_list_interval:
-                # Build up a list of Python files that could contain DAGs
-                self.log.info("Searching for files in %s", self.subdir)
-                known_file_paths = list_py_file_paths(self.subdir)
-                last_dag_dir_refresh_time = timezone.utcnow()
-                self.log.info("There are %s files in %s", len(known_file_paths), self.subdir)
-                processor_manager.set_file_paths(known_file_paths)
-
-                self.log.debug("Removing old import errors")
-                self.clear_nonexistent_import_errors(known_file_paths=known_file_paths)
+                with phase_timer.phase('dag_dir_listing'):
+                    # Build up a list of Python files that could contain DAGs
+                    self.log.info("Searching for files in %s", self.subdir)
+                    known_file_paths = self.dag_file_index.list_py_file_paths()
+                    last_dag_dir_refresh_time = timezone.utcnow()
+                    self.log.info("There are %s files in %s",
+                                  len(known_file_paths), self.subdir)
+                    processor_manager.set_file_paths(known_file_paths)
+
+                    self.log.debug("Removing old import errors")
+                    self.clear_nonexistent_import_errors(
+                        known_file_paths=known_file_paths)
 
             # Kick of new processes and collect results from finished ones
             self.log.debug("Heartbeating the process manager")
-            simple_dags = processor_manager.heartbeat()
+            with phase_timer.phase('processor_heartbeat'):
+                simple_dags = processor_manager.heartbeat()
 
             if self.using_sqlite:
                 # For the sqlite case w/ 1 thread, wait until the processor
                 # is finished to avoid concurrent access to the DB.
                 self.log.debug("Waiting for processors to finish since we're using sqlite")
-                processor_manager.wait_until_finished()
+                with phase_timer.phase('wait_for_processors'):
+                    processor_manager.wait_until_finished()
 
             # Send tasks for execution if available
             simple_dag_bag = SimpleDagBag(simple_dags)
@@ -1643,29 +2233,34 @@ class SchedulerJob(BaseJob):
                 # a non-running state. Handle task instances that belong to
                 # DAG runs in those states
 
-                # If a task instance is up for retry but the corresponding DAG run
-                # isn't running, mark the task instance as FAILED so we don't try
-                # to re-run it.
-                self._change_state_for_tis_without_dagrun(simple_dag_bag,
-                                                          [State.UP_FOR_RETRY],
-                                                          State.FAILED)
-                # If a task instance is scheduled or queued, but the corresponding
-                # DAG run isn't running, set the state to NONE so we don't try to
-                # re-run it.
-                self._change_state_for_tis_without_dagrun(simple_dag_bag,
-                                                          [State.QUEUED,
-                                                           State.SCHEDULED],
-                                                          State.NONE)
-
-                self._execute_task_instances(simple_dag_bag,
-                                             (State.SCHEDULED,))
+                with phase_timer.phase('change_state_for_tis_without_dagrun'):
+                    # If a task instance is up for retry but the corresponding DAG
+                    # run isn't running, mark the task instance as FAILED so we
+                    # don't try to re-run it.
+                    self._change_state_for_tis_without_dagrun(simple_dag_bag,
+                                                              [State.UP_FOR_RETRY],
+                                                              State.FAILED)
+                    # If a task instance is scheduled or queued, but the
+                    # corresponding DAG run isn't running, set the state to NONE
+                    # so we don't try to re-run it.
+                    self._change_state_for_tis_without_dagrun(simple_dag_bag,
+                                                              [State.QUEUED,
+                                                               State.SCHEDULED,
+                                                               State.UP_FOR_RESCHEDULE],
+                                                              State.NONE)
+
+                with phase_timer.phase('execute_task_instances'):
+                    self._execute_task_instances(simple_dag_bag,
+                                                 (State.SCHEDULED,))
 
             # Call heartbeats
             self.log.debug("Heartbeating the executor")
-            self.executor.heartbeat()
+            with phase_timer.phase('executor_heartbeat'):
+                self.executor.heartbeat()
 
             # Process events from the executor
-            self._process_executor_events(simple_dag_bag)
+            with phase_timer.phase('process_executor_events'):
+                self._process_executor_events(simple_dag_bag)
 
             # Heartbeat the scheduler periodically
             time_since_last_heartbeat = (timezone.utcnow() -
@@ -1684,7 +2279,10 @@ class SchedulerJob(BaseJob):
                 last_stat_print_time = timezone.utcnow()
 
             loop_end_time = time.time()
-            self.log.debug("Ran scheduling loop in %.2f seconds", loop_end_time - loop_start_time)
+            loop_duration = loop_end_time - loop_start_time
+            Stats.timing('scheduler.loop.total', loop_duration * 1000)
+            self.log.debug("Ran scheduling loop in %.2f seconds (%s)",
+                           loop_duration, phase_timer.format())
             self.log.debug("Sleeping for %.2f seconds", self._processor_poll_interval)
             time.sleep(self._processor_poll_interval)
 
@@ -1715,6 +2313,29 @@ class SchedulerJob(BaseJob):
 
         settings.Session.remove()
 
+    @staticmethod
+    def _touch_orm_dags(dag_ids, session):
+        """
+        Mark the given DAGs as active and as seen by the scheduler in the ORM.
+
+        :param dag_ids: the DAG IDs to update
+        :type dag_ids: list[unicode]
+        :return: whether all the DAGs exist in the ORM
+        :rtype: bool
+        """
+        dag_ids = list(dag_ids)
+        DM = models.DagModel
+        updated = (
+            session
+            .query(DM)
+            .filter(DM.dag_id.in_(dag_ids))
+            .update({DM.is_active: True,
+                     DM.last_scheduler_run: timezone.utcnow()},
+                    synchronize_session=False)
+        )
+        session.commit()
+        return updated == len(dag_ids)
+
     @provide_session
     def process_file(self, file_path, pickle_dags=False, session=None):
         """
@@ -1723,7 +2344,8 @@ class SchedulerJob(BaseJob):
         This includes:
 
         1. Execute the file and look for DAG objects in the namespace.
-        2. Pickle the DAG and save it to the DB (if necessary).
+        2. Pickle the DAG and save it to the DB (if necessary), and store its
+        serialized structure for the webserver (if enabled).
         3. For each DAG, see what tasks should run and create appropriate task
         instances in the DB.
         4. Record any errors importing the file into ORM
@@ -1745,23 +2367,48 @@ class SchedulerJob(BaseJob):
         # As DAGs are parsed from this file, they will be converted into SimpleDags
         simple_dags = []
 
-        try:
-            dagbag = models.DagBag(file_path)
-        except Exception:
-            self.log.exception("Failed at reloading the DAG file %s", file_path)
-            Stats.incr('dag_file_refresh_error', 1, 1)
-            return []
-
-        if len(dagbag.dags) > 0:
-            self.log.info("DAG(s) %s retrieved from %s", dagbag.dags.keys(), file_path)
+        dagbag = None
+        if self.parse_cache is not None:
+            file_signature = DagFileParseCache.get_file_signature(file_path)
+            dagbag = self.parse_cache.get(file_path, file_signature)
+
+        # The DAGs of a cached DagBag were saved to the ORM when the file was
+        # parsed, only their DagModel.last_scheduler_run needs an update
+        if dagbag is not None and self._touch_orm_dags(dagbag.dags.keys(),
+                                                       session=session):
+            self.log.info("DAG(s) %s reused from the previous parse of %s",
+                          dagbag.dags.keys(), file_path)
+            Stats.incr('dag_file_parse_cache_hit', 1, 1)
         else:
-            self.log.warning("No viable dags retrieved from %s", file_path)
-            self.update_import_errors(session, dagbag)
-            return []
+            try:
+                dagbag = models.DagBag(file_path)
+            except Exception:
+                self.log.exception("Failed at reloading the DAG file %s", file_path)
+                Stats.incr('dag_file_refresh_error', 1, 1)
+                return []
+
+            if len(dagbag.dags) > 0:
+                self.log.info("DAG(s) %s retrieved from %s",
+                              dagbag.dags.keys(), file_path)
+            else:
+                self.log.warning("No viable dags retrieved from %s", file_path)
+                self.update_import_errors(session, dagbag)
+                return []
+
+            # Save individual DAGs in the ORM and update
+            # DagModel.last_scheduled_time
+            for dag in dagbag.dags.values():
+                dag.sync_to_db()
 
-        # Save individual DAGs in the ORM and update DagModel.last_scheduled_time
-        for dag in dagbag.dags.values():
-            dag.sync_to_db()
+            # Store the structure of the DAGs for the webserver, the subdags
+            # are stored with their root DAG
+            if conf.getboolean('core', 'store_serialized_dags'):
+                for dag in dagbag.dags.values():
+                    if not dag.is_subdag:
+                        models.SerializedDagModel.write_dag(dag, session=session)
+
+            if self.parse_cache is not None and not dagbag.import_errors:
+                self.parse_cache.set(file_path, file_signature, dagbag)
 
         paused_dag_ids = [dag.dag_id for dag in dagbag.dags.values()
                           if dag.is_paused]
@@ -1968,6 +2615,11 @@ class BackfillJob(BaseJob):
                 self.log.warning("Task instance %s is up for retry", ti)
                 ti_status.started.pop(key)
                 ti_status.to_run[key] = ti
+            # special case: if the task needs to be run again soon put it back
+            elif ti.state == State.UP_FOR_RESCHEDULE:
+                self.log.warning("Task instance %s is up for reschedule", ti)
+                ti_status.started.pop(key)
+                ti_status.to_run[key] = ti
             # special case: The state of the task can be set to NONE by the task itself
             # when it reaches concurrency limits. It could also happen when the state
             # is changed externally, e.g. by clearing tasks from the ui. We need to cover
@@ -2232,7 +2884,8 @@ class BackfillJob(BaseJob):
                             session=session,
                             verbose=True):
                         ti.refresh_from_db(lock_for_update=True, session=session)
-                        if ti.state == State.SCHEDULED or ti.state == State.UP_FOR_RETRY:
+                        if ti.state in (State.SCHEDULED, State.UP_FOR_RETRY,
+                                        State.UP_FOR_RESCHEDULE):
                             if executor.has_task(ti):
                                 self.log.debug(
                                     "Task Instance %s already in executor waiting for queue to clear",
@@ -2278,6 +2931,15 @@ class BackfillJob(BaseJob):
                         ti_status.to_run[key] = ti
                         continue
 
+                    # special case
+                    if ti.state == State.UP_FOR_RESCHEDULE:
+                        self.log.debug(
+                            "Task instance %s reschedule period not expired yet", ti)
+                        if key in ti_status.started:
+                            ti_status.started.pop(key)
+                        ti_status.to_run[key] = ti
+                        continue
+
                     # all remaining tasks
                     self.log.debug('Adding %s to not_ready', ti)
                     ti_status.not_ready.add(key)
@@ -2593,3 +3255,113 @@ class LocalTaskJob(BaseJob):
             )
             self.task_runner.terminate()
             self.terminating = True
+
+
+class SensorBatchingJob(BaseJob):
+    """
+    Pokes the sensors waiting in reschedule mode in batches. The sensors that
+    support it, see BaseSensorOperator.get_poke_batch_key, are grouped by
+    class and batch key and every group is checked with a single poke_batch
+    call, e.g. one metastore call for hundreds of partition sensors.
+
+    A sensor whose criteria is met is made ready to be rescheduled right away
+    so that it runs and succeeds with its own poke. The reschedule date of
+    the other sensors is pushed back by their poke interval, bounded by their
+    timeout, so that they don't poke on their own as long as this job runs.
+
+    :param subdir: directory containing the DAG files
+    :type subdir: unicode
+    :param num_runs: the number of times to check the sensors, -1 for ever
+    :type num_runs: int
+    :param check_interval: the number of seconds between two checks of the
+        sensors, defaults to the check_interval configuration
+    :type check_interval: float
+    """
+
+    __mapper_args__ = {
+        'polymorphic_identity': 'SensorBatchingJob'
+    }
+
+    def __init__(
+            self,
+            subdir=settings.DAGS_FOLDER,
+            num_runs=-1,
+            check_interval=None,
+            *args, **kwargs):
+        self.subdir = subdir
+        self.num_runs = num_runs
+        if check_interval is None:
+            check_interval = conf.getfloat('sensor_batching', 'check_interval')
+        # The heartbeat of the job paces the checks
+        super(SensorBatchingJob, self).__init__(
+            heartrate=check_interval, *args, **kwargs)
+
+    def _execute(self):
+        self.log.info("Starting to poke the waiting sensors of %s in batches",
+                      self.subdir)
+        dagbag = models.DagBag(self.subdir)
+        runs = 0
+        while True:
+            dagbag.collect_dags(only_if_updated=True)
+            self.poke_waiting_sensors(dagbag)
+            runs += 1
+            if 0 <= self.num_runs <= runs:
+                break
+            self.heartbeat()
+
+    @provide_session
+    def poke_waiting_sensors(self, dagbag, session=None):
+        """
+        Pokes the batchable sensors of the task instances waiting to be
+        rescheduled and moves their reschedule date accordingly.
+
+        :param dagbag: the DAGs of the task instances
+        :type dagbag: models.DagBag
+        """
+        TI = models.TaskInstance
+        TR = models.TaskReschedule
+
+        sensor_tis = []
+        for ti in session.query(TI).filter(TI.state == State.UP_FOR_RESCHEDULE):
+            dag = dagbag.dags.get(ti.dag_id)
+            if dag is None or not dag.has_task(ti.task_id):
+                continue
+            task = dag.get_task(ti.task_id)
+            if (not isinstance(task, BaseSensorOperator) or
+                    task.get_poke_batch_key() is None):
+                continue
+            ti.task = copy.copy(task)
+            try:
+                ti.render_templates()
+            except Exception:
+                self.log.exception("Failed to render the templates of %s", ti)
+                continue
+            sensor_tis.append(ti)
+
+        if not sensor_tis:
+            return
+        results = poke_in_batches([ti.task for ti in sensor_tis])
+
+        now = timezone.utcnow()
+        for i, criteria_met in results.items():
+            ti = sensor_tis[i]
+            task_reschedules = TR.find_for_task_instance(ti, session=session)
+            if not task_reschedules:
+                continue
+            task_reschedule = task_reschedules[-1]
+            if criteria_met:
+                self.log.info("The criteria of %s is met, rescheduling it now", ti)
+                task_reschedule.reschedule_date = min(
+                    task_reschedule.reschedule_date, now)
+            else:
+                # The sensor still has to run to time out
+                timeout_date = task_reschedules[0].start_date + datetime.timedelta(
+                    seconds=ti.task.timeout)
+                next_check_date = now + datetime.timedelta(
+                    seconds=ti.task.poke_interval)
+                task_reschedule.reschedule_date = max(
+                    task_reschedule.reschedule_date,
+                    min(next_check_date, timeout_date))
+            session.merge(task_reschedule)
+        session.commit()
+        Stats.gauge('sensor_batching.poked_sensors', len(results))
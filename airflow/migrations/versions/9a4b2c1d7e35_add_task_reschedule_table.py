@@ -0,0 +1,61 @@
+# flake8: noqa
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add task_reschedule table
+
+Revision ID: 9a4b2c1d7e35
+Revises: 0e2a74e0fc9f
+Create Date: 2018-06-20 10:12:41.382913
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '9a4b2c1d7e35'
+down_revision = '0e2a74e0fc9f'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+from sqlalchemy.dialects import mysql
+import sqlalchemy as sa
+
+TABLE_NAME = 'task_reschedule'
+INDEX_NAME = 'idx_' + TABLE_NAME + '_dag_task_date'
+
+
+def upgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == 'mysql':
+        timestamp = mysql.TIMESTAMP(fsp=6)
+    else:
+        timestamp = sa.TIMESTAMP(timezone=True)
+
+    op.create_table(TABLE_NAME,
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('task_id', sa.String(length=250), nullable=False),
+                    sa.Column('dag_id', sa.String(length=250), nullable=False),
+                    sa.Column('execution_date', timestamp, nullable=False),
+                    sa.Column('try_number', sa.Integer(), nullable=False),
+                    sa.Column('start_date', timestamp, nullable=False),
+                    sa.Column('end_date', timestamp, nullable=False),
+                    sa.Column('duration', sa.Float(), nullable=False),
+                    sa.Column('reschedule_date', timestamp, nullable=False),
+                    sa.PrimaryKeyConstraint('id'))
+    op.create_index(INDEX_NAME, TABLE_NAME,
+                    ['dag_id', 'task_id', 'execution_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index(INDEX_NAME, table_name=TABLE_NAME)
+    op.drop_table(TABLE_NAME)
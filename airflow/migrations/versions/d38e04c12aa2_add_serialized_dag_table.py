@@ -0,0 +1,56 @@
+# flake8: noqa
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add serialized_dag table
+
+Revision ID: d38e04c12aa2
+Revises: 9a4b2c1d7e35
+Create Date: 2018-07-02 14:31:05.614250
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'd38e04c12aa2'
+down_revision = '9a4b2c1d7e35'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+from sqlalchemy.dialects import mysql
+import sqlalchemy as sa
+
+TABLE_NAME = 'serialized_dag'
+
+
+def upgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == 'mysql':
+        timestamp = mysql.TIMESTAMP(fsp=6)
+        text = mysql.LONGTEXT()
+    else:
+        timestamp = sa.TIMESTAMP(timezone=True)
+        text = sa.Text()
+
+    op.create_table(TABLE_NAME,
+                    sa.Column('dag_id', sa.String(length=250), nullable=False),
+                    sa.Column('fileloc', sa.String(length=2000), nullable=False),
+                    sa.Column('data', text, nullable=False),
+                    sa.Column('source_code', text, nullable=True),
+                    sa.Column('dag_hash', sa.String(length=40), nullable=False),
+                    sa.Column('last_updated', timestamp, nullable=False),
+                    sa.PrimaryKeyConstraint('dag_id'))
+
+
+def downgrade():
+    op.drop_table(TABLE_NAME)
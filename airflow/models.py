@@ -22,7 +22,7 @@ from future.standard_library import install_aliases
 from builtins import str
 from builtins import object, bytes
 import copy
-from collections import namedtuple
+from collections import defaultdict, deque, namedtuple
 from datetime import timedelta
 
 import dill
@@ -44,6 +44,7 @@ import textwrap
 import traceback
 import warnings
 import hashlib
+import io
 
 from datetime import datetime
 from urllib.parse import urlparse, quote
@@ -63,7 +64,9 @@ import six
 from airflow import settings, utils
 from airflow.executors import GetDefaultExecutor, LocalExecutor
 from airflow import configuration
-from airflow.exceptions import AirflowException, AirflowSkipException, AirflowTaskTimeout
+from airflow.exceptions import (
+    AirflowException, AirflowRescheduleException, AirflowSkipException,
+    AirflowTaskTimeout)
 from airflow.dag.base_dag import BaseDag, BaseDagBag
 from airflow.ti_deps.deps.not_in_retry_period_dep import NotInRetryPeriodDep
 from airflow.ti_deps.deps.prev_dagrun_dep import PrevDagrunDep
@@ -72,6 +75,7 @@ from airflow.ti_deps.deps.task_concurrency_dep import TaskConcurrencyDep
 
 from airflow.ti_deps.dep_context import DepContext, QUEUE_DEPS, RUN_DEPS
 from airflow.utils import timezone
+from airflow.utils.dag_processing import DagFileIndex
 from airflow.utils.dates import cron_presets, date_range as utils_date_range
 from airflow.utils.db import provide_session
 from airflow.utils.decorators import apply_defaults
@@ -129,12 +133,14 @@ def clear_task_instances(tis, session, activate_dag_runs=True, dag=None):
     get killed.
     """
     job_ids = []
+    cleared_tis = []
     for ti in tis:
         if ti.state == State.RUNNING:
             if ti.job_id:
                 ti.state = State.SHUTDOWN
                 job_ids.append(ti.job_id)
         else:
+            cleared_tis.append(ti)
             task_id = ti.task_id
             if dag and dag.has_task(task_id):
                 task = dag.get_task(task_id)
@@ -149,6 +155,16 @@ def clear_task_instances(tis, session, activate_dag_runs=True, dag=None):
             ti.state = State.NONE
             session.merge(ti)
 
+    # A cleared sensor starts over with the same try number, it must not see
+    # the reschedules of its previous run
+    if cleared_tis:
+        TR = TaskReschedule
+        session.query(TR).filter(or_(*[
+            and_(TR.dag_id == ti.dag_id,
+                 TR.task_id == ti.task_id,
+                 TR.execution_date == ti.execution_date)
+            for ti in cleared_tis])).delete(synchronize_session=False)
+
     if job_ids:
         from airflow.jobs import BaseJob as BJ
         for job in session.query(BJ).filter(BJ.id.in_(job_ids)).all():
@@ -200,6 +216,8 @@ class DagBag(BaseDagBag, LoggingMixin):
         self.file_last_changed = {}
         self.executor = executor
         self.import_errors = {}
+        # Map from folder to the index of its files, kept between collections
+        self.file_indexes = {}
 
         if include_examples:
             example_dag_folder = os.path.join(
@@ -214,6 +232,13 @@ class DagBag(BaseDagBag, LoggingMixin):
         """
         return len(self.dags)
 
+    @property
+    def dag_ids(self):
+        """
+        :return: the ids of the dags contained in this dagbag
+        """
+        return list(self.dags.keys())
+
     def get_dag(self, dag_id):
         """
         Gets the DAG out of the dictionary, and refreshes it if expired
@@ -419,40 +444,29 @@ class DagBag(BaseDagBag, LoggingMixin):
         if os.path.isfile(dag_folder):
             self.process_file(dag_folder, only_if_updated=only_if_updated)
         elif os.path.isdir(dag_folder):
-            patterns = []
-            for root, dirs, files in os.walk(dag_folder, followlinks=True):
-                ignore_file = [f for f in files if f == '.airflowignore']
-                if ignore_file:
-                    f = open(os.path.join(root, ignore_file[0]), 'r')
-                    patterns += [p for p in f.read().split('\n') if p]
-                    f.close()
-                for f in files:
-                    try:
-                        filepath = os.path.join(root, f)
-                        if not os.path.isfile(filepath):
-                            continue
-                        mod_name, file_ext = os.path.splitext(
-                            os.path.split(filepath)[-1])
-                        if file_ext != '.py' and not zipfile.is_zipfile(filepath):
-                            continue
-                        if not any(
-                                [re.findall(p, filepath) for p in patterns]):
-                            ts = timezone.utcnow()
-                            found_dags = self.process_file(
-                                filepath, only_if_updated=only_if_updated)
-
-                            td = timezone.utcnow() - ts
-                            td = td.total_seconds() + (
-                                float(td.microseconds) / 1000000)
-                            stats.append(FileLoadStat(
-                                filepath.replace(dag_folder, ''),
-                                td,
-                                len(found_dags),
-                                sum([len(dag.tasks) for dag in found_dags]),
-                                str([dag.dag_id for dag in found_dags]),
-                            ))
-                    except Exception as e:
-                        self.log.exception(e)
+            if dag_folder not in self.file_indexes:
+                self.file_indexes[dag_folder] = DagFileIndex(dag_folder)
+            # The heuristic is applied by process_file once the file changed
+            file_paths = self.file_indexes[dag_folder].list_py_file_paths(
+                safe_mode=False)
+            for filepath in file_paths:
+                try:
+                    ts = timezone.utcnow()
+                    found_dags = self.process_file(
+                        filepath, only_if_updated=only_if_updated)
+
+                    td = timezone.utcnow() - ts
+                    td = td.total_seconds() + (
+                        float(td.microseconds) / 1000000)
+                    stats.append(FileLoadStat(
+                        filepath.replace(dag_folder, ''),
+                        td,
+                        len(found_dags),
+                        sum([len(dag.tasks) for dag in found_dags]),
+                        str([dag.dag_id for dag in found_dags]),
+                    ))
+                except Exception as e:
+                    self.log.exception(e)
         Stats.gauge(
             'collect_dags', (timezone.utcnow() - start_dttm).total_seconds(), 1)
         Stats.gauge(
@@ -1549,6 +1563,10 @@ class TaskInstance(Base, LoggingMixin):
         except AirflowSkipException:
             self.refresh_from_db(lock_for_update=True)
             self.state = State.SKIPPED
+        except AirflowRescheduleException as reschedule_exception:
+            self.refresh_from_db()
+            self._handle_reschedule(reschedule_exception, test_mode, context)
+            return
         except AirflowException as e:
             self.refresh_from_db()
             # for case when task is marked as success externally
@@ -1620,6 +1638,29 @@ class TaskInstance(Base, LoggingMixin):
         self.render_templates()
         task_copy.dry_run()
 
+    @provide_session
+    def _handle_reschedule(self, reschedule_exception, test_mode=False, context=None,
+                           session=None):
+        # Don't record reschedule request in test mode
+        if test_mode:
+            return
+
+        self.end_date = timezone.utcnow()
+        self.set_duration()
+
+        # Log reschedule request
+        session.add(TaskReschedule(self.task, self.execution_date, self._try_number,
+                                   self.start_date, self.end_date,
+                                   reschedule_exception.reschedule_date))
+
+        # The next pokes of the sensor are part of the same try, so they use
+        # the same try number and write to the same log file
+        self.state = State.UP_FOR_RESCHEDULE
+        self._try_number -= 1
+        session.merge(self)
+        session.commit()
+        self.log.info('Rescheduling task, marking task as UP_FOR_RESCHEDULE')
+
     @provide_session
     def handle_failure(self, error, test_mode=False, context=None, session=None):
         self.log.exception(error)
@@ -1788,7 +1829,7 @@ class TaskInstance(Base, LoggingMixin):
                     self.task.dag.user_defined_macros)
 
         rt = self.task.render_template  # shortcut to method
-        for attr in task.__class__.template_fields:
+        for attr in task.template_fields:
             content = getattr(task, attr)
             if content:
                 rendered_content = rt(attr, content, jinja_context)
@@ -1940,6 +1981,62 @@ class TaskFail(Base):
         self.duration = (self.end_date - self.start_date).total_seconds()
 
 
+class TaskReschedule(Base):
+    """
+    TaskReschedule tracks rescheduled task instances.
+    """
+
+    __tablename__ = "task_reschedule"
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(String(ID_LEN), nullable=False)
+    dag_id = Column(String(ID_LEN), nullable=False)
+    execution_date = Column(UtcDateTime, nullable=False)
+    try_number = Column(Integer, nullable=False)
+    start_date = Column(UtcDateTime, nullable=False)
+    end_date = Column(UtcDateTime, nullable=False)
+    duration = Column(Float, nullable=False)
+    reschedule_date = Column(UtcDateTime, nullable=False)
+
+    __table_args__ = (
+        Index('idx_task_reschedule_dag_task_date', dag_id, task_id, execution_date,
+              unique=False),
+    )
+
+    def __init__(self, task, execution_date, try_number, start_date, end_date,
+                 reschedule_date):
+        self.dag_id = task.dag_id
+        self.task_id = task.task_id
+        self.execution_date = execution_date
+        self.try_number = try_number
+        self.start_date = start_date
+        self.end_date = end_date
+        self.reschedule_date = reschedule_date
+        self.duration = (self.end_date - self.start_date).total_seconds()
+
+    @staticmethod
+    @provide_session
+    def find_for_task_instance(task_instance, session=None):
+        """
+        Returns all task reschedules for the task instance and try number,
+        in ascending order.
+
+        :param task_instance: the task instance to find task reschedules for
+        :type task_instance: TaskInstance
+        """
+        TR = TaskReschedule
+        return (
+            session
+            .query(TR)
+            .filter(TR.dag_id == task_instance.dag_id,
+                    TR.task_id == task_instance.task_id,
+                    TR.execution_date == task_instance.execution_date,
+                    TR.try_number == task_instance.try_number)
+            .order_by(TR.id)
+            .all()
+        )
+
+
 class Log(Base):
     """
     Used to actively log events to the database
@@ -2468,6 +2565,11 @@ class BaseOperator(LoggingMixin):
         else:
             upstream = False
 
+        graph_index = self._get_graph_index()
+        if graph_index is not None:
+            return self.priority_weight + graph_index.get_relatives_weight(
+                self.task_id, upstream=upstream)
+
         return self.priority_weight + sum(
             map(lambda task_id: self._dag.task_dict[task_id].priority_weight,
                 self.get_flat_relative_ids(upstream=upstream))
@@ -2602,9 +2704,21 @@ class BaseOperator(LoggingMixin):
                     self.log.exception(e)
         self.prepare_template()
 
+    def _get_graph_index(self):
+        """
+        Returns the graph index of the Operator's DAG if the Operator is the
+        task the DAG holds for its task_id, None otherwise.
+        """
+        if self.has_dag() and self._dag.task_dict.get(self.task_id) is self:
+            return self._dag.graph_index
+        return None
+
     @property
     def upstream_list(self):
         """@property: list of tasks directly upstream"""
+        graph_index = self._get_graph_index()
+        if graph_index is not None:
+            return list(graph_index.upstream[self.task_id])
         return [self.dag.get_task(tid) for tid in self._upstream_task_ids]
 
     @property
@@ -2614,6 +2728,9 @@ class BaseOperator(LoggingMixin):
     @property
     def downstream_list(self):
         """@property: list of tasks directly downstream"""
+        graph_index = self._get_graph_index()
+        if graph_index is not None:
+            return list(graph_index.downstream[self.task_id])
         return [self.dag.get_task(tid) for tid in self._downstream_task_ids]
 
     @property
@@ -2681,6 +2798,13 @@ class BaseOperator(LoggingMixin):
 
         if not found_descendants:
             found_descendants = set()
+
+        graph_index = self._get_graph_index()
+        if graph_index is not None:
+            found_descendants.update(
+                graph_index.get_flat_relative_ids(self.task_id, upstream=upstream))
+            return found_descendants
+
         relative_ids = self.get_direct_relative_ids(upstream)
 
         for relative_id in relative_ids:
@@ -2707,12 +2831,19 @@ class BaseOperator(LoggingMixin):
         """
         if not task:
             task = self
-        for t in self.get_direct_relatives():
-            if task is t:
+        # Walk the task ids rather than the tasks so that the graph index of
+        # the DAG, which is invalidated by every new relationship, isn't
+        # rebuilt while the DAG is being defined
+        visited = set()
+        to_visit = list(self._downstream_task_ids)
+        while to_visit:
+            task_id = to_visit.pop()
+            if task_id == task.task_id:
                 msg = "Cycle detected in DAG. Faulty task: {0}".format(task)
                 raise AirflowException(msg)
-            else:
-                t.detect_downstream_cycle(task=task)
+            if task_id not in visited:
+                visited.add(task_id)
+                to_visit.extend(self.dag.get_task(task_id)._downstream_task_ids)
         return False
 
     def run(
@@ -2820,6 +2951,7 @@ class BaseOperator(LoggingMixin):
                 self.append_only_new(self._downstream_task_ids, task.task_id)
                 task.append_only_new(task._upstream_task_ids, self.task_id)
 
+        dag.clear_graph_index()
         self.detect_downstream_cycle()
 
     def set_downstream(self, task_or_task_list):
@@ -2902,12 +3034,252 @@ class DagModel(Base):
     def __repr__(self):
         return "<DAG: {self.dag_id}>".format(self=self)
 
+    @property
+    def safe_dag_id(self):
+        return self.dag_id.replace('.', '__dot__')
+
     @classmethod
     @provide_session
     def get_current(cls, dag_id, session=None):
         return session.query(cls).filter(cls.dag_id == dag_id).first()
 
 
+class SerializedDagModel(Base):
+    """
+    The structure of a DAG, serialized to JSON by the DAG file processors of
+    the scheduler so that the webserver can render the DAG without importing
+    its file, see airflow.dag.serialization. Only root DAGs are stored, their
+    subdags are embedded into them. The source code of the DAG file is
+    stored along, for the webserver to show.
+    """
+
+    __tablename__ = "serialized_dag"
+
+    dag_id = Column(String(ID_LEN), primary_key=True)
+    fileloc = Column(String(2000), nullable=False)
+    data = Column(LongText, nullable=False)
+    # None when the file couldn't be read, e.g. a DAG in a zip file
+    source_code = Column(LongText)
+    # Hash of data and source_code, so that the DAG is only written when it
+    # changed
+    dag_hash = Column(String(40), nullable=False)
+    last_updated = Column(UtcDateTime, nullable=False)
+
+    def __repr__(self):
+        return "<SerializedDag: {self.dag_id}>".format(self=self)
+
+    @classmethod
+    @provide_session
+    def write_dag(cls, dag, session=None):
+        """
+        Stores the serialized form of the DAG, unless the stored one is the
+        same.
+
+        :param dag: the DAG to store
+        :type dag: DAG
+        :return: whether the DAG was written
+        :rtype: bool
+        """
+        from airflow.dag.serialization import serialize_dag, to_json
+
+        data = to_json(serialize_dag(dag))
+        source_code = cls._read_source_code(dag.fileloc)
+        dag_hash = hashlib.sha1(data.encode('utf-8'))
+        if source_code is not None:
+            dag_hash.update(source_code.encode('utf-8'))
+        dag_hash = dag_hash.hexdigest()
+        stored_hash = (
+            session.query(cls.dag_hash)
+            .filter(cls.dag_id == dag.dag_id)
+            .scalar()
+        )
+        if stored_hash == dag_hash:
+            return False
+
+        session.merge(cls(
+            dag_id=dag.dag_id,
+            fileloc=dag.fileloc,
+            data=data,
+            source_code=source_code,
+            dag_hash=dag_hash,
+            last_updated=timezone.utcnow()))
+        session.commit()
+        return True
+
+    @staticmethod
+    def _read_source_code(fileloc):
+        try:
+            with io.open(fileloc, 'r', encoding='utf-8',
+                         errors='replace') as f:
+                return f.read()
+        except IOError:
+            return None
+
+    @classmethod
+    @provide_session
+    def read_dag(cls, dag_id, session=None):
+        """
+        :return: the DAG stored for dag_id and when it was stored, or None if
+            there is none
+        :rtype: tuple(DAG, datetime)
+        """
+        from airflow.dag.serialization import deserialize_dag, from_json
+
+        row = session.query(cls).filter(cls.dag_id == dag_id).first()
+        if row is None:
+            return None
+        return deserialize_dag(from_json(row.data)), row.last_updated
+
+    @classmethod
+    @provide_session
+    def get_last_updated(cls, dag_id, session=None):
+        """
+        :return: when the DAG was last stored, or None if it isn't
+        :rtype: datetime
+        """
+        return (
+            session.query(cls.last_updated)
+            .filter(cls.dag_id == dag_id)
+            .scalar()
+        )
+
+    @classmethod
+    @provide_session
+    def get_source_code(cls, fileloc, session=None):
+        """
+        :return: the source code stored for the DAG file `fileloc`, or None
+            if there is none
+        :rtype: unicode
+        """
+        return (
+            session.query(cls.source_code)
+            .filter(cls.fileloc == fileloc)
+            .limit(1)
+            .scalar()
+        )
+
+    @classmethod
+    @provide_session
+    def get_dag_ids(cls, session=None):
+        """
+        :return: the ids of the stored DAGs
+        :rtype: list(unicode)
+        """
+        return [dag_id for dag_id, in
+                session.query(cls.dag_id).order_by(cls.dag_id)]
+
+
+class DagGraphIndex(object):
+    """
+    Index of the graph formed by the tasks of a DAG and their relationships,
+    so that the direct relatives, the topological order, the flat relatives
+    and the priority weights of the tasks aren't computed again on every
+    access. The flat relatives of every task are kept as bitsets in which
+    the bit of a task is its position in the topological order.
+
+    The index is a snapshot of the DAG when it was built, the DAG drops it
+    whenever a task or a relationship is added, see DAG.graph_index.
+    """
+
+    def __init__(self, dag):
+        """
+        :param dag: the DAG to index
+        :type dag: DAG
+        """
+        task_dict = dag.task_dict
+        self.upstream = {
+            task_id: tuple(task_dict[tid] for tid in task._upstream_task_ids)
+            for task_id, task in six.iteritems(task_dict)}
+        self.downstream = {
+            task_id: tuple(task_dict[tid] for tid in task._downstream_task_ids)
+            for task_id, task in six.iteritems(task_dict)}
+        # None if the graph has a cycle
+        self.topological_order = self._sort(dag.tasks)
+        # Map from upstream (True or False) to a map from task_id to the
+        # bitset of the flat relatives of the task
+        self._flat_relatives = {}
+        # Map from upstream (True or False) to a map from task_id to the sum
+        # of the priority weights of the flat relatives of the task
+        self._relatives_weights = {}
+
+    def _sort(self, tasks):
+        """
+        Kahn's algorithm, tasks that are ready at the same time are sorted in
+        the order they were given.
+        """
+        num_upstream = {task.task_id: len(self.upstream[task.task_id])
+                        for task in tasks}
+        ready = deque(task for task in tasks if not num_upstream[task.task_id])
+        graph_sorted = []
+        while ready:
+            task = ready.popleft()
+            graph_sorted.append(task)
+            for downstream_task in self.downstream[task.task_id]:
+                num_upstream[downstream_task.task_id] -= 1
+                if not num_upstream[downstream_task.task_id]:
+                    ready.append(downstream_task)
+
+        if len(graph_sorted) < len(tasks):
+            return None
+        return tuple(graph_sorted)
+
+    def _get_flat_relatives(self, upstream):
+        if upstream not in self._flat_relatives:
+            if self.topological_order is None:
+                raise AirflowException("A cyclic dependency occurred in dag")
+            bits = {task.task_id: 1 << i
+                    for i, task in enumerate(self.topological_order)}
+            direct_relatives = self.upstream if upstream else self.downstream
+            # Visit the relatives of a task before the task itself
+            if upstream:
+                tasks = self.topological_order
+            else:
+                tasks = reversed(self.topological_order)
+            flat_relatives = {}
+            for task in tasks:
+                relatives = 0
+                for relative in direct_relatives[task.task_id]:
+                    relatives |= bits[relative.task_id]
+                    relatives |= flat_relatives[relative.task_id]
+                flat_relatives[task.task_id] = relatives
+            self._flat_relatives[upstream] = flat_relatives
+        return self._flat_relatives[upstream]
+
+    def get_flat_relative_ids(self, task_id, upstream=False):
+        """
+        :return: the ids of the flat relatives of the task, either upstream or
+            downstream
+        :rtype: set(unicode)
+        """
+        relatives = self._get_flat_relatives(upstream)[task_id]
+        relative_ids = set()
+        while relatives:
+            lowest_bit = relatives & -relatives
+            relative_ids.add(
+                self.topological_order[lowest_bit.bit_length() - 1].task_id)
+            relatives ^= lowest_bit
+        return relative_ids
+
+    def get_relatives_weight(self, task_id, upstream=False):
+        """
+        :return: the sum of the priority weights of the flat relatives of the
+            task, either upstream or downstream
+        :rtype: int
+        """
+        if upstream not in self._relatives_weights:
+            flat_relatives = self._get_flat_relatives(upstream)
+            # Tasks of a DAG usually share a handful of priority weights, so
+            # the relatives are counted per priority weight
+            weight_masks = defaultdict(int)
+            for i, task in enumerate(self.topological_order):
+                weight_masks[task.priority_weight] |= 1 << i
+            self._relatives_weights[upstream] = {
+                tid: sum(weight * bin(relatives & mask).count('1')
+                         for weight, mask in six.iteritems(weight_masks))
+                for tid, relatives in six.iteritems(flat_relatives)}
+        return self._relatives_weights[upstream][task_id]
+
+
 @functools.total_ordering
 class DAG(BaseDag, LoggingMixin):
     """
@@ -3085,6 +3457,11 @@ class DAG(BaseDag, LoggingMixin):
         self.partial = False
         self.on_success_callback = on_success_callback
         self.on_failure_callback = on_failure_callback
+        # Map from the id of a running DagRun to the fingerprint of the DAG
+        # the run was last verified against, see DagRun.verify_integrity
+        self._verified_integrity = {}
+        # Built on first use, see DAG.graph_index
+        self._graph_index = None
 
         self._comps = {
             'dag_id',
@@ -3447,9 +3824,13 @@ class DAG(BaseDag, LoggingMixin):
         from airflow.operators.subdag_operator import SubDagOperator
         l = []
         for task in self.tasks:
-            if (isinstance(task, SubDagOperator) or
-                #TODO remove in Airflow 2.0
-                type(task).__name__ == 'SubDagOperator'):
+            is_subdag_op = (
+                isinstance(task, SubDagOperator) or
+                # TODO remove in Airflow 2.0
+                type(task).__name__ == 'SubDagOperator' or
+                # Deserialized tasks, see airflow.dag.serialization
+                task.task_type == 'SubDagOperator')
+            if is_subdag_op:
                 l.append(task.subdag)
                 l += task.subdag.subdags
         return l
@@ -3508,56 +3889,38 @@ class DAG(BaseDag, LoggingMixin):
     def roots(self):
         return [t for t in self.tasks if not t.downstream_list]
 
+    @property
+    def graph_index(self):
+        """
+        Returns the index of the graph of the tasks of the DAG. It is built on
+        first use and dropped whenever tasks or relationships are added.
+
+        :rtype: DagGraphIndex
+        """
+        graph_index = getattr(self, '_graph_index', None)
+        if graph_index is None:
+            graph_index = self._graph_index = DagGraphIndex(self)
+        return graph_index
+
+    def clear_graph_index(self):
+        """
+        Drops the index of the graph of the tasks of the DAG, it's rebuilt on
+        next use.
+        """
+        self._graph_index = None
+
     def topological_sort(self):
         """
         Sorts tasks in topographical order, such that a task comes after any of its
         upstream dependencies.
 
-        Heavily inspired by:
-        http://blog.jupo.org/2012/04/06/topological-sorting-acyclic-directed-graphs/
-
         :return: list of tasks in topological order
         """
-
-        # copy the the tasks so we leave it unmodified
-        graph_unsorted = self.tasks[:]
-
-        graph_sorted = []
-
-        # special case
-        if len(self.tasks) == 0:
-            return tuple(graph_sorted)
-
-        # Run until the unsorted graph is empty.
-        while graph_unsorted:
-            # Go through each of the node/edges pairs in the unsorted
-            # graph. If a set of edges doesn't contain any nodes that
-            # haven't been resolved, that is, that are still in the
-            # unsorted graph, remove the pair from the unsorted graph,
-            # and append it to the sorted graph. Note here that by using
-            # using the items() method for iterating, a copy of the
-            # unsorted graph is used, allowing us to modify the unsorted
-            # graph as we move through it. We also keep a flag for
-            # checking that that graph is acyclic, which is true if any
-            # nodes are resolved during each pass through the graph. If
-            # not, we need to bail out as the graph therefore can't be
-            # sorted.
-            acyclic = False
-            for node in list(graph_unsorted):
-                for edge in node.upstream_list:
-                    if edge in graph_unsorted:
-                        break
-                # no edges in upstream tasks
-                else:
-                    acyclic = True
-                    graph_unsorted.remove(node)
-                    graph_sorted.append(node)
-
-            if not acyclic:
-                raise AirflowException("A cyclic dependency occurred in dag: {}"
-                                       .format(self.dag_id))
-
-        return tuple(graph_sorted)
+        topological_order = self.graph_index.topological_order
+        if topological_order is None:
+            raise AirflowException("A cyclic dependency occurred in dag: {}"
+                                   .format(self.dag_id))
+        return topological_order
 
     @provide_session
     def set_dag_runs_state(
@@ -3703,8 +4066,19 @@ class DAG(BaseDag, LoggingMixin):
         result.user_defined_macros = self.user_defined_macros
         result.user_defined_filters = self.user_defined_filters
         result.params = self.params
+        result._graph_index = None
+        result._verified_integrity = {}
         return result
 
+    def __getstate__(self):
+        # The graph index is rebuilt on demand and the runs verified against
+        # this DAG object are not verified against its copies, there is no
+        # point in pickling them
+        state = self.__dict__.copy()
+        state['_graph_index'] = None
+        state['_verified_integrity'] = {}
+        return state
+
     def sub_dag(self, task_regex, include_downstream=False,
                 include_upstream=True):
         """
@@ -3733,6 +4107,7 @@ class DAG(BaseDag, LoggingMixin):
                 tid for tid in t._upstream_task_ids if tid in dag.task_ids]
             t._downstream_task_ids = [
                 tid for tid in t._downstream_task_ids if tid in dag.task_ids]
+        dag.clear_graph_index()
 
         if len(dag.tasks) < len(self.tasks):
             dag.partial = True
@@ -3829,6 +4204,7 @@ class DAG(BaseDag, LoggingMixin):
             self.tasks.append(task)
             self.task_dict[task.task_id] = task
             task.dag = self
+            self.clear_graph_index()
 
         self.task_count = len(self.tasks)
 
@@ -4780,38 +5156,44 @@ class DagRun(Base, LoggingMixin):
             else:
                 ti.task = dag.get_task(ti.task_id)
 
-        # pre-calculate
-        # db is faster
+        # All the decisions below are taken on the task instances loaded
+        # above, the database is only queried again to confirm a deadlock
         start_dttm = timezone.utcnow()
-        unfinished_tasks = self.get_task_instances(
-            state=State.unfinished(),
-            session=session
-        )
+        unfinished_states = State.unfinished()
+        unfinished_tasks = [t for t in tis if t.state in unfinished_states]
         none_depends_on_past = all(not t.task.depends_on_past for t in unfinished_tasks)
         none_task_concurrency = all(t.task.task_concurrency is None for t in unfinished_tasks)
         # small speed up
         if unfinished_tasks and none_depends_on_past and none_task_concurrency:
-            # todo: this can actually get pretty slow: one task costs between 0.01-015s
             no_dependencies_met = True
+            finished_states = State.finished() + [State.UPSTREAM_FAILED]
+            dep_context = DepContext(
+                flag_upstream_failed=True,
+                ignore_in_retry_period=True,
+                ignore_in_reschedule_period=True,
+                finished_tasks=[t for t in tis if t.state in finished_states])
             for ut in unfinished_tasks:
                 # We need to flag upstream and check for changes because upstream
-                # failures can result in deadlock false positives
+                # failures can result in deadlock false positives. The trigger
+                # rule dependency updates the state of the flagged task
+                # instances in place.
                 old_state = ut.state
                 deps_met = ut.are_dependencies_met(
-                    dep_context=DepContext(
-                        flag_upstream_failed=True,
-                        ignore_in_retry_period=True),
+                    dep_context=dep_context,
                     session=session)
-                if deps_met or old_state != ut.current_state(session=session):
+                if deps_met or old_state != ut.state:
                     no_dependencies_met = False
                     break
+            if no_dependencies_met:
+                no_dependencies_met = not self._task_states_changed(
+                    unfinished_tasks, session=session)
 
         duration = (timezone.utcnow() - start_dttm).total_seconds() * 1000
         Stats.timing("dagrun.dependency-check.{}".format(self.dag_id), duration)
 
         # future: remove the check on adhoc tasks (=active_tasks)
         if len(tis) == len(dag.active_tasks):
-            root_ids = [t.task_id for t in dag.roots]
+            root_ids = {t.task_id for t in dag.roots}
             roots = [t for t in tis if t.task_id in root_ids]
 
             # if all roots finished and at least one failed, the run failed
@@ -4841,41 +5223,97 @@ class DagRun(Base, LoggingMixin):
             else:
                 self.state = State.RUNNING
 
+        if self.state != State.RUNNING:
+            # Forget the runs that are over, see verify_integrity
+            getattr(dag, '_verified_integrity', {}).pop(self.id, None)
+
         # todo: determine we want to use with_for_update to make sure to lock the run
         session.merge(self)
         session.commit()
 
         return self.state
 
+    def _task_states_changed(self, task_instances, session):
+        """
+        Checks with a single query whether the state of any of the given task
+        instances of this DagRun changed in the database since they were loaded.
+
+        :param task_instances: task instances of this DagRun
+        :type task_instances: list[TaskInstance]
+        :return: whether any of the states changed
+        :rtype: bool
+        """
+        states = {ti.task_id: ti.state for ti in task_instances}
+        current_states = (
+            session
+            .query(TaskInstance.task_id, TaskInstance.state)
+            .filter(TaskInstance.dag_id == self.dag_id,
+                    TaskInstance.execution_date == self.execution_date,
+                    TaskInstance.task_id.in_(list(states)))
+            .all()
+        )
+        return any(states[task_id] != state for task_id, state in current_states)
+
     @provide_session
     def verify_integrity(self, session=None):
         """
         Verifies the DagRun by checking for removed tasks or tasks that are not in the
         database yet. It will set state to removed or add the task if required.
+
+        The check is skipped for a running DagRun that was already verified
+        against the same DAG object, as long as neither the tasks of the DAG
+        nor the state of the run changed. A DAG parsed again is verified
+        again, so the scheduler only skips the check on later loops when it
+        reuses the DAGs of unchanged files, see [scheduler] parse_cache_max_age.
         """
         dag = self.get_dag()
+
+        fingerprint = (self.state, dag.partial, hash(frozenset(dag.task_dict)))
+        verified_integrity = getattr(dag, '_verified_integrity', None)
+        if verified_integrity is None:
+            verified_integrity = dag._verified_integrity = {}
+        if verified_integrity.get(self.id) == fingerprint:
+            return
+
         tis = self.get_task_instances(session=session)
 
         # check for removed tasks
-        task_ids = []
+        task_ids = set()
         for ti in tis:
-            task_ids.append(ti.task_id)
-            try:
-                dag.get_task(ti.task_id)
-            except AirflowException:
+            task_ids.add(ti.task_id)
+            if ti.task_id not in dag.task_dict:
                 if self.state is not State.RUNNING and not dag.partial:
                     ti.state = State.REMOVED
 
-        # check for missing tasks
-        for task in six.itervalues(dag.task_dict):
-            if task.adhoc:
-                continue
-
-            if task.task_id not in task_ids:
-                ti = TaskInstance(task, self.execution_date)
-                session.add(ti)
+        # check for missing tasks, they are inserted in bulk as building and
+        # flushing an ORM object per task instance is slow for large DAGs
+        unixname = getpass.getuser()
+        missing_tis = [
+            {
+                'dag_id': task.dag_id,
+                'task_id': task.task_id,
+                'execution_date': self.execution_date,
+                'queue': task.queue,
+                'pool': task.pool,
+                'priority_weight': task.priority_weight_total,
+                '_try_number': 0,
+                'max_tries': task.retries,
+                'unixname': unixname,
+                'run_as_user': task.run_as_user,
+                'hostname': '',
+            }
+            for task in six.itervalues(dag.task_dict)
+            if not task.adhoc and task.task_id not in task_ids
+        ]
+        if missing_tis:
+            session.bulk_insert_mappings(TaskInstance, missing_tis)
 
         session.commit()
+        # Only the running runs are verified again, see update_state
+        if self.state == State.RUNNING:
+            verified_integrity[self.id] = fingerprint
+        else:
+            verified_integrity.pop(self.id, None)
 
     @staticmethod
     def get_run(session, dag_id, execution_date):
@@ -13,13 +13,17 @@
 # limitations under the License.
 
 
+from collections import defaultdict
 from time import sleep
+from datetime import timedelta
 
 from airflow.exceptions import AirflowException, AirflowSensorTimeout, \
-    AirflowSkipException
-from airflow.models import BaseOperator
+    AirflowSkipException, AirflowRescheduleException
+from airflow.models import BaseOperator, TaskReschedule
+from airflow.ti_deps.deps.ready_to_reschedule_dep import ReadyToRescheduleDep
 from airflow.utils import timezone
 from airflow.utils.decorators import apply_defaults
+from airflow.utils.log.logging_mixin import LoggingMixin
 
 
 class BaseSensorOperator(BaseOperator):
@@ -36,20 +40,42 @@ class BaseSensorOperator(BaseOperator):
     :type poke_interval: int
     :param timeout: Time, in seconds before the task times out and fails.
     :type timeout: int
+    :param mode: How the sensor operates.
+        Options are: ``{ poke | reschedule }``, default is ``poke``.
+        When set to ``poke`` the sensor is taking up a worker slot for its
+        whole execution time and sleeps between pokes. Use this mode if the
+        expected runtime of the sensor is short or if a short poke interval
+        is required.
+        When set to ``reschedule`` the sensor task frees the worker slot when
+        the criteria is not yet met and it's rescheduled at a later time. Use
+        this mode if the expected time until the criteria is met is long.
+        The poke interval should be more than one minute to prevent too much
+        load on the scheduler. The timeout counts from the first poke.
+    :type mode: str
     """
     ui_color = '#e6f1f2'
+    valid_modes = ['poke', 'reschedule']
 
     @apply_defaults
     def __init__(self,
                  poke_interval=60,
                  timeout=60 * 60 * 24 * 7,
                  soft_fail=False,
+                 mode='poke',
                  *args,
                  **kwargs):
         super(BaseSensorOperator, self).__init__(*args, **kwargs)
         self.poke_interval = poke_interval
         self.soft_fail = soft_fail
         self.timeout = timeout
+        if mode not in self.valid_modes:
+            raise AirflowException(
+                "The mode must be one of {valid_modes}, but task "
+                "'{d}.{t}' received '{m}'."
+                .format(valid_modes=self.valid_modes,
+                        d=self.dag.dag_id if self.has_dag() else "",
+                        t=self.task_id, m=mode))
+        self.mode = mode
 
     def poke(self, context):
         """
@@ -58,13 +84,102 @@ class BaseSensorOperator(BaseOperator):
         """
         raise AirflowException('Override me.')
 
+    def get_poke_batch_key(self):
+        """
+        Sensors that can be poked together with other sensors of the same
+        class, see poke_in_batches, return the key of their batch, typically
+        the id of the connection they poke through. The default None means
+        that the sensor can only poke on its own.
+        """
+        return None
+
+    def get_poke_targets(self):
+        """
+        Returns the hashable targets the sensor waits for, its criteria is met
+        when all of them are. Only called when get_poke_batch_key isn't None.
+        """
+        raise AirflowException('Override me.')
+
+    @classmethod
+    def poke_batch(cls, batch_key, targets):
+        """
+        Checks the targets of many sensors of this class sharing a batch key
+        at once, for example with a single call to the service they poke.
+
+        :param batch_key: the batch key of the sensors
+        :param targets: the targets of the sensors
+        :type targets: set
+        :return: the targets that are met
+        :rtype: set
+        """
+        raise AirflowException('Override me.')
+
     def execute(self, context):
         started_at = timezone.utcnow()
+        if self.reschedule:
+            # If reschedule, use first start date of current try
+            task_reschedules = TaskReschedule.find_for_task_instance(context['ti'])
+            if task_reschedules:
+                started_at = task_reschedules[0].start_date
         while not self.poke(context):
             if (timezone.utcnow() - started_at).total_seconds() > self.timeout:
                 if self.soft_fail:
                     raise AirflowSkipException('Snap. Time is OUT.')
                 else:
                     raise AirflowSensorTimeout('Snap. Time is OUT.')
-            sleep(self.poke_interval)
+            if self.reschedule:
+                reschedule_date = timezone.utcnow() + timedelta(
+                    seconds=self.poke_interval)
+                raise AirflowRescheduleException(reschedule_date)
+            else:
+                sleep(self.poke_interval)
         self.log.info("Success criteria met. Exiting.")
+
+    @property
+    def reschedule(self):
+        return self.mode == 'reschedule'
+
+    @property
+    def deps(self):
+        """
+        Adds one additional dependency for all sensor operators that
+        checks if a sensor task instance can be rescheduled.
+        """
+        return super(BaseSensorOperator, self).deps | {ReadyToRescheduleDep()}
+
+
+def poke_in_batches(sensors):
+    """
+    Pokes many sensors with one poke_batch call per sensor class and batch
+    key instead of one poke per sensor. The templates of the sensors must
+    already be rendered. A failing poke_batch call is logged and its
+    sensors are left out of the result.
+
+    :param sensors: sensors whose get_poke_batch_key isn't None
+    :type sensors: list[BaseSensorOperator]
+    :return: for each sensor that could be poked, whether its criteria is met
+    :rtype: dict[int, bool] keyed by the position of the sensor in sensors
+    """
+    log = LoggingMixin().log
+    batches = defaultdict(list)
+    for i, sensor in enumerate(sensors):
+        batches[(type(sensor), sensor.get_poke_batch_key())].append(i)
+
+    results = {}
+    for (sensor_class, batch_key), positions in batches.items():
+        targets_by_position = {
+            i: sensors[i].get_poke_targets() for i in positions}
+        targets = set()
+        for sensor_targets in targets_by_position.values():
+            targets.update(sensor_targets)
+        log.info("Poking %s targets of %s %s sensors with batch key %s",
+                 len(targets), len(positions), sensor_class.__name__, batch_key)
+        try:
+            met_targets = sensor_class.poke_batch(batch_key, targets)
+        except Exception:
+            log.exception("Failed to poke the %s sensors with batch key %s",
+                          sensor_class.__name__, batch_key)
+            continue
+        for i, sensor_targets in targets_by_position.items():
+            results[i] = all(target in met_targets for target in sensor_targets)
+    return results
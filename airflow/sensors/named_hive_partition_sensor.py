@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import defaultdict
+
 from past.builtins import basestring
 
 from airflow.sensors.base_sensor_operator import BaseSensorOperator
@@ -87,3 +89,25 @@ class NamedHivePartitionSensor(BaseSensorOperator):
                 return False
 
         return True
+
+    def get_poke_batch_key(self):
+        return self.metastore_conn_id
+
+    def get_poke_targets(self):
+        return self.partition_names
+
+    @classmethod
+    def poke_batch(cls, batch_key, targets):
+        from airflow.hooks.hive_hooks import HiveMetastoreHook
+        hook = HiveMetastoreHook(metastore_conn_id=batch_key)
+
+        partitions_by_table = defaultdict(dict)
+        for target in targets:
+            schema, table, partition = cls.parse_partition_name(target)
+            partitions_by_table[(schema, table)][partition] = target
+
+        met_targets = set()
+        for (schema, table), partitions in partitions_by_table.items():
+            existing = hook.check_for_named_partitions(schema, table, partitions)
+            met_targets.update(partitions[partition] for partition in existing)
+        return met_targets
@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import fnmatch
+import re
+from collections import defaultdict
 
 from urllib.parse import urlparse
 
@@ -74,3 +77,53 @@ class S3KeySensor(BaseSensorOperator):
                                                self.bucket_name)
         else:
             return hook.check_for_key(self.bucket_key, self.bucket_name)
+
+    def get_poke_batch_key(self):
+        return self.aws_conn_id
+
+    def get_poke_targets(self):
+        return [(self.bucket_name, self.bucket_key, self.wildcard_match)]
+
+    @classmethod
+    def poke_batch(cls, batch_key, targets):
+        from airflow.hooks.S3_hook import S3Hook
+        hook = S3Hook(aws_conn_id=batch_key)
+
+        # The targets checked by listing the same keys, by bucket, prefix
+        # and delimiter. The keys matching a pattern start with what precedes
+        # its first wildcard, the other keys are listed with the keys of the
+        # same folder only, so that unrelated keys are never listed together.
+        targets_by_listing = defaultdict(list)
+        for target in targets:
+            bucket_name, key, wildcard_match = target
+            if wildcard_match:
+                listing = (bucket_name, re.split(r'[*]', key, 1)[0], '')
+            else:
+                listing = (bucket_name, key[:key.rfind('/') + 1], '/')
+            targets_by_listing[listing].append(target)
+
+        met_targets = set()
+        for listing, listing_targets in targets_by_listing.items():
+            bucket_name, prefix, delimiter = listing
+            if len(listing_targets) == 1:
+                # Checking a single target costs at most one listing
+                target = listing_targets[0]
+                _, key, wildcard_match = target
+                if wildcard_match:
+                    met = hook.check_for_wildcard_key(key, bucket_name)
+                else:
+                    met = hook.check_for_key(key, bucket_name)
+                if met:
+                    met_targets.add(target)
+                continue
+
+            keys = set(hook.list_keys(bucket_name, prefix=prefix,
+                                      delimiter=delimiter) or [])
+            for target in listing_targets:
+                _, key, wildcard_match = target
+                if wildcard_match:
+                    if any(fnmatch.fnmatch(k, key) for k in keys):
+                        met_targets.add(target)
+                elif key in keys:
+                    met_targets.add(target)
+        return met_targets
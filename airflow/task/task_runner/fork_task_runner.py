@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import getpass
+import os
+import signal
+
+import psutil
+
+from airflow import settings
+from airflow.task.task_runner.base_task_runner import BaseTaskRunner
+from airflow.utils.helpers import (
+    DEFAULT_TIME_TO_WAIT_AFTER_SIGTERM, kill_process_tree)
+
+
+class ForkTaskRunner(BaseTaskRunner):
+    """
+    Runs the raw Airflow task in a process forked from the process of the
+    local task job. That process already imported Airflow and parsed the DAG
+    of the task, so the raw task starts without booting another interpreter
+    or parsing the DAG file again, while still running in its own process.
+
+    Tasks that have to run as another user are still started through the
+    Bash shell, as a forked process can't switch user.
+    """
+    def __init__(self, local_task_job):
+        super(ForkTaskRunner, self).__init__(local_task_job)
+        self._dag = None
+        if self._task_instance.task.has_dag():
+            self._dag = self._task_instance.task.dag
+        self._forked = False
+        self._return_code = None
+
+    def _can_fork(self):
+        return (self._dag is not None and
+                not (self.run_as_user and self.run_as_user != getpass.getuser()))
+
+    def start(self):
+        if not self._can_fork():
+            self.process = self.run_command(['bash', '-c'], join_args=True)
+            return
+
+        # The forked process must not inherit pooled connections, their
+        # sockets would be shared with this process
+        settings.engine.dispose()
+        pid = os.fork()
+        if pid:
+            self.log.info("Started process %s to run the task", pid)
+            self._forked = True
+            self.process = psutil.Process(pid)
+            return
+
+        return_code = 1
+        try:
+            self._run_raw_task()
+            return_code = 0
+        except Exception:
+            self.log.exception("Task failed")
+        finally:
+            # Never return into the code of the local task job
+            os._exit(return_code)
+
+    def _run_raw_task(self):
+        # Imported here as the cli imports the jobs, which import this module
+        from airflow.bin.cli import get_parser
+
+        # The local task job handles these to kill this process, the raw task
+        # sets its own handler
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        os.setpgid(0, 0)
+
+        # The first token is the airflow executable
+        args = get_parser().parse_args(self._command[1:])
+        args.func(args, dag=self._dag)
+
+    def return_code(self):
+        if not self._forked:
+            return self.process.poll()
+        if self._return_code is None:
+            try:
+                self._return_code = self.process.wait(timeout=0)
+            except psutil.TimeoutExpired:
+                pass
+        return self._return_code
+
+    def terminate(self):
+        if self.process and psutil.pid_exists(self.process.pid):
+            kill_process_tree(self.log, self.process.pid)
+            if self._forked and self.return_code() is None:
+                # The forked process runs the task itself, it is not one of
+                # the descendants killed above
+                self.process.terminate()
+                try:
+                    self._return_code = self.process.wait(
+                        timeout=DEFAULT_TIME_TO_WAIT_AFTER_SIGTERM)
+                except psutil.TimeoutExpired:
+                    self.process.kill()
+                    self._return_code = self.process.wait()
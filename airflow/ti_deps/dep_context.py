@@ -52,11 +52,19 @@ class DepContext(object):
     :type ignore_depends_on_past: boolean
     :param ignore_in_retry_period: Ignore the retry period for task instances
     :type ignore_in_retry_period: boolean
+    :param ignore_in_reschedule_period: Ignore the reschedule period for task
+        instances in reschedule mode
+    :type ignore_in_reschedule_period: boolean
     :param ignore_task_deps: Ignore task-specific dependencies such as depends_on_past and
         trigger rule
     :type ignore_task_deps: boolean
     :param ignore_ti_state: Ignore the task instance's previous failure/success
     :type ignore_ti_state: boolean
+    :param finished_tasks: The task instances of the DagRun being evaluated that are in
+        a finished state. When set, trigger rules are evaluated in memory against these
+        task instances instead of querying the database for every task instance. The
+        context must then only be used for task instances of that single DagRun.
+    :type finished_tasks: list[TaskInstance]
     """
     def __init__(
             self,
@@ -65,15 +73,50 @@ class DepContext(object):
             ignore_all_deps=False,
             ignore_depends_on_past=False,
             ignore_in_retry_period=False,
+            ignore_in_reschedule_period=False,
             ignore_task_deps=False,
-            ignore_ti_state=False):
+            ignore_ti_state=False,
+            finished_tasks=None):
         self.deps = deps or set()
         self.flag_upstream_failed = flag_upstream_failed
         self.ignore_all_deps = ignore_all_deps
         self.ignore_depends_on_past = ignore_depends_on_past
         self.ignore_in_retry_period = ignore_in_retry_period
+        self.ignore_in_reschedule_period = ignore_in_reschedule_period
         self.ignore_task_deps = ignore_task_deps
         self.ignore_ti_state = ignore_ti_state
+        self.finished_tasks = finished_tasks
+        self._finished_task_states = None
+
+    @property
+    def finished_task_states(self):
+        """
+        A mapping of task_id to state for the finished task instances of this context,
+        or None if the context was not created with finished task instances.
+        """
+        if self.finished_tasks is None:
+            return None
+        if self._finished_task_states is None:
+            self._finished_task_states = {
+                ti.task_id: ti.state for ti in self.finished_tasks}
+        return self._finished_task_states
+
+    def add_finished_task(self, ti):
+        """
+        Records a task instance that reached a finished state while this context was
+        being evaluated (e.g. because it was flagged as upstream failed), so that the
+        task instances evaluated afterwards see the same states as they would in the
+        database.
+
+        :param ti: the task instance that is now finished
+        :type ti: TaskInstance
+        """
+        if self.finished_tasks is None:
+            return
+        if ti.task_id not in self.finished_task_states:
+            self.finished_tasks.append(ti)
+        self.finished_task_states[ti.task_id] = ti.state
+
 
 # In order to be able to get queued a task must have one of these states
 QUEUEABLE_STATES = {
@@ -84,6 +127,7 @@ QUEUEABLE_STATES = {
     State.SKIPPED,
     State.UPSTREAM_FAILED,
     State.UP_FOR_RETRY,
+    State.UP_FOR_RESCHEDULE,
 }
 
 # Context to get the dependencies that need to be met in order for a task instance to
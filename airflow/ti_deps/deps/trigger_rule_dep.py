@@ -11,6 +11,8 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from collections import Counter
+
 from sqlalchemy import case, func
 
 import airflow
@@ -43,44 +45,79 @@ class TriggerRuleDep(BaseTIDep):
             yield self._passing_status(reason="The task had a dummy trigger rule set.")
             return
 
-        # TODO(unknown): this query becomes quite expensive with dags that have many
-        # tasks. It should be refactored to let the task report to the dag run and get the
-        # aggregates from there.
-        qry = (
-            session
-            .query(
-                func.coalesce(func.sum(
-                    case([(TI.state == State.SUCCESS, 1)], else_=0)), 0),
-                func.coalesce(func.sum(
-                    case([(TI.state == State.SKIPPED, 1)], else_=0)), 0),
-                func.coalesce(func.sum(
-                    case([(TI.state == State.FAILED, 1)], else_=0)), 0),
-                func.coalesce(func.sum(
-                    case([(TI.state == State.UPSTREAM_FAILED, 1)], else_=0)), 0),
-                func.count(TI.task_id),
-            )
-            .filter(
-                TI.dag_id == ti.dag_id,
-                TI.task_id.in_(ti.task.upstream_task_ids),
-                TI.execution_date == ti.execution_date,
-                TI.state.in_([
-                    State.SUCCESS, State.FAILED,
-                    State.UPSTREAM_FAILED, State.SKIPPED]),
+        if dep_context.finished_task_states is not None:
+            successes, skipped, failed, upstream_failed, done = \
+                self._get_states_count_upstream_ti(
+                    ti=ti, finished_task_states=dep_context.finished_task_states)
+        else:
+            # TODO(unknown): this query becomes quite expensive with dags that have
+            # many tasks. Callers evaluating many task instances of the same DagRun
+            # should pass the finished task instances through the DepContext instead.
+            qry = (
+                session
+                .query(
+                    func.coalesce(func.sum(
+                        case([(TI.state == State.SUCCESS, 1)], else_=0)), 0),
+                    func.coalesce(func.sum(
+                        case([(TI.state == State.SKIPPED, 1)], else_=0)), 0),
+                    func.coalesce(func.sum(
+                        case([(TI.state == State.FAILED, 1)], else_=0)), 0),
+                    func.coalesce(func.sum(
+                        case([(TI.state == State.UPSTREAM_FAILED, 1)], else_=0)), 0),
+                    func.count(TI.task_id),
+                )
+                .filter(
+                    TI.dag_id == ti.dag_id,
+                    TI.task_id.in_(ti.task.upstream_task_ids),
+                    TI.execution_date == ti.execution_date,
+                    TI.state.in_([
+                        State.SUCCESS, State.FAILED,
+                        State.UPSTREAM_FAILED, State.SKIPPED]),
+                )
             )
-        )
-
-        successes, skipped, failed, upstream_failed, done = qry.first()
-        for dep_status in self._evaluate_trigger_rule(
-                ti=ti,
-                successes=successes,
-                skipped=skipped,
-                failed=failed,
-                upstream_failed=upstream_failed,
-                done=done,
-                flag_upstream_failed=dep_context.flag_upstream_failed,
-                session=session):
+            successes, skipped, failed, upstream_failed, done = qry.first()
+
+        dep_statuses = list(self._evaluate_trigger_rule(
+            ti=ti,
+            successes=successes,
+            skipped=skipped,
+            failed=failed,
+            upstream_failed=upstream_failed,
+            done=done,
+            flag_upstream_failed=dep_context.flag_upstream_failed,
+            session=session))
+
+        # the trigger rule evaluation may have flagged the task instance, make
+        # sure its downstream task instances see the new state
+        if ti.state in (State.UPSTREAM_FAILED, State.SKIPPED):
+            dep_context.add_finished_task(ti)
+
+        for dep_status in dep_statuses:
             yield dep_status
 
+    @staticmethod
+    def _get_states_count_upstream_ti(ti, finished_task_states):
+        """
+        Counts the states of the upstream task instances of the given task instance in
+        memory. This returns the same aggregates as the database query used when no
+        finished task instances are available.
+
+        :param ti: the task instance to count the upstream states of
+        :type ti: TaskInstance
+        :param finished_task_states: mapping of task_id to state for the finished task
+            instances of the DagRun of ``ti``
+        :type finished_task_states: dict[str, str]
+        """
+        counter = Counter(
+            finished_task_states[task_id] for task_id in ti.task.upstream_task_ids
+            if task_id in finished_task_states)
+        successes = counter[State.SUCCESS]
+        skipped = counter[State.SKIPPED]
+        failed = counter[State.FAILED]
+        upstream_failed = counter[State.UPSTREAM_FAILED]
+        done = successes + skipped + failed + upstream_failed
+        return successes, skipped, failed, upstream_failed, done
+
     @provide_session
     def _evaluate_trigger_rule(
             self,
@@ -17,15 +17,23 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import hashlib
+import heapq
 import os
 import re
+import stat
+import tempfile
 import time
 import zipfile
 from abc import ABCMeta, abstractmethod
 from collections import defaultdict
+from datetime import timedelta
+
+import dill
 
 from airflow.dag.base_dag import BaseDag, BaseDagBag
 from airflow.exceptions import AirflowException
+from airflow.settings import Stats
 from airflow.utils import timezone
 from airflow.utils.log.logging_mixin import LoggingMixin
 
@@ -155,9 +163,291 @@ class SimpleDagBag(BaseDagBag):
         return self.dag_id_to_simple_dag[dag_id]
 
 
+class DagFileParseCache(LoggingMixin):
+    """
+    Keeps the DagBags that were parsed out of DAG definition files, so that
+    a file that did not change since it was last parsed does not need to be
+    imported again. Entries are keyed by the path, the modification time and
+    a hash of the content of the file. They also expire after max_age seconds
+    so that DAGs that are generated dynamically still get refreshed.
+    """
+
+    def __init__(self, max_age):
+        """
+        :param max_age: re-parse a file at least once every this many seconds
+        :type max_age: float
+        """
+        self._max_age = max_age
+        # Map from file path to a (signature, parse time, dagbag) tuple
+        self._entries = {}
+
+    @staticmethod
+    def get_file_signature(file_path):
+        """
+        :param file_path: the path to the file
+        :type file_path: unicode
+        :return: the modification time and the hash of the content of the file,
+        or None if the file can't be read
+        :rtype: tuple(float, unicode)
+        """
+        try:
+            mtime = os.path.getmtime(file_path)
+            with open(file_path, 'rb') as f:
+                content_hash = hashlib.sha1(f.read()).hexdigest()
+        except (IOError, OSError):
+            return None
+        return mtime, content_hash
+
+    def get(self, file_path, signature):
+        """
+        :param file_path: the path to the file that was parsed
+        :type file_path: unicode
+        :param signature: the current signature of the file
+        :type signature: tuple(float, unicode)
+        :return: the DagBag parsed out of the file if the file did not change
+        and the entry did not expire, otherwise None
+        :rtype: airflow.models.DagBag
+        """
+        if file_path not in self._entries:
+            return None
+        cached_signature, parse_time, dagbag = self._entries[file_path]
+        if (signature is None or signature != cached_signature or
+                time.time() - parse_time > self._max_age):
+            del self._entries[file_path]
+            return None
+        return dagbag
+
+    def set(self, file_path, signature, dagbag):
+        """
+        :param file_path: the path to the file that was parsed
+        :type file_path: unicode
+        :param signature: the signature of the file before it was parsed
+        :type signature: tuple(float, unicode)
+        :param dagbag: the DagBag parsed out of the file
+        :type dagbag: airflow.models.DagBag
+        """
+        if signature is None:
+            return
+        self._entries[file_path] = (signature, time.time(), dagbag)
+
+
+class DagPickleCache(LoggingMixin):
+    """
+    Keeps pickled DAGs in a local folder, so that processes running a single
+    task load the DAG of the task instead of importing its definition file.
+    Entries are keyed by the path of the file and the id of the DAG and are
+    only used while the signature of the file (see
+    DagFileParseCache.get_file_signature) is the one it had when it was
+    parsed. Changes to modules the file imports are not detected.
+
+    A DAG whose pickle can't be loaded (e.g. because it references functions
+    defined in its definition file) is remembered as such, so that it isn't
+    pickled again until its file changes.
+    """
+
+    def __init__(self, folder):
+        """
+        :param folder: the folder to keep the pickled DAGs in
+        :type folder: unicode
+        """
+        self._folder = folder
+
+    def _get_entry_path(self, file_path, dag_id):
+        key = hashlib.sha1(
+            '{}\0{}'.format(file_path, dag_id).encode('utf-8')).hexdigest()
+        return os.path.join(self._folder, key + '.pickle')
+
+    def _read_entry(self, entry_path):
+        try:
+            with open(entry_path, 'rb') as f:
+                return dill.load(f)
+        except (IOError, OSError):
+            return None, None
+        except Exception:
+            self.log.exception("Could not read DAG cache entry %s", entry_path)
+            return None, None
+
+    def _write_entry(self, entry_path, signature, pickled_dag):
+        try:
+            if not os.path.exists(self._folder):
+                os.makedirs(self._folder)
+            # Write to a temporary file first as other processes may be
+            # reading the entry
+            fd, tmp_path = tempfile.mkstemp(dir=self._folder)
+            with os.fdopen(fd, 'wb') as f:
+                dill.dump((signature, pickled_dag), f)
+            os.rename(tmp_path, entry_path)
+        except (IOError, OSError):
+            self.log.exception("Could not write DAG cache entry %s", entry_path)
+
+    def get(self, file_path, dag_id, signature):
+        """
+        :param file_path: the path to the file the DAG is defined in
+        :type file_path: unicode
+        :param dag_id: the id of the DAG
+        :type dag_id: unicode
+        :param signature: the current signature of the file
+        :type signature: tuple(float, unicode)
+        :return: the DAG if it was cached for this signature of the file,
+        otherwise None
+        :rtype: airflow.models.DAG
+        """
+        if signature is None:
+            return None
+        entry_path = self._get_entry_path(file_path, dag_id)
+        cached_signature, pickled_dag = self._read_entry(entry_path)
+        if cached_signature != tuple(signature) or pickled_dag is None:
+            return None
+        try:
+            return dill.loads(pickled_dag)
+        except Exception:
+            self.log.warning("Could not load the cached DAG %s, it will be "
+                             "parsed from %s until the file changes",
+                             dag_id, file_path, exc_info=True)
+            self._write_entry(entry_path, tuple(signature), None)
+            return None
+
+    def set(self, file_path, dag_id, signature, dag):
+        """
+        :param file_path: the path to the file the DAG is defined in
+        :type file_path: unicode
+        :param dag_id: the id of the DAG
+        :type dag_id: unicode
+        :param signature: the signature of the file before it was parsed
+        :type signature: tuple(float, unicode)
+        :param dag: the DAG parsed out of the file
+        :type dag: airflow.models.DAG
+        """
+        if signature is None:
+            return
+        entry_path = self._get_entry_path(file_path, dag_id)
+        cached_signature, _ = self._read_entry(entry_path)
+        if cached_signature == tuple(signature):
+            # Either already cached or known not to load
+            return
+        try:
+            pickled_dag = dill.dumps(dag)
+        except Exception:
+            self.log.warning("Could not pickle DAG %s", dag_id, exc_info=True)
+            pickled_dag = None
+        self._write_entry(entry_path, tuple(signature), pickled_dag)
+
+
+class DagFileIndex(LoggingMixin):
+    """
+    Lists the Python files of a directory that may contain Airflow DAG
+    definitions, like list_py_file_paths(), but remembers what it learned
+    about every file between scans. A file is only checked for being a zip
+    file and only read for the DAG heuristic again when its inode,
+    modification time or size changed, and the patterns of an
+    .airflowignore file are only compiled again when that file changed, so
+    scanning a directory that did not change only stats its files.
+    """
+
+    def __init__(self, directory):
+        """
+        :param directory: the directory to traverse
+        :type directory: unicode
+        """
+        self._directory = directory
+        # Map from file path to [stat key, is zip file, might contain a DAG]
+        self._file_info = {}
+        # Map from .airflowignore path to (stat key, compiled patterns)
+        self._ignore_patterns = {}
+
+    @staticmethod
+    def _get_stat_key(file_stat):
+        return file_stat.st_ino, file_stat.st_mtime, file_stat.st_size
+
+    def _get_ignore_patterns(self, ignore_file_path, ignore_patterns):
+        key = self._get_stat_key(os.stat(ignore_file_path))
+        if ignore_file_path in self._ignore_patterns:
+            cached_key, patterns = self._ignore_patterns[ignore_file_path]
+            if cached_key == key:
+                ignore_patterns[ignore_file_path] = (key, patterns)
+                return patterns
+
+        patterns = []
+        with open(ignore_file_path, 'r') as f:
+            for pattern in f.read().split('\n'):
+                if not pattern:
+                    continue
+                try:
+                    patterns.append(re.compile(pattern))
+                except re.error:
+                    self.log.exception("Invalid pattern %s in %s",
+                                       pattern, ignore_file_path)
+        ignore_patterns[ignore_file_path] = (key, patterns)
+        return patterns
+
+    def list_py_file_paths(self, safe_mode=True):
+        """
+        Traverse the directory and look for Python files.
+
+        :param safe_mode: whether to use a heuristic to determine whether a file
+        contains Airflow DAG definitions
+        :return: a list of paths to Python files in the directory
+        :rtype: list[unicode]
+        """
+        directory = self._directory
+        file_paths = []
+        if directory is None:
+            return []
+        elif os.path.isfile(directory):
+            return [directory]
+        elif os.path.isdir(directory):
+            # Only keep what's known about files that still exist
+            file_info = {}
+            ignore_patterns = {}
+            patterns = []
+            for root, dirs, files in os.walk(directory, followlinks=True):
+                if '.airflowignore' in files:
+                    patterns += self._get_ignore_patterns(
+                        os.path.join(root, '.airflowignore'), ignore_patterns)
+                for f in files:
+                    try:
+                        file_path = os.path.join(root, f)
+                        file_stat = os.stat(file_path)
+                        if not stat.S_ISREG(file_stat.st_mode):
+                            continue
+
+                        key = self._get_stat_key(file_stat)
+                        info = self._file_info.get(file_path)
+                        if info is None or info[0] != key:
+                            info = [key, zipfile.is_zipfile(file_path), None]
+                        file_info[file_path] = info
+                        _, is_zip, might_contain_dag = info
+
+                        _, file_ext = os.path.splitext(f)
+                        if file_ext != '.py' and not is_zip:
+                            continue
+                        if any(p.search(file_path) for p in patterns):
+                            continue
+
+                        # Heuristic that guesses whether a Python file contains an
+                        # Airflow DAG definition.
+                        if safe_mode and not is_zip:
+                            if might_contain_dag is None:
+                                with open(file_path, 'rb') as fp:
+                                    content = fp.read()
+                                might_contain_dag = all(
+                                    [s in content for s in (b'DAG', b'airflow')])
+                                info[2] = might_contain_dag
+                            if not might_contain_dag:
+                                continue
+
+                        file_paths.append(file_path)
+                    except Exception:
+                        self.log.exception("Error while examining %s", f)
+            self._file_info = file_info
+            self._ignore_patterns = ignore_patterns
+        return file_paths
+
+
 def list_py_file_paths(directory, safe_mode=True):
     """
-    Traverse a directory and look for Python files.
+    Traverse a directory and look for Python files. Use a DagFileIndex to
+    avoid re-reading the files when the directory is traversed repeatedly.
 
     :param directory: the directory to traverse
     :type directory: unicode
@@ -166,48 +456,7 @@ def list_py_file_paths(directory, safe_mode=True):
     :return: a list of paths to Python files in the specified directory
     :rtype: list[unicode]
     """
-    file_paths = []
-    if directory is None:
-        return []
-    elif os.path.isfile(directory):
-        return [directory]
-    elif os.path.isdir(directory):
-        patterns = []
-        for root, dirs, files in os.walk(directory, followlinks=True):
-            ignore_file = [f for f in files if f == '.airflowignore']
-            if ignore_file:
-                f = open(os.path.join(root, ignore_file[0]), 'r')
-                patterns += [p for p in f.read().split('\n') if p]
-                f.close()
-            for f in files:
-                try:
-                    file_path = os.path.join(root, f)
-                    if not os.path.isfile(file_path):
-                        continue
-                    mod_name, file_ext = os.path.splitext(
-                        os.path.split(file_path)[-1])
-                    if file_ext != '.py' and not zipfile.is_zipfile(file_path):
-                        continue
-                    if any([re.findall(p, file_path) for p in patterns]):
-                        continue
-
-                    # Heuristic that guesses whether a Python file contains an
-                    # Airflow DAG definition.
-                    might_contain_dag = True
-                    if safe_mode and not zipfile.is_zipfile(file_path):
-                        with open(file_path, 'rb') as f:
-                            content = f.read()
-                            might_contain_dag = all(
-                                [s in content for s in (b'DAG', b'airflow')])
-
-                    if not might_contain_dag:
-                        continue
-
-                    file_paths.append(file_path)
-                except Exception:
-                    log = LoggingMixin().log
-                    log.exception("Error while examining %s", f)
-    return file_paths
+    return DagFileIndex(directory).list_py_file_paths(safe_mode=safe_mode)
 
 
 class AbstractDagFileProcessor(object):
@@ -293,19 +542,35 @@ class DagFileProcessorManager(LoggingMixin):
     processors finish, more are launched. The files are processed over and
     over again, but no more often than the specified interval.
 
-    :type _file_path_queue: list[unicode]
+    Files are queued as soon as they are due to be processed again and are
+    processed in the order of the time they became due, so that slow files
+    don't hold back the others. Files that changed since they were last
+    processed are moved ahead in the queue and files that did not produce any
+    DAG to schedule are moved back.
+
+    :type _file_path_queue: list[tuple(datetime, int, unicode)]
+    :type _queued_due_times: dict[unicode, datetime]
     :type _processors: dict[unicode, AbstractDagFileProcessor]
     :type _last_runtime: dict[unicode, float]
     :type _last_finish_time: dict[unicode, datetime]
+    :type _last_latency: dict[unicode, float]
     """
 
+    # How many seconds files that changed since they were last processed are
+    # moved ahead in the queue
+    changed_file_boost = 60
+    # How many seconds files that did not produce any DAG to schedule the last
+    # time they were processed are moved back in the queue
+    idle_file_delay = 60
+
     def __init__(self,
                  dag_directory,
                  file_paths,
                  parallelism,
                  process_file_interval,
                  max_runs,
-                 processor_factory):
+                 processor_factory,
+                 processor_timeout=0):
         """
         :param dag_directory: Directory where DAG definitions are kept. All
         files in file_paths should be under this directory
@@ -324,21 +589,36 @@ class DagFileProcessorManager(LoggingMixin):
         :param processor_factory: function that creates processors for DAG
         definition files. Arguments are (dag_definition_path)
         :type processor_factory: (unicode, unicode) -> (AbstractDagFileProcessor)
+        :param processor_timeout: terminate processors that run for longer
+        than this many seconds, 0 for no limit
+        :type processor_timeout: float
 
         """
         self._file_paths = file_paths
+        # Heap of the files to process, ordered by the time they became due
         self._file_path_queue = []
+        # Map from queued file path to the time it became due
+        self._queued_due_times = {}
+        # Used to keep the order of files that became due at the same time
+        self._queue_counter = 0
         self._parallelism = parallelism
         self._dag_directory = dag_directory
         self._max_runs = max_runs
         self._process_file_interval = process_file_interval
         self._processor_factory = processor_factory
+        self._processor_timeout = processor_timeout
         # Map from file path to the processor
         self._processors = {}
         # Map from file path to the last runtime
         self._last_runtime = {}
         # Map from file path to the last finish time
         self._last_finish_time = {}
+        # Map from file path to how long it waited in the queue the last time
+        self._last_latency = {}
+        # Map from file path to its modification time when it was last processed
+        self._last_mtime = {}
+        # File paths that did not produce any DAG to schedule the last time
+        self._idle_file_paths = set()
         # Map from file path to the number of runs
         self._run_count = defaultdict(int)
         # Scheduler heartbeat key.
@@ -390,6 +670,16 @@ class DagFileProcessorManager(LoggingMixin):
         """
         return self._last_runtime.get(file_path)
 
+    def get_last_latency(self, file_path):
+        """
+        :param file_path: the path to the file that was processed
+        :type file_path: unicode
+        :return: how long (in seconds) the file waited to be processed after it
+        became due the last time, or None if the file was never processed.
+        :rtype: float
+        """
+        return self._last_latency.get(file_path)
+
     def get_last_finish_time(self, file_path):
         """
         :param file_path: the path to the file that was processed
@@ -422,7 +712,11 @@ class DagFileProcessorManager(LoggingMixin):
         """
         self._file_paths = new_file_paths
         self._file_path_queue = [x for x in self._file_path_queue
-                                 if x in new_file_paths]
+                                 if x[2] in new_file_paths]
+        heapq.heapify(self._file_path_queue)
+        self._queued_due_times = {file_path: due_time for file_path, due_time
+                                  in self._queued_due_times.items()
+                                  if file_path in new_file_paths}
         # Stop processors that are working on deleted files
         filtered_processors = {}
         for file_path, processor in self._processors.items():
@@ -448,6 +742,53 @@ class DagFileProcessorManager(LoggingMixin):
             while not processor.done:
                 time.sleep(0.1)
 
+    def _get_mtime(self, file_path):
+        try:
+            return os.path.getmtime(file_path)
+        except OSError:
+            return None
+
+    def _queue_due_file_paths(self):
+        """
+        Add the files that are due to be processed to the queue.
+        """
+        now = timezone.utcnow()
+        file_paths_to_queue = []
+        for file_path in self._file_paths:
+            # If the file path is already queued or being processed, or if it
+            # was processed recently, wait until it's due
+            if (file_path in self._queued_due_times or
+                    file_path in self._processors or
+                    self._run_count[file_path] == self._max_runs):
+                continue
+
+            last_finish_time = self.get_last_finish_time(file_path)
+            if last_finish_time is None:
+                due_time = now
+                priority = due_time
+            else:
+                due_time = last_finish_time + timedelta(
+                    seconds=self._process_file_interval)
+                if due_time > now:
+                    continue
+                priority = due_time
+                if self._get_mtime(file_path) != self._last_mtime.get(file_path):
+                    priority -= timedelta(seconds=self.changed_file_boost)
+                elif file_path in self._idle_file_paths:
+                    priority += timedelta(seconds=self.idle_file_delay)
+
+            self._queued_due_times[file_path] = due_time
+            heapq.heappush(self._file_path_queue,
+                           (priority, self._queue_counter, file_path))
+            self._queue_counter += 1
+            file_paths_to_queue.append(file_path)
+
+        if file_paths_to_queue:
+            self.log.debug(
+                "Queuing the following files for processing:\n\t%s",
+                "\n\t".join(file_paths_to_queue)
+            )
+
     def heartbeat(self):
         """
         This should be periodically called by the scheduler. This method will
@@ -463,17 +804,27 @@ class DagFileProcessorManager(LoggingMixin):
         running_processors = {}
         """:type : dict[unicode, AbstractDagFileProcessor]"""
 
+        now = timezone.utcnow()
         for file_path, processor in self._processors.items():
+            runtime = (now - processor.start_time).total_seconds()
             if processor.done:
                 self.log.info("Processor for %s finished", file_path)
-                now = timezone.utcnow()
                 finished_processors[file_path] = processor
-                self._last_runtime[file_path] = (now -
-                                                 processor.start_time).total_seconds()
-                self._last_finish_time[file_path] = now
-                self._run_count[file_path] += 1
+            elif 0 < self._processor_timeout < runtime:
+                self.log.warning(
+                    "Processor for %s with PID %s started at %s has timed out, "
+                    "killing it.",
+                    file_path, processor.pid, processor.start_time.isoformat())
+                Stats.incr('dag_file_processor_timeouts', 1, 1)
+                processor.terminate(sigkill=True)
+                # The file is only processed again once it's due
+                self._idle_file_paths.add(file_path)
             else:
                 running_processors[file_path] = processor
+                continue
+            self._last_runtime[file_path] = runtime
+            self._last_finish_time[file_path] = now
+            self._run_count[file_path] += 1
         self._processors = running_processors
 
         self.log.debug("%s/%s scheduler processes running",
@@ -493,48 +844,26 @@ class DagFileProcessorManager(LoggingMixin):
             else:
                 for simple_dag in processor.result:
                     simple_dags.append(simple_dag)
+            if processor.result:
+                self._idle_file_paths.discard(file_path)
+            else:
+                self._idle_file_paths.add(file_path)
 
-        # Generate more file paths to process if we processed all the files
-        # already.
-        if len(self._file_path_queue) == 0:
-            # If the file path is already being processed, or if a file was
-            # processed recently, wait until the next batch
-            file_paths_in_progress = self._processors.keys()
-            now = timezone.utcnow()
-            file_paths_recently_processed = []
-            for file_path in self._file_paths:
-                last_finish_time = self.get_last_finish_time(file_path)
-                if (last_finish_time is not None and
-                    (now - last_finish_time).total_seconds() <
-                        self._process_file_interval):
-                    file_paths_recently_processed.append(file_path)
-
-            files_paths_at_run_limit = [file_path
-                                        for file_path, num_runs in self._run_count.items()
-                                        if num_runs == self._max_runs]
-
-            files_paths_to_queue = list(set(self._file_paths) -
-                                        set(file_paths_in_progress) -
-                                        set(file_paths_recently_processed) -
-                                        set(files_paths_at_run_limit))
-
-            for file_path, processor in self._processors.items():
-                self.log.debug(
-                    "File path %s is still being processed (started: %s)",
-                    processor.file_path, processor.start_time.isoformat()
-                )
-
+        for file_path, processor in self._processors.items():
             self.log.debug(
-                "Queuing the following files for processing:\n\t%s",
-                "\n\t".join(files_paths_to_queue)
+                "File path %s is still being processed (started: %s)",
+                processor.file_path, processor.start_time.isoformat()
             )
 
-            self._file_path_queue.extend(files_paths_to_queue)
+        # Queue the files that became due since the last heartbeat
+        self._queue_due_file_paths()
 
         # Start more processors if we have enough slots and files to process
         while (self._parallelism - len(self._processors) > 0 and
                len(self._file_path_queue) > 0):
-            file_path = self._file_path_queue.pop(0)
+            _, _, file_path = heapq.heappop(self._file_path_queue)
+            due_time = self._queued_due_times.pop(file_path)
+            self._last_mtime[file_path] = self._get_mtime(file_path)
             processor = self._processor_factory(file_path)
 
             processor.start()
@@ -543,6 +872,8 @@ class DagFileProcessorManager(LoggingMixin):
                 processor.pid, file_path
             )
             self._processors[file_path] = processor
+            self._last_latency[file_path] = max(
+                0.0, (processor.start_time - due_time).total_seconds())
 
         # Update scheduler heartbeat count.
         self._run_count[self._heart_beat_key] += 1
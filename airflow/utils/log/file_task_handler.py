@@ -21,6 +21,48 @@ from jinja2 import Template
 from airflow import configuration as conf
 from airflow.configuration import AirflowConfigException
 from airflow.utils.file import mkdirs
+from airflow.utils.state import State
+
+# The length of the longest UTF-8 encoded character, parts of logs are at least
+# this long so that reading them always moves past a whole character
+MIN_READ_LENGTH = 4
+
+
+def trim_partial_character(data):
+    """
+    Returns the UTF-8 encoded data without the bytes of the character it ends
+    in the middle of, if any, so that it can be decoded on its own.
+
+    :param data: UTF-8 encoded text
+    :type data: bytes
+    :rtype: bytes
+    """
+    tail = bytearray(data[-4:])
+    for i in range(1, len(tail) + 1):
+        byte = tail[-i]
+        # Continuation bytes are 10xxxxxx
+        if byte & 0xC0 == 0x80:
+            continue
+        if byte & 0x80 == 0:
+            char_length = 1
+        elif byte & 0xE0 == 0xC0:
+            char_length = 2
+        elif byte & 0xF0 == 0xE0:
+            char_length = 3
+        else:
+            char_length = 4
+        return data if char_length <= i else data[:-i]
+    return data
+
+
+def get_range_header(offset, length):
+    """
+    Returns the value of an HTTP Range header asking for length bytes from
+    offset, or for the rest of the content if length is None.
+    """
+    if length is None:
+        return 'bytes={}-'.format(offset)
+    return 'bytes={}-{}'.format(offset, offset + length - 1)
 
 
 class FileTaskHandler(logging.Handler):
@@ -112,13 +154,8 @@ class FileTaskHandler(logging.Handler):
             log += "*** Log file does not exist: {}\n".format(location)
             log += "*** Fetching from: {}\n".format(url)
             try:
-                timeout = None  # No timeout
-                try:
-                    timeout = conf.getint('webserver', 'log_fetch_timeout_sec')
-                except (AirflowConfigException, ValueError):
-                    pass
-
-                response = requests.get(url, timeout=timeout)
+                response = requests.get(
+                    url, timeout=self._get_log_fetch_timeout())
 
                 # Check if the resource was properly fetched
                 response.raise_for_status()
@@ -129,6 +166,132 @@ class FileTaskHandler(logging.Handler):
 
         return log
 
+    def _get_log_fetch_timeout(self):
+        try:
+            return conf.getint('webserver', 'log_fetch_timeout_sec')
+        except (AirflowConfigException, ValueError):
+            return None
+
+    def _read_range(self, ti, try_number, offset, length):
+        """
+        Template method that reads part of the log of a try, see read_range.
+
+        :param ti: task instance record
+        :param try_number: the try_number to read the log of
+        :param offset: the offset in bytes of the part to read
+        :param length: the maximum number of bytes to read, or None to read
+            the rest of the log
+        :return: a header describing where the log was read from, the part
+            of the log, and the size of the log, None if it is unknown
+        :rtype: tuple(unicode, bytes, int)
+        """
+        log_relative_path = self._render_filename(ti, try_number)
+        location = os.path.join(self.local_base, log_relative_path)
+
+        if os.path.exists(location):
+            header = "*** Reading local file: {}\n".format(location)
+            try:
+                with open(location, 'rb') as f:
+                    size = os.fstat(f.fileno()).st_size
+                    f.seek(offset)
+                    data = f.read() if length is None else f.read(length)
+                return header, data, size
+            except Exception as e:
+                header = "*** Failed to load local log file: {}\n".format(location)
+                header += "*** {}\n".format(str(e))
+                return header, b'', None
+
+        url = os.path.join(
+            "http://{ti.hostname}:{worker_log_server_port}/log", log_relative_path
+        ).format(
+            ti=ti,
+            worker_log_server_port=conf.get('celery', 'WORKER_LOG_SERVER_PORT')
+        )
+        header = "*** Log file does not exist: {}\n".format(location)
+        header += "*** Fetching from: {}\n".format(url)
+        try:
+            response = requests.get(
+                url, timeout=self._get_log_fetch_timeout(), stream=True,
+                headers={'Range': get_range_header(offset, length)})
+            try:
+                # The offset is past the end of the log
+                if response.status_code == 416:
+                    content_range = response.headers.get('Content-Range', '')
+                    size = content_range.rpartition('/')[2]
+                    return header, b'', int(size) if size.isdigit() else None
+
+                response.raise_for_status()
+
+                if response.status_code == 206:
+                    content_range = response.headers['Content-Range']
+                    return header, response.content, int(
+                        content_range.rpartition('/')[2])
+
+                # The worker sent the whole log, keep only the part asked for
+                chunks = []
+                position = 0
+                read = 0
+                for chunk in response.iter_content(chunk_size=65536):
+                    start = max(offset - position, 0)
+                    position += len(chunk)
+                    if start < len(chunk):
+                        chunks.append(chunk[start:])
+                        read += len(chunk) - start
+                    if length is not None and read >= length:
+                        break
+                data = b''.join(chunks)
+                if length is not None:
+                    data = data[:length]
+                size = response.headers.get('Content-Length')
+                return header, data, int(size) if size else None
+            finally:
+                response.close()
+        except Exception as e:
+            header += "*** Failed to fetch log file from worker. {}\n".format(str(e))
+            return header, b'', None
+
+    def read_range(self, task_instance, try_number, offset=0, length=None):
+        """
+        Reads part of the log of a try of the task instance, without reading
+        the rest of it, so that large logs can be shown page by page and
+        followed while they are written.
+
+        :param task_instance: task instance object
+        :param try_number: the try_number to read the log of
+        :param offset: the offset in bytes of the part to read
+        :param length: the maximum number of bytes to read, or None to read
+            the rest of the log. Lengths shorter than MIN_READ_LENGTH are
+            raised to it.
+        :return: the part of the log, and its metadata: a header describing
+            where the log was read from, the offset to read the next part
+            from, the size of the log (None if unknown), and whether the end
+            of the log was reached and no more will be written to it
+        :rtype: tuple(unicode, dict)
+        """
+        if try_number < 1:
+            header = 'Error fetching the logs. Try number {} is invalid.\n'.format(
+                try_number)
+            return '', {'header': header, 'offset': offset, 'size': None,
+                        'end_of_log': True}
+
+        if length is not None:
+            length = max(length, MIN_READ_LENGTH)
+        header, data, size = self._read_range(
+            task_instance, try_number, offset, length)
+        if size is None or offset + len(data) < size:
+            # The next part starts with the rest of the character
+            data = trim_partial_character(data)
+        next_offset = offset + len(data)
+        being_written = (task_instance.state == State.RUNNING and
+                         task_instance.try_number == try_number)
+        end_of_log = not being_written and (size is None or next_offset >= size)
+        return data.decode('utf-8', 'replace'), {
+            'header': header,
+            'offset': next_offset,
+            'size': size,
+            'end_of_log': end_of_log,
+        }
+
     def read(self, task_instance, try_number=None):
         """
         Read logs of given task instance from local machine.
@@ -26,6 +26,11 @@ class GCSTaskHandler(FileTaskHandler, LoggingMixin):
     uploads to and reads from GCS remote storage. Upon log reading
     failure, it reads from host machine's local disk.
     """
+
+    # The size in bytes of the chunks of the uploads of log files, a multiple
+    # of the 256KB GCS expects
+    UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
     def __init__(self, base_log_folder, gcs_log_folder, filename_template):
         super(GCSTaskHandler, self).__init__(base_log_folder, filename_template)
         self.remote_base = gcs_log_folder
@@ -81,10 +86,13 @@ class GCSTaskHandler(FileTaskHandler, LoggingMixin):
         local_loc = os.path.join(self.local_base, self.log_relative_path)
         remote_loc = os.path.join(self.remote_base, self.log_relative_path)
         if os.path.exists(local_loc):
-            # read log and remove old logs to get just the latest additions
-            with open(local_loc, 'r') as logfile:
-                log = logfile.read()
-            self.gcs_write(log, remote_loc)
+            if configuration.getboolean('core', 'REMOTE_LOG_CHUNKED_UPLOAD'):
+                self.gcs_write_file(local_loc, remote_loc)
+            else:
+                # read log and remove old logs to get just the latest additions
+                with open(local_loc, 'r') as logfile:
+                    log = logfile.read()
+                self.gcs_write(log, remote_loc)
 
         # Mark closed so we don't double write if close is called twice
         self.closed = True
@@ -114,6 +122,30 @@ class GCSTaskHandler(FileTaskHandler, LoggingMixin):
 
         return log
 
+    def _read_range(self, ti, try_number, offset, length):
+        """
+        Read part of the log of given task instance and try_number from GCS,
+        see FileTaskHandler.read_range. If failed, read it from the task
+        instance host machine.
+        """
+        remote_loc = os.path.join(
+            self.remote_base, self._render_filename(ti, try_number))
+        try:
+            bkt, blob = self.parse_gcs_url(remote_loc)
+            size = int(self.hook.get_size(bkt, blob))
+            data = b''
+            if offset < size and length != 0:
+                data = self.hook.download_range(bkt, blob, offset, length)
+            header = '*** Reading remote log from {}.\n'.format(remote_loc)
+            return header, data, size
+        except Exception as e:
+            header = '*** Unable to read remote log from {}\n*** {}\n\n'.format(
+                remote_loc, str(e))
+            self.log.error(header)
+            local_header, data, size = super(GCSTaskHandler, self)._read_range(
+                ti, try_number, offset, length)
+            return header + local_header, data, size
+
     def gcs_read(self, remote_log_location):
         """
         Returns the log found at the remote_log_location.
@@ -156,6 +188,37 @@ class GCSTaskHandler(FileTaskHandler, LoggingMixin):
         except Exception as e:
             self.log.error('Could not write logs to %s: %s', remote_log_location, e)
 
+    def gcs_write_file(self, local_log_location, remote_log_location,
+                       append=True):
+        """
+        Writes a local log file to the remote_log_location, streaming it from
+        disk in a resumable upload instead of reading it into memory. Fails
+        silently if no hook was created.
+        :param local_log_location: the location of the log file on disk
+        :type local_log_location: string (path)
+        :param remote_log_location: the log's location in remote storage
+        :type remote_log_location: string (path)
+        :param append: if False, any existing log file is overwritten. If True,
+            the file is uploaded next to any existing log and composed with
+            it, without downloading it.
+        :type append: bool
+        """
+        try:
+            bkt, blob = self.parse_gcs_url(remote_log_location)
+            if append and self.hook.exists(bkt, blob):
+                tmp_blob = blob + '.append'
+                self.hook.upload(bkt, tmp_blob, local_log_location,
+                                 chunk_size=self.UPLOAD_CHUNK_SIZE)
+                try:
+                    self.hook.compose(bkt, [blob, tmp_blob], blob)
+                finally:
+                    self.hook.delete(bkt, tmp_blob)
+            else:
+                self.hook.upload(bkt, blob, local_log_location,
+                                 chunk_size=self.UPLOAD_CHUNK_SIZE)
+        except Exception as e:
+            self.log.error('Could not write logs to %s: %s', remote_log_location, e)
+
     def parse_gcs_url(self, gsurl):
         """
         Given a Google Cloud Storage URL (gs://<bucket>/<blob>), returns a
@@ -76,10 +76,13 @@ class S3TaskHandler(FileTaskHandler, LoggingMixin):
         local_loc = os.path.join(self.local_base, self.log_relative_path)
         remote_loc = os.path.join(self.remote_base, self.log_relative_path)
         if os.path.exists(local_loc):
-            # read log and remove old logs to get just the latest additions
-            with open(local_loc, 'r') as logfile:
-                log = logfile.read()
-            self.s3_write(log, remote_loc)
+            if configuration.getboolean('core', 'REMOTE_LOG_CHUNKED_UPLOAD'):
+                self.s3_write_file(local_loc, remote_loc)
+            else:
+                # read log and remove old logs to get just the latest additions
+                with open(local_loc, 'r') as logfile:
+                    log = logfile.read()
+                self.s3_write(log, remote_loc)
 
         # Mark closed so we don't double write if close is called twice
         self.closed = True
@@ -109,6 +112,30 @@ class S3TaskHandler(FileTaskHandler, LoggingMixin):
 
         return log
 
+    def _read_range(self, ti, try_number, offset, length):
+        """
+        Read part of the log of given task instance and try_number from S3
+        remote storage, see FileTaskHandler.read_range. If the remote log
+        doesn't exist, read it from the task instance host machine.
+        """
+        remote_loc = os.path.join(
+            self.remote_base, self._render_filename(ti, try_number))
+        if not self.s3_log_exists(remote_loc):
+            return super(S3TaskHandler, self)._read_range(
+                ti, try_number, offset, length)
+
+        header = '*** Reading remote log from {}.\n'.format(remote_loc)
+        try:
+            size = self.hook.get_key(remote_loc).content_length
+            data = b''
+            if offset < size and length != 0:
+                data = self.hook.read_key_range(remote_loc, offset, length)
+            return header, data, size
+        except Exception:
+            msg = 'Could not read logs from {}'.format(remote_loc)
+            self.log.exception(msg)
+            return header + '*** {}\n'.format(msg), b'', None
+
     def s3_log_exists(self, remote_log_location):
         """
         Check if remote_log_location exists in remote storage
@@ -165,3 +192,29 @@ class S3TaskHandler(FileTaskHandler, LoggingMixin):
             )
         except:
             self.log.exception('Could not write logs to %s', remote_log_location)
+
+    def s3_write_file(self, local_log_location, remote_log_location,
+                      append=True):
+        """
+        Writes a local log file to the remote_log_location, streaming it from
+        disk instead of reading it into memory. Fails silently if no hook was
+        created.
+        :param local_log_location: the location of the log file on disk
+        :type local_log_location: string (path)
+        :param remote_log_location: the log's location in remote storage
+        :type remote_log_location: string (path)
+        :param append: if False, any existing log file is overwritten. If True,
+            the file is appended to any existing logs with a multipart upload,
+            without downloading them.
+        :type append: bool
+        """
+        encrypt = configuration.getboolean('core', 'ENCRYPT_S3_LOGS')
+        try:
+            if append:
+                self.hook.append_file(local_log_location, remote_log_location,
+                                      encrypt=encrypt)
+            else:
+                self.hook.load_file(local_log_location, remote_log_location,
+                                    replace=True, encrypt=encrypt)
+        except:
+            self.log.exception('Could not write logs to %s', remote_log_location)
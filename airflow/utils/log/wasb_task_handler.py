@@ -82,10 +82,13 @@ class WasbTaskHandler(FileTaskHandler, LoggingMixin):
         local_loc = os.path.join(self.local_base, self.log_relative_path)
         remote_loc = os.path.join(self.remote_base, self.log_relative_path)
         if os.path.exists(local_loc):
-            # read log and remove old logs to get just the latest additions
-            with open(local_loc, 'r') as logfile:
-                log = logfile.read()
-            self.wasb_write(log, remote_loc, append=True)
+            if configuration.getboolean('core', 'REMOTE_LOG_CHUNKED_UPLOAD'):
+                self.wasb_write_file(local_loc, remote_loc)
+            else:
+                # read log and remove old logs to get just the latest additions
+                with open(local_loc, 'r') as logfile:
+                    log = logfile.read()
+                self.wasb_write(log, remote_loc, append=True)
 
             if self.delete_local_copy:
                 shutil.rmtree(os.path.dirname(local_loc))
@@ -117,6 +120,31 @@ class WasbTaskHandler(FileTaskHandler, LoggingMixin):
 
         return log
 
+    def _read_range(self, ti, try_number, offset, length):
+        """
+        Read part of the log of given task instance and try_number from Wasb
+        remote storage, see FileTaskHandler.read_range. If the remote log
+        doesn't exist, read it from the task instance host machine.
+        """
+        remote_loc = os.path.join(
+            self.remote_base, self._render_filename(ti, try_number))
+        if not self.wasb_log_exists(remote_loc):
+            return super(WasbTaskHandler, self)._read_range(
+                ti, try_number, offset, length)
+
+        header = '*** Reading remote log from {}.\n'.format(remote_loc)
+        try:
+            size = self.hook.get_blob_size(self.wasb_container, remote_loc)
+            data = b''
+            if offset < size and length != 0:
+                data = self.hook.read_file_range(
+                    self.wasb_container, remote_loc, offset, length)
+            return header, data, size
+        except AzureHttpError:
+            msg = 'Could not read logs from {}'.format(remote_loc)
+            self.log.exception(msg)
+            return header + '*** {}\n'.format(msg), b'', None
+
     def wasb_log_exists(self, remote_log_location):
         """
         Check if remote_log_location exists in remote storage
@@ -173,3 +201,29 @@ class WasbTaskHandler(FileTaskHandler, LoggingMixin):
         except AzureHttpError:
             self.log.exception('Could not write logs to %s',
                                remote_log_location)
+
+    def wasb_write_file(self, local_log_location, remote_log_location,
+                        append=True):
+        """
+        Writes a local log file to the remote_log_location, streaming it from
+        disk in blocks instead of reading it into memory. Fails silently if no
+        hook was created.
+        :param local_log_location: the location of the log file on disk
+        :type local_log_location: string (path)
+        :param remote_log_location: the log's location in remote storage
+        :type remote_log_location: string (path)
+        :param append: if False, any existing log file is overwritten. If True,
+            the blocks of the file are committed after the ones of any
+            existing log, without downloading it.
+        :type append: bool
+        """
+        try:
+            if append:
+                self.hook.append_file(local_log_location, self.wasb_container,
+                                      remote_log_location)
+            else:
+                self.hook.load_file(local_log_location, self.wasb_container,
+                                    remote_log_location)
+        except AzureHttpError:
+            self.log.exception('Could not write logs to %s',
+                               remote_log_location)
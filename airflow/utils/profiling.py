@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+
+from airflow.settings import Stats
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+
+class PhaseTimer(LoggingMixin):
+    """
+    Measures how long the phases of a loop take. Every phase is sent to
+    statsd as a timer named ``<prefix>.<phase>`` and the durations of the
+    last loop can be logged as a single line.
+    """
+
+    def __init__(self, prefix):
+        """
+        :param prefix: the prefix of the names of the timers
+        :type prefix: unicode
+        """
+        self._prefix = prefix
+        # Map from phase to its duration in seconds in the current loop
+        self.durations = OrderedDict()
+
+    def reset(self):
+        """
+        Start a new loop.
+        """
+        self.durations = OrderedDict()
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Measure the code run within the context as the given phase.
+
+        :param name: the name of the phase
+        :type name: unicode
+        """
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            duration = time.time() - start_time
+            self.durations[name] = self.durations.get(name, 0.0) + duration
+            Stats.timing("{}.{}".format(self._prefix, name), duration * 1000)
+
+    def format(self):
+        """
+        :return: the durations of the phases of the current loop
+        :rtype: unicode
+        """
+        return ", ".join("{}={:.3f}s".format(name, duration)
+                         for name, duration in self.durations.items())
+
+
+class SamplingProfiler(LoggingMixin):
+    """
+    A profiler that samples the stack of a thread at a fixed interval from a
+    background thread. The samples are written in the folded format that
+    flame graph tools (e.g. flamegraph.pl or speedscope) read: one line per
+    distinct stack, frames separated by semicolons from the outermost one,
+    followed by the number of samples.
+    """
+
+    def __init__(self, output_file, interval=0.01):
+        """
+        :param output_file: the file to write the samples to
+        :type output_file: unicode
+        :param interval: seconds between two samples
+        :type interval: float
+        """
+        self._output_file = output_file
+        self._interval = interval
+        # Map from folded stack to number of samples
+        self._samples = defaultdict(int)
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._toggle_requested = False
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    @staticmethod
+    def _fold(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append("{} ({}:{})".format(
+                code.co_name, os.path.basename(code.co_filename), code.co_firstlineno))
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def _sample(self, thread_id):
+        while not self._stop_event.wait(self._interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                break
+            self._samples[self._fold(frame)] += 1
+
+    def start(self, thread_id=None):
+        """
+        Start sampling the given thread.
+
+        :param thread_id: the ident of the thread to sample, the calling
+        thread if not specified
+        :type thread_id: int
+        """
+        if self.running:
+            return
+        if thread_id is None:
+            thread_id = threading.current_thread().ident
+        self._samples = defaultdict(int)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._sample,
+                                        args=(thread_id,),
+                                        name="SamplingProfiler")
+        self._thread.daemon = True
+        self._thread.start()
+        self.log.info("Started profiling with a sample every %ss", self._interval)
+
+    def stop(self):
+        """
+        Stop sampling and write the samples to the output file.
+        """
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.dump()
+
+    def toggle(self):
+        """
+        Start the profiler if it's stopped, stop it otherwise.
+        """
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def request_toggle(self, *args):
+        """
+        Ask for the profiler to be toggled by the next call to
+        handle_requests. The arguments are ignored so that this can be used
+        as a signal handler, which must not join threads or write files.
+        """
+        self._toggle_requested = True
+
+    def handle_requests(self):
+        """
+        Toggle the profiler if it was requested since the last call.
+        """
+        if self._toggle_requested:
+            self._toggle_requested = False
+            self.toggle()
+
+    def dump(self):
+        """
+        Write the samples collected so far to the output file.
+        """
+        directory = os.path.dirname(self._output_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self._output_file, 'w') as f:
+            for stack, count in sorted(self._samples.items()):
+                f.write("{} {}\n".format(stack, count))
+        self.log.info("Wrote %s profiler samples to %s",
+                      sum(self._samples.values()), self._output_file)
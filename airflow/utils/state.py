@@ -38,6 +38,7 @@ class State(object):
     SHUTDOWN = "shutdown"  # External request to shut down
     FAILED = "failed"
     UP_FOR_RETRY = "up_for_retry"
+    UP_FOR_RESCHEDULE = "up_for_reschedule"
     UPSTREAM_FAILED = "upstream_failed"
     SKIPPED = "skipped"
 
@@ -47,6 +48,7 @@ class State(object):
         FAILED,
         UPSTREAM_FAILED,
         UP_FOR_RETRY,
+        UP_FOR_RESCHEDULE,
         QUEUED,
         NONE,
         SCHEDULED,
@@ -65,6 +67,7 @@ class State(object):
         SHUTDOWN: 'blue',
         FAILED: 'red',
         UP_FOR_RETRY: 'gold',
+        UP_FOR_RESCHEDULE: 'turquoise',
         UPSTREAM_FAILED: 'orange',
         SKIPPED: 'pink',
         REMOVED: 'lightgrey',
@@ -112,5 +115,6 @@ class State(object):
             cls.SCHEDULED,
             cls.QUEUED,
             cls.RUNNING,
-            cls.UP_FOR_RETRY
+            cls.UP_FOR_RETRY,
+            cls.UP_FOR_RESCHEDULE,
         ]
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Writes the Log rows of the actions of the users of the webserver to the
+database in batches from a background thread, instead of committing one row
+before every view is rendered.
+"""
+import atexit
+import os
+import threading
+import time
+from queue import Empty, Full, Queue
+
+from airflow.utils.db import create_session
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+
+class ActionLogWriter(LoggingMixin):
+    """
+    Queues Log rows and inserts them every `flush_interval` seconds. When the
+    queue is full, the rows are written right away so that none are lost. The
+    rows still queued are written when the process exits.
+
+    The thread is started by the first write of every process, so that each
+    webserver worker forked from the master has its own.
+
+    :param flush_interval: the number of seconds between two writes of the
+        queued rows, 0 to write every row right away
+    :type flush_interval: float
+    :param max_queue_size: the maximum number of rows to queue
+    :type max_queue_size: int
+    """
+    def __init__(self, flush_interval, max_queue_size):
+        self.flush_interval = flush_interval
+        self.max_queue_size = max(max_queue_size, 1)
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = Queue(maxsize=self.max_queue_size)
+            thread = threading.Thread(target=self._run,
+                                      name='ActionLogWriter')
+            thread.daemon = True
+            thread.start()
+            if self._pid is None:
+                atexit.register(self.flush)
+            self._pid = os.getpid()
+
+    def write(self, log):
+        """
+        Queues a Log row to be inserted.
+
+        :param log: the row to insert
+        :type log: Log
+        """
+        if self.flush_interval <= 0:
+            with create_session() as session:
+                session.add(log)
+                session.commit()
+            return
+
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(log)
+        except Full:
+            self.log.debug("The action log queue is full, writing right away")
+            self._insert([log])
+
+    def flush(self):
+        """
+        Inserts the queued Log rows.
+        """
+        if self._queue is None or self._pid != os.getpid():
+            return
+        logs = []
+        while True:
+            try:
+                logs.append(self._queue.get_nowait())
+            except Empty:
+                break
+        if logs:
+            self._insert(logs)
+
+    def _insert(self, logs):
+        try:
+            with create_session() as session:
+                session.add_all(logs)
+                session.commit()
+        except Exception:
+            self.log.exception("Failed to write %s action logs", len(logs))
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Builds the data of the tree view in a compact form: a flat list of the tasks,
+the list of the edges between them and, for every DAG run shown, the columns
+of the states of the task instances of the run. The tree itself is unfolded by
+the browser, which only unfolds the repeated branches when they are expanded.
+
+The tasks and edges of a DAG are kept until the DAG changes, and the column of
+a run until one of its task instances changes, so that a page shows new runs
+and changed task instances without reading the others again.
+"""
+from collections import OrderedDict
+from threading import Lock
+
+from sqlalchemy import func
+
+from airflow import models
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+# The attributes of the task instances in the columns of the runs
+INSTANCE_FIELDS = ['state', 'start_date', 'end_date', 'duration']
+
+
+def _isoformat(dttm):
+    return dttm.isoformat() if dttm else None
+
+
+class TreeData(object):
+    """
+    The tree view data of a DAG, see TreeDataCache.
+
+    :param dag: the DAG
+    :type dag: DAG
+    """
+    def __init__(self, dag):
+        self.version = dag.last_loaded
+        tasks = dag.tasks
+        self.task_index = {task.task_id: i for i, task in enumerate(tasks)}
+        self.nodes = [{
+            'name': task.task_id,
+            'operator': task.task_type,
+            'retries': task.retries,
+            'owner': task.owner,
+            'start_date': _isoformat(task.start_date),
+            'end_date': _isoformat(task.end_date),
+            'depends_on_past': task.depends_on_past,
+            'ui_color': task.ui_color,
+        } for task in tasks]
+        # Pairs of the positions of an upstream task and of its downstream task
+        self.edges = [
+            [self.task_index[upstream_task_id], i]
+            for i, task in enumerate(tasks)
+            for upstream_task_id in sorted(task.upstream_task_ids)
+            if upstream_task_id in self.task_index]
+        # Map from execution date to (signature, column) of the runs
+        self.columns = {}
+
+    def build_column(self, rows):
+        """
+        Returns the column of a run out of the rows of its task instances.
+        """
+        num_tasks = len(self.nodes)
+        column = {field: [None] * num_tasks for field in INSTANCE_FIELDS}
+        column['present'] = [0] * num_tasks
+        for task_id, state, start_date, end_date, duration in rows:
+            i = self.task_index.get(task_id)
+            if i is None:
+                continue
+            column['present'][i] = 1
+            column['state'][i] = state
+            column['start_date'][i] = _isoformat(start_date)
+            column['end_date'][i] = _isoformat(end_date)
+            column['duration'][i] = duration
+        return column
+
+
+class TreeDataCache(LoggingMixin):
+    """
+    Keeps the tree view data of the most recently shown DAGs.
+
+    :param size: the maximum number of DAGs to keep the data of
+    :type size: int
+    """
+    def __init__(self, size):
+        self.size = max(size, 1)
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def _get_tree_data(self, key, dag):
+        with self._lock:
+            tree_data = self._entries.pop(key, None)
+            if tree_data is None or tree_data.version != dag.last_loaded:
+                tree_data = TreeData(dag)
+            self._entries[key] = tree_data
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return tree_data
+
+    def get_payload(self, dag, dag_runs, root=None, session=None):
+        """
+        Returns the tree view data of the DAG for its given runs.
+
+        :param dag: the DAG, or the part of it the view shows
+        :type dag: DAG
+        :param dag_runs: the runs to show, sorted by execution date
+        :type dag_runs: list(DagRun)
+        :param root: the regex the part of the DAG was selected with
+        :type root: unicode
+        :rtype: dict
+        """
+        tree_data = self._get_tree_data((dag.dag_id, root), dag)
+        dates = [dr.execution_date for dr in dag_runs]
+        signatures = self._get_signatures(dag, dates, session)
+
+        columns = {}
+        outdated = []
+        for execution_date in dates:
+            signature = signatures.get(execution_date)
+            cached = tree_data.columns.get(execution_date)
+            if cached and cached[0] == signature:
+                columns[execution_date] = cached
+            else:
+                outdated.append(execution_date)
+
+        if outdated:
+            self.log.debug("Reading %s runs of %s for the tree view",
+                           len(outdated), dag.dag_id)
+            TI = models.TaskInstance
+            rows = {execution_date: [] for execution_date in outdated}
+            qry = session.query(
+                TI.execution_date, TI.task_id, TI.state, TI.start_date,
+                TI.end_date, TI.duration,
+            ).filter(
+                TI.dag_id == dag.dag_id,
+                TI.execution_date.in_(outdated),
+            )
+            for row in qry:
+                rows[row[0]].append(row[1:])
+            for execution_date in outdated:
+                columns[execution_date] = (
+                    signatures.get(execution_date),
+                    tree_data.build_column(rows[execution_date]))
+        # Only keep the columns of the runs shown last
+        tree_data.columns = columns
+
+        return {
+            'nodes': tree_data.nodes,
+            'edges': tree_data.edges,
+            'dag_runs': [{
+                'id': dr.id,
+                'run_id': dr.run_id,
+                'execution_date': dr.execution_date.isoformat(),
+                'state': dr.state,
+                'start_date': _isoformat(dr.start_date),
+                'end_date': _isoformat(dr.end_date),
+                'external_trigger': dr.external_trigger,
+            } for dr in dag_runs],
+            'instances': [columns[execution_date][1]
+                          for execution_date in dates],
+        }
+
+    @staticmethod
+    def _get_signatures(dag, dates, session):
+        """
+        Returns a value for each run that changes when one of its task
+        instances does: the number of its task instances in every state,
+        and their last start and end dates.
+        """
+        if not dates:
+            return {}
+        TI = models.TaskInstance
+        qry = session.query(
+            TI.execution_date, TI.state, func.count(),
+            func.max(TI.start_date), func.max(TI.end_date),
+        ).filter(
+            TI.dag_id == dag.dag_id,
+            TI.execution_date >= dates[0],
+            TI.execution_date <= dates[-1],
+        ).group_by(TI.execution_date, TI.state)
+
+        signatures = {}
+        for execution_date, state, count, start_date, end_date in qry:
+            signatures.setdefault(execution_date, []).append(
+                (state or '', count, start_date, end_date))
+        return {execution_date: sorted(signature)
+                for execution_date, signature in signatures.items()}
@@ -32,12 +32,15 @@ import wtforms
 from wtforms.compat import text_type
 
 from airflow import configuration, models, settings
-from airflow.utils.db import create_session
 from airflow.utils import timezone
 from airflow.utils.json import AirflowJsonEncoder
+from airflow.www.action_log import ActionLogWriter
 
 AUTHENTICATE = configuration.getboolean('webserver', 'AUTHENTICATE')
 
+# The writer of the Log rows of the user actions, see get_action_log_writer
+_action_log_writer = None
+
 DEFAULT_SENSITIVE_VARIABLE_FIELDS = (
     'password',
     'secret',
@@ -235,6 +238,20 @@ def epoch(dttm):
     return int(time.mktime(dttm.timetuple())) * 1000,
 
 
+def get_action_log_writer():
+    """
+    Returns the writer of the Log rows of the user actions of this process.
+    """
+    global _action_log_writer
+    if _action_log_writer is None:
+        _action_log_writer = ActionLogWriter(
+            flush_interval=configuration.getfloat(
+                'webserver', 'action_log_flush_interval'),
+            max_queue_size=configuration.getint(
+                'webserver', 'action_log_queue_size'))
+    return _action_log_writer
+
+
 def action_logging(f):
     '''
     Decorator to log user actions
@@ -257,15 +274,23 @@ def action_logging(f):
         if 'execution_date' in request.args:
             log.execution_date = timezone.parse(request.args.get('execution_date'))
 
-        with create_session() as session:
-            session.add(log)
-            session.commit()
+        get_action_log_writer().write(log)
 
         return f(*args, **kwargs)
 
     return wrapper
 
 
+def read_only_action_logging(f):
+    '''
+    Decorator to log user actions that only read, unless the logging of
+    read-only views is turned off
+    '''
+    if not configuration.getboolean('webserver', 'log_read_only_views'):
+        return f
+    return action_logging(f)
+
+
 def notify_owner(f):
     '''
     Decorator to notify owner of actions taken on their DAGs by others
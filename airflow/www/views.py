@@ -68,6 +68,7 @@ from airflow import configuration as conf
 from airflow import models
 from airflow import settings
 from airflow.api.common.experimental.mark_tasks import set_dag_run_state
+from airflow.dag.serialization import SerializedDagBag
 from airflow.exceptions import AirflowException
 from airflow.settings import Session
 from airflow.models import XCom, DagRun
@@ -77,14 +78,15 @@ from airflow.models import BaseOperator
 from airflow.operators.subdag_operator import SubDagOperator
 
 from airflow.utils import timezone
-from airflow.utils.json import json_ser
 from airflow.utils.state import State
 from airflow.utils.db import create_session, provide_session
 from airflow.utils.helpers import alchemy_to_dict
+from airflow.utils.log.file_task_handler import MIN_READ_LENGTH
 from airflow.utils.dates import infer_time_unit, scale_time_units, parse_execution_date
 from airflow.utils.timezone import datetime
 from airflow.utils.net import get_hostname
 from airflow.www import utils as wwwutils
+from airflow.www.tree_data import TreeDataCache
 from airflow.www.forms import DateTimeForm, DateTimeWithNumRunsForm
 from airflow.www.validators import GreaterEqualThan
 
@@ -93,7 +95,17 @@ CHART_LIMIT = 200000
 
 UTF8_READER = codecs.getreader('utf-8')
 
-dagbag = models.DagBag(settings.DAGS_FOLDER)
+# Whether the DAGs are read from the database, where the scheduler stores
+# them, instead of importing the DAG files
+STORE_SERIALIZED_DAGS = conf.getboolean('core', 'store_serialized_dags')
+
+if STORE_SERIALIZED_DAGS:
+    dagbag = SerializedDagBag()
+else:
+    dagbag = models.DagBag(settings.DAGS_FOLDER)
+
+tree_data_cache = TreeDataCache(
+    conf.getint('webserver', 'tree_view_cache_size'))
 
 login_required = airflow.login.login_required
 current_user = airflow.login.current_user
@@ -102,6 +114,7 @@ logout_user = airflow.login.logout_user
 FILTER_BY_OWNER = False
 
 PAGE_SIZE = conf.getint('webserver', 'page_size')
+LOG_CHUNK_SIZE = conf.getint('webserver', 'log_chunk_size')
 
 if conf.getboolean('webserver', 'FILTER_BY_OWNER'):
     # filter_by_owner if authentication is enabled and filter_by_owner is true
@@ -250,8 +263,10 @@ attr_renderer = {
     'doc_rst': lambda x: render(x, lexers.RstLexer),
     'doc_yaml': lambda x: render(x, lexers.YamlLexer),
     'doc_md': wrapped_markdown,
+    # Serialized DAGs keep the source code of their callables
     'python_callable': lambda x: render(
-        inspect.getsource(x), lexers.PythonLexer),
+        x if isinstance(x, basestring) else inspect.getsource(x),
+        lexers.PythonLexer),
 }
 
 
@@ -292,7 +307,8 @@ def recurse_tasks(tasks, task_ids, dag_ids, task_id_to_dag):
         for task in tasks:
             recurse_tasks(task, task_ids, dag_ids, task_id_to_dag)
         return
-    if isinstance(tasks, SubDagOperator):
+    if (isinstance(tasks, SubDagOperator) or
+            tasks.task_type == 'SubDagOperator'):
         subtasks = tasks.subdag.tasks
         dag_ids.append(tasks.subdag.dag_id)
         for subtask in subtasks:
@@ -304,6 +320,37 @@ def recurse_tasks(tasks, task_ids, dag_ids, task_id_to_dag):
         task_id_to_dag[tasks.task_id] = tasks.dag
 
 
+@provide_session
+def get_listed_dags(session=None):
+    """
+    Returns the DAGs the DAG and task statistics are computed for: the DAGs
+    of the DagBag, or the active root DAGs when the DAGs are read from the
+    database, so that they don't all have to be read.
+    """
+    if STORE_SERIALIZED_DAGS:
+        DM = models.DagModel
+        return session.query(DM).filter(~DM.is_subdag, DM.is_active).all()
+    return list(dagbag.dags.values())
+
+
+def get_int_arg(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def get_task_log_reader():
+    """
+    Returns the handler of the task logger that reads the task logs, see
+    [core] task_log_reader.
+    """
+    logger = logging.getLogger('airflow.task')
+    task_log_reader = conf.get('core', 'task_log_reader')
+    return next((handler for handler in logger.handlers
+                 if handler.name == task_log_reader), None)
+
+
 def get_chart_height(dag):
     """
     TODO(aoen): See [AIRFLOW-1263] We use the number of tasks in the DAG as a heuristic to
@@ -504,9 +551,10 @@ class Airflow(BaseView):
     @provide_session
     def dag_stats(self, session=None):
         ds = models.DagStat
+        dags = get_listed_dags(session=session)
 
         ds.update(
-            dag_ids=[dag.dag_id for dag in dagbag.dags.values() if not dag.is_subdag]
+            dag_ids=[dag.dag_id for dag in dags if not dag.is_subdag]
         )
 
         qry = (
@@ -520,7 +568,7 @@ class Airflow(BaseView):
             data[dag_id][state] = count
 
         payload = {}
-        for dag in dagbag.dags.values():
+        for dag in dags:
             payload[dag.safe_dag_id] = []
             for state in State.dag_states:
                 try:
@@ -591,7 +639,7 @@ class Airflow(BaseView):
         session.commit()
 
         payload = {}
-        for dag in dagbag.dags.values():
+        for dag in get_listed_dags(session=session):
             payload[dag.safe_dag_id] = []
             for state in State.task_states:
                 try:
@@ -614,8 +662,16 @@ class Airflow(BaseView):
         dag = dagbag.get_dag(dag_id)
         title = dag_id
         try:
-            with open(dag.fileloc, 'r') as f:
-                code = f.read()
+            if STORE_SERIALIZED_DAGS:
+                # The webserver may not have the DAG files, the scheduler
+                # stored their source with the DAGs
+                code = models.SerializedDagModel.get_source_code(dag.fileloc)
+                if code is None:
+                    raise IOError(
+                        'The source code of {} is not stored'.format(dag.fileloc))
+            else:
+                with open(dag.fileloc, 'r') as f:
+                    code = f.read()
             html_code = highlight(
                 code, lexers.PythonLexer(), HtmlFormatter(linenos=True))
         except IOError as e:
@@ -668,8 +724,8 @@ class Airflow(BaseView):
     def pickle_info(self):
         d = {}
         dag_id = request.args.get('dag_id')
-        dags = [dagbag.dags.get(dag_id)] if dag_id else dagbag.dags.values()
-        for dag in dags:
+        dag_ids = [dag_id] if dag_id else dagbag.dag_ids
+        for dag in (dagbag.get_dag(dag_id) for dag_id in dag_ids):
             if not dag.is_subdag:
                 d[dag.dag_id] = dag.pickle_info()
         return wwwutils.json_response(d)
@@ -686,7 +742,7 @@ class Airflow(BaseView):
 
     @expose('/rendered')
     @login_required
-    @wwwutils.action_logging
+    @wwwutils.read_only_action_logging
     def rendered(self):
         dag_id = request.args.get('dag_id')
         task_id = request.args.get('task_id')
@@ -702,7 +758,7 @@ class Airflow(BaseView):
             flash("Error rendering template: " + str(e), "error")
         title = "Rendered Template"
         html_dict = {}
-        for template_field in task.__class__.template_fields:
+        for template_field in task.template_fields:
             content = getattr(task, template_field)
             if template_field in attr_renderer:
                 html_dict[template_field] = attr_renderer[template_field](content)
@@ -721,7 +777,7 @@ class Airflow(BaseView):
 
     @expose('/log')
     @login_required
-    @wwwutils.action_logging
+    @wwwutils.read_only_action_logging
     @provide_session
     def log(self, session=None):
         dag_id = request.args.get('dag_id')
@@ -734,19 +790,28 @@ class Airflow(BaseView):
             models.TaskInstance.dag_id == dag_id,
             models.TaskInstance.task_id == task_id,
             models.TaskInstance.execution_date == dttm).first()
+        # The metadata of the first page of the log of every try, the next
+        # pages are read through get_log_range
+        metadatas = []
         if ti is None:
             logs = ["*** Task instance did not exist in the DB\n"]
         else:
-            logger = logging.getLogger('airflow.task')
-            task_log_reader = conf.get('core', 'task_log_reader')
-            handler = next((handler for handler in logger.handlers
-                            if handler.name == task_log_reader), None)
+            handler = get_task_log_reader()
             try:
                 ti.task = dag.get_task(ti.task_id)
-                logs = handler.read(ti)
+                if hasattr(handler, 'read_range'):
+                    logs = []
+                    for try_number in range(1, ti.next_try_number):
+                        log, metadata = handler.read_range(
+                            ti, try_number, offset=0, length=LOG_CHUNK_SIZE)
+                        logs.append(log)
+                        metadatas.append(metadata)
+                else:
+                    logs = handler.read(ti)
             except AttributeError as e:
                 logs = ["Task log handler {} does not support read logs.\n{}\n" \
-                            .format(task_log_reader, str(e))]
+                            .format(conf.get('core', 'task_log_reader'), str(e))]
+                metadatas = []
 
         for i, log in enumerate(logs):
             if PY2 and not isinstance(log, unicode):
@@ -754,12 +819,55 @@ class Airflow(BaseView):
 
         return self.render(
             'airflow/ti_log.html',
-            logs=logs, dag=dag, title="Log by attempts", task_id=task_id,
-            execution_date=execution_date, form=form)
+            logs=logs, metadatas=metadatas, dag=dag, title="Log by attempts",
+            dag_id=dag_id, task_id=task_id, execution_date=execution_date,
+            form=form, log_chunk_size=LOG_CHUNK_SIZE)
+
+    @expose('/get_log_range')
+    @login_required
+    @provide_session
+    def get_log_range(self, session=None):
+        """
+        Returns a part of the log of a try of a task instance, of at most
+        [webserver] log_chunk_size bytes from the given offset, with the
+        offset of the next part.
+        """
+        dag_id = request.args.get('dag_id')
+        task_id = request.args.get('task_id')
+        execution_date = pendulum.parse(request.args.get('execution_date'))
+        try_number = get_int_arg(request.args.get('try_number'), default=1)
+        offset = max(get_int_arg(request.args.get('offset'), default=0), 0)
+        length = get_int_arg(request.args.get('length'), default=LOG_CHUNK_SIZE)
+        length = min(max(length, MIN_READ_LENGTH), LOG_CHUNK_SIZE)
+
+        ti = session.query(models.TaskInstance).filter(
+            models.TaskInstance.dag_id == dag_id,
+            models.TaskInstance.task_id == task_id,
+            models.TaskInstance.execution_date == execution_date).first()
+        handler = get_task_log_reader()
+        if ti is None or not hasattr(handler, 'read_range'):
+            return wwwutils.json_response({
+                'data': '',
+                'header': "*** Task instance did not exist in the DB\n"
+                          if ti is None else
+                          "*** Task log handler does not support reading "
+                          "parts of logs\n",
+                'offset': offset,
+                'size': None,
+                'end_of_log': True,
+            })
+
+        dag = dagbag.get_dag(dag_id)
+        if dag and dag.has_task(task_id):
+            ti.task = dag.get_task(task_id)
+        data, metadata = handler.read_range(
+            ti, try_number, offset=offset, length=length)
+        metadata['data'] = data
+        return wwwutils.json_response(metadata)
 
     @expose('/task')
     @login_required
-    @wwwutils.action_logging
+    @wwwutils.read_only_action_logging
     def task(self):
         TI = models.TaskInstance
 
@@ -839,7 +947,7 @@ class Airflow(BaseView):
 
     @expose('/xcom')
     @login_required
-    @wwwutils.action_logging
+    @wwwutils.read_only_action_logging
     @provide_session
     def xcom(self, session=None):
         dag_id = request.args.get('dag_id')
@@ -1063,8 +1171,12 @@ class Airflow(BaseView):
         payload = []
         for dag_id, active_dag_runs in dags:
             max_active_runs = 0
-            if dag_id in dagbag.dags:
-                max_active_runs = dagbag.dags[dag_id].max_active_runs
+            if STORE_SERIALIZED_DAGS:
+                dag = dagbag.get_dag(dag_id)
+            else:
+                dag = dagbag.dags.get(dag_id)
+            if dag:
+                max_active_runs = dag.max_active_runs
             payload.append({
                 'dag_id': dag_id,
                 'active_dag_run': active_dag_runs,
@@ -1166,7 +1278,7 @@ class Airflow(BaseView):
     @expose('/tree')
     @login_required
     @wwwutils.gzipped
-    @wwwutils.action_logging
+    @wwwutils.read_only_action_logging
     @provide_session
     def tree(self, session=None):
         dag_id = request.args.get('dag_id')
@@ -1198,82 +1310,16 @@ class Airflow(BaseView):
                 DR.dag_id == dag.dag_id,
                 DR.execution_date <= base_date,
                 DR.execution_date >= min_date)
+                .order_by(DR.execution_date)
                 .all()
         )
-        dag_runs = {
-            dr.execution_date: alchemy_to_dict(dr) for dr in dag_runs}
-
-        dates = sorted(list(dag_runs.keys()))
-        max_date = max(dates) if dates else None
-
-        tis = dag.get_task_instances(
-            session, start_date=min_date, end_date=base_date)
-        task_instances = {}
-        for ti in tis:
-            tid = alchemy_to_dict(ti)
-            dr = dag_runs.get(ti.execution_date)
-            tid['external_trigger'] = dr['external_trigger'] if dr else False
-            task_instances[(ti.task_id, ti.execution_date)] = tid
-
-        expanded = []
-        # The default recursion traces every path so that tree view has full
-        # expand/collapse functionality. After 5,000 nodes we stop and fall
-        # back on a quick DFS search for performance. See PR #320.
-        node_count = [0]
-        node_limit = 5000 / max(1, len(dag.roots))
-
-        def recurse_nodes(task, visited):
-            visited.add(task)
-            node_count[0] += 1
-
-            children = [
-                recurse_nodes(t, visited) for t in task.upstream_list
-                if node_count[0] < node_limit or t not in visited]
-
-            # D3 tree uses children vs _children to define what is
-            # expanded or not. The following block makes it such that
-            # repeated nodes are collapsed by default.
-            children_key = 'children'
-            if task.task_id not in expanded:
-                expanded.append(task.task_id)
-            elif children:
-                children_key = "_children"
-
-            def set_duration(tid):
-                if (isinstance(tid, dict) and tid.get("state") == State.RUNNING and
-                            tid["start_date"] is not None):
-                    d = timezone.utcnow() - pendulum.parse(tid["start_date"])
-                    tid["duration"] = d.total_seconds()
-                return tid
-
-            return {
-                'name': task.task_id,
-                'instances': [
-                    set_duration(task_instances.get((task.task_id, d))) or {
-                        'execution_date': d.isoformat(),
-                        'task_id': task.task_id
-                    }
-                    for d in dates],
-                children_key: children,
-                'num_dep': len(task.upstream_list),
-                'operator': task.task_type,
-                'retries': task.retries,
-                'owner': task.owner,
-                'start_date': task.start_date,
-                'end_date': task.end_date,
-                'depends_on_past': task.depends_on_past,
-                'ui_color': task.ui_color,
-            }
+        max_date = dag_runs[-1].execution_date if dag_runs else None
 
-        data = {
-            'name': '[DAG]',
-            'children': [recurse_nodes(t, set()) for t in dag.roots],
-            'instances': [
-                dag_runs.get(d) or {'execution_date': d.isoformat()}
-                for d in dates],
-        }
-
-        data = json.dumps(data, indent=4, default=json_ser)
+        # The browser unfolds the tree out of the tasks and their edges, see
+        # airflow.www.tree_data
+        data = tree_data_cache.get_payload(
+            dag, dag_runs, root=root, session=session)
+        data = json.dumps(data)
         session.commit()
 
         form = DateTimeWithNumRunsForm(data={'base_date': max_date,
@@ -1291,13 +1337,13 @@ class Airflow(BaseView):
     @expose('/graph')
     @login_required
     @wwwutils.gzipped
-    @wwwutils.action_logging
+    @wwwutils.read_only_action_logging
     @provide_session
     def graph(self, session=None):
         dag_id = request.args.get('dag_id')
         blur = conf.getboolean('webserver', 'demo_mode')
         dag = dagbag.get_dag(dag_id)
-        if dag_id not in dagbag.dags:
+        if not dag:
             flash('DAG "{0}" seems to be missing.'.format(dag_id), "error")
             return redirect('/admin/')
 
@@ -1403,7 +1449,7 @@ class Airflow(BaseView):
 
     @expose('/duration')
     @login_required
-    @wwwutils.action_logging
+    @wwwutils.read_only_action_logging
     @provide_session
     def duration(self, session=None):
         dag_id = request.args.get('dag_id')
@@ -1510,7 +1556,7 @@ class Airflow(BaseView):
 
     @expose('/tries')
     @login_required
-    @wwwutils.action_logging
+    @wwwutils.read_only_action_logging
     @provide_session
     def tries(self, session=None):
         dag_id = request.args.get('dag_id')
@@ -1573,7 +1619,7 @@ class Airflow(BaseView):
 
     @expose('/landing_times')
     @login_required
-    @wwwutils.action_logging
+    @wwwutils.read_only_action_logging
     @provide_session
     def landing_times(self, session=None):
         dag_id = request.args.get('dag_id')
@@ -1694,7 +1740,7 @@ class Airflow(BaseView):
 
     @expose('/gantt')
     @login_required
-    @wwwutils.action_logging
+    @wwwutils.read_only_action_logging
     @provide_session
     def gantt(self, session=None):
         dag_id = request.args.get('dag_id')
@@ -1757,7 +1803,7 @@ class Airflow(BaseView):
 
     @expose('/object/task_instances')
     @login_required
-    @wwwutils.action_logging
+    @wwwutils.read_only_action_logging
     @provide_session
     def task_instances(self, session=None):
         dag_id = request.args.get('dag_id')
@@ -1828,12 +1874,6 @@ class HomeView(AdminIndexView):
                                                       'hide_paused_dags_by_default')
         show_paused_arg = request.args.get('showPaused', 'None')
 
-        def get_int_arg(value, default=0):
-            try:
-                return int(value)
-            except ValueError:
-                return default
-
         arg_current_page = request.args.get('page', '0')
         arg_search_query = request.args.get('search', None)
 
@@ -1882,7 +1922,11 @@ class HomeView(AdminIndexView):
 
         # get a list of all non-subdag dags visible to everyone
         # optionally filter out "paused" dags
-        if hide_paused:
+        if STORE_SERIALIZED_DAGS:
+            # Only the DAGs of the page are read from the database, see below,
+            # the orm_dags are filtered the same way
+            unfiltered_webserver_dags = []
+        elif hide_paused:
             unfiltered_webserver_dags = [dag for dag in dagbag.dags.values() if
                                          not dag.parent_dag and not dag.is_paused]
 
@@ -1938,6 +1982,12 @@ class HomeView(AdminIndexView):
         page_dag_ids = sorted_dag_ids[start:end]
         num_of_pages = int(math.ceil(num_of_all_dags / float(dags_per_page)))
 
+        if STORE_SERIALIZED_DAGS:
+            for dag_id in page_dag_ids:
+                dag = dagbag.get_dag(dag_id)
+                if dag:
+                    webserver_dags_filtered[dag_id] = dag
+
         auto_complete_data = set()
         for dag in webserver_dags_filtered.values():
             auto_complete_data.add(dag.dag_id)
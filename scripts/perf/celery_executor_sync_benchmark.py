@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures how long it takes to fetch the states of many running celery tasks
+one task at a time, like CeleryExecutor.sync used to, and in bulk with
+fetch_celery_task_state. The result backend is an in-memory cache backend
+that waits a fixed latency on every call to simulate the round trip to a
+remote backend.
+
+To Run:
+    $ python scripts/perf/celery_executor_sync_benchmark.py [num_tasks] [latency_ms]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from celery import Celery
+from celery import states as celery_states
+
+from airflow.executors.celery_executor import fetch_celery_task_state
+
+
+class LatencyClient(object):
+    """
+    Wraps a cache client, waiting a fixed latency and counting every call.
+    """
+    def __init__(self, client, latency):
+        self.client = client
+        self.latency = latency
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        time.sleep(self.latency)
+        return self.client.get(key)
+
+    def get_multi(self, keys):
+        self.calls += 1
+        time.sleep(self.latency)
+        return self.client.get_multi(keys)
+
+
+def main():
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0005
+
+    app = Celery('celery_executor_sync_benchmark', backend='cache+memory://')
+    backend = app.backend
+    task_ids = ['task_{}'.format(i) for i in range(num_tasks)]
+    # A tenth of the tasks finished since the last sync
+    for task_id in task_ids[::10]:
+        backend.store_result(task_id, None, celery_states.SUCCESS)
+    async_results = [app.AsyncResult(task_id) for task_id in task_ids]
+
+    client = LatencyClient(backend.client, latency)
+    backend.client = client
+
+    start = time.time()
+    states = {async_result.task_id: async_result.state
+              for async_result in async_results}
+    print('Per task: fetched {} states in {:.3f}s with {} backend calls'.format(
+        len(states), time.time() - start, client.calls))
+
+    client.calls = 0
+    start = time.time()
+    states = fetch_celery_task_state(async_results)
+    print('Bulk: fetched {} states in {:.3f}s with {} backend calls'.format(
+        len(states), time.time() - start, client.calls))
+
+
+if __name__ == "__main__":
+    main()
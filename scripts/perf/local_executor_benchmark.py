@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures how many tasks per second the LocalExecutor runs, with its workers
+starting every task through a Bash shell and with its workers forking the
+tasks, see local_executor_fork_tasks. The tasks are DummyOperators so that
+the measurement is dominated by the overhead of starting tasks.
+
+To Run:
+    $ python scripts/perf/local_executor_benchmark.py [num_tasks] [parallelism]
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from airflow import configuration, settings
+from airflow.executors.local_executor import LocalExecutor
+from airflow.models import DagBag, TaskInstance
+from airflow.utils import timezone
+
+DAG_ID = 'perf_local_executor'
+EXECUTION_DATE = timezone.datetime(2018, 1, 1)
+DAG_FILE = """
+from datetime import datetime
+
+from airflow.models import DAG
+from airflow.operators.dummy_operator import DummyOperator
+
+dag = DAG('{dag_id}', start_date=datetime(2018, 1, 1), schedule_interval=None)
+for i in range({num_tasks}):
+    DummyOperator(task_id='task_{{}}'.format(i), dag=dag)
+"""
+
+
+def clear(session):
+    session.query(TaskInstance).filter(TaskInstance.dag_id == DAG_ID).delete(
+        synchronize_session=False)
+    session.commit()
+
+
+def run_tasks(dag, parallelism, fork_tasks):
+    executor = LocalExecutor(parallelism=parallelism, fork_tasks=fork_tasks)
+    executor.start()
+    start = time.time()
+    for task in dag.tasks:
+        ti = TaskInstance(task, EXECUTION_DATE)
+        command = ti.command(local=True, ignore_all_deps=True, ignore_ti_state=True)
+        executor.running[ti.key] = command
+        executor.execute_async(key=ti.key, command=command)
+    while executor.running:
+        executor.sync()
+        time.sleep(0.01)
+    duration = time.time() - start
+    executor.end()
+    return duration
+
+
+def main():
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    parallelism = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    configuration.load_test_config()
+    session = settings.Session()
+
+    dag_folder = tempfile.mkdtemp()
+    try:
+        dag_file = os.path.join(dag_folder, DAG_ID + '.py')
+        with open(dag_file, 'w') as f:
+            f.write(DAG_FILE.format(dag_id=DAG_ID, num_tasks=num_tasks))
+        dag = DagBag(dag_folder=dag_file, include_examples=False).get_dag(DAG_ID)
+
+        for fork_tasks in (False, True):
+            clear(session)
+            duration = run_tasks(dag, parallelism, fork_tasks)
+            print('fork_tasks={}: ran {} tasks with {} workers in {:.2f}s, '
+                  '{:.2f} tasks/s'.format(fork_tasks, num_tasks, parallelism,
+                                          duration, num_tasks / duration))
+    finally:
+        clear(session)
+        session.close()
+        shutil.rmtree(dag_folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures how the dependency check of the scheduler scales with the width of a
+DAG. For every width a DAG with one root task, ``width`` parallel tasks and one
+join task is created, the root task is marked successful and the dependencies
+of all remaining task instances are checked the way
+``SchedulerJob._process_task_instances`` does, once with a fresh context per
+task instance (one trigger rule query per task instance) and once with a
+context holding the finished task instances of the DagRun.
+
+To Run:
+    $ python scripts/perf/scheduler_dep_check_benchmark.py
+"""
+from __future__ import print_function
+
+import time
+
+from sqlalchemy import event
+
+from airflow import configuration, settings
+from airflow.models import DAG, DagRun, TaskInstance
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.ti_deps.dep_context import DepContext
+from airflow.utils import timezone
+from airflow.utils.state import State
+
+WIDTHS = [10, 100, 500, 1000, 2000]
+DAG_ID = 'perf_dep_check_{}'
+EXECUTION_DATE = timezone.datetime(2018, 1, 1)
+
+
+class QueryCounter(object):
+    """
+    Counts the statements sent to the metadata database.
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+def create_dag(width):
+    dag = DAG(DAG_ID.format(width), start_date=EXECUTION_DATE)
+    root = DummyOperator(task_id='root', dag=dag)
+    join = DummyOperator(task_id='join', dag=dag)
+    for i in range(width):
+        task = DummyOperator(task_id='task_{}'.format(i), dag=dag)
+        task.set_upstream(root)
+        task.set_downstream(join)
+    return dag
+
+
+def clear(dag, session):
+    session.query(TaskInstance).filter(TaskInstance.dag_id == dag.dag_id).delete()
+    session.query(DagRun).filter(DagRun.dag_id == dag.dag_id).delete()
+    session.commit()
+
+
+def check_dependencies(dag, dag_run, batched):
+    tis = dag_run.get_task_instances()
+    if batched:
+        finished_states = State.finished() + [State.UPSTREAM_FAILED]
+        dep_context = DepContext(
+            flag_upstream_failed=True,
+            finished_tasks=[ti for ti in tis if ti.state in finished_states])
+    runnable = 0
+    for ti in tis:
+        if ti.state not in (State.NONE, State.UP_FOR_RETRY):
+            continue
+        ti.task = dag.get_task(ti.task_id)
+        if not batched:
+            dep_context = DepContext(flag_upstream_failed=True)
+        if ti.are_dependencies_met(dep_context=dep_context):
+            runnable += 1
+    return runnable
+
+
+def main():
+    configuration.load_test_config()
+    counter = QueryCounter()
+    event.listen(settings.engine, 'before_cursor_execute', counter)
+
+    session = settings.Session()
+    print('{:>8} {:>10} {:>12} {:>10} {:>12} {:>10}'.format(
+        'width', 'runnable', 'per-ti (s)', 'queries', 'batched (s)', 'queries'))
+    for width in WIDTHS:
+        dag = create_dag(width)
+        clear(dag, session)
+        dag_run = dag.create_dagrun(run_id='perf_{}'.format(width),
+                                    execution_date=EXECUTION_DATE,
+                                    state=State.RUNNING,
+                                    session=session)
+        root = dag_run.get_task_instance('root', session=session)
+        root.state = State.SUCCESS
+        session.merge(root)
+        session.commit()
+
+        results = []
+        for batched in (False, True):
+            counter.count = 0
+            start = time.time()
+            runnable = check_dependencies(dag, dag_run, batched)
+            results.append((runnable, time.time() - start, counter.count))
+
+        print('{:>8} {:>10} {:>12.3f} {:>10} {:>12.3f} {:>10}'.format(
+            width, results[1][0], results[0][1], results[0][2],
+            results[1][1], results[1][2]))
+        clear(dag, session)
+    session.close()
+
+
+if __name__ == "__main__":
+    main()
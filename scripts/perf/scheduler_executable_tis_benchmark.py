@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures how long ``SchedulerJob._find_executable_task_instances`` takes to
+select the task instances to queue out of a large number of scheduled task
+instances spread over many DAGs and pools, and how many statements it sends
+to the metadata database.
+
+To Run:
+    $ python scripts/perf/scheduler_executable_tis_benchmark.py
+"""
+from __future__ import print_function
+
+import logging
+import time
+
+from sqlalchemy import event
+
+from airflow import configuration, settings
+from airflow.jobs import SchedulerJob
+from airflow.models import DAG, Pool, TaskInstance
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.utils import timezone
+from airflow.utils.dag_processing import SimpleDag, SimpleDagBag
+from airflow.utils.state import State
+
+NUM_POOLS = 500
+NUM_DAGS = 3000
+NUM_TIS = 50000
+POOL_SLOTS = 16
+DAG_ID_PREFIX = 'perf_executable_tis_'
+POOL_PREFIX = 'perf_executable_tis_pool_'
+EXECUTION_DATE = timezone.datetime(2018, 1, 1)
+
+
+class QueryCounter(object):
+    """
+    Counts the statements sent to the metadata database.
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+def create_dags():
+    tasks_per_dag = -(-NUM_TIS // NUM_DAGS)
+    dags = []
+    num_tasks = 0
+    for i in range(NUM_DAGS):
+        dag = DAG(DAG_ID_PREFIX + str(i), start_date=EXECUTION_DATE,
+                  concurrency=tasks_per_dag)
+        for j in range(min(tasks_per_dag, NUM_TIS - num_tasks)):
+            DummyOperator(task_id='task_{}'.format(j),
+                          pool=POOL_PREFIX + str(num_tasks % NUM_POOLS),
+                          priority_weight=num_tasks % 10,
+                          dag=dag)
+            num_tasks += 1
+        dags.append(dag)
+    return dags
+
+
+def clear(session):
+    session.query(TaskInstance).filter(
+        TaskInstance.dag_id.like(DAG_ID_PREFIX + '%')).delete(
+        synchronize_session=False)
+    session.query(Pool).filter(Pool.pool.like(POOL_PREFIX + '%')).delete(
+        synchronize_session=False)
+    session.commit()
+
+
+def main():
+    configuration.load_test_config()
+    session = settings.Session()
+    clear(session)
+
+    print('Creating {} DAGs, {} pools and {} scheduled task instances'.format(
+        NUM_DAGS, NUM_POOLS, NUM_TIS))
+    dags = create_dags()
+    session.bulk_insert_mappings(Pool, [
+        {'pool': POOL_PREFIX + str(i), 'slots': POOL_SLOTS, 'description': ''}
+        for i in range(NUM_POOLS)])
+    session.bulk_insert_mappings(TaskInstance, [
+        {'task_id': task.task_id,
+         'dag_id': dag.dag_id,
+         'execution_date': EXECUTION_DATE,
+         'state': State.SCHEDULED,
+         'pool': task.pool,
+         'priority_weight': task.priority_weight_total,
+         '_try_number': 0,
+         'max_tries': 0}
+        for dag in dags for task in dag.tasks])
+    session.commit()
+    simple_dag_bag = SimpleDagBag([SimpleDag(dag) for dag in dags])
+
+    scheduler = SchedulerJob()
+    # Logging every examined task instance would dominate the measurement
+    scheduler.log.setLevel(logging.WARNING)
+
+    counter = QueryCounter()
+    event.listen(settings.engine, 'before_cursor_execute', counter)
+    start = time.time()
+    executable_tis = scheduler._find_executable_task_instances(
+        simple_dag_bag, states=[State.SCHEDULED], session=session)
+    duration = time.time() - start
+    event.remove(settings.engine, 'before_cursor_execute', counter)
+
+    print('Selected {} task instances in {:.3f}s with {} queries'.format(
+        len(executable_tis), duration, counter.count))
+
+    clear(session)
+    session.close()
+
+
+if __name__ == "__main__":
+    main()
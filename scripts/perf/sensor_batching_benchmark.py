@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures how long it takes to poke many NamedHivePartitionSensors waiting on
+partitions of the same table one sensor at a time, like the sensors do on
+their own, and in batches with poke_in_batches, like the sensor_batching
+service does. The metastore is a local stand-in keeping the partitions in
+memory and waiting a fixed latency on every connection and call to simulate
+the round trip to a remote metastore.
+
+To Run:
+    $ python scripts/perf/sensor_batching_benchmark.py [num_sensors] [latency_ms]
+"""
+from __future__ import print_function
+
+import sys
+import time
+from collections import namedtuple
+
+import hive_metastore
+
+from airflow.hooks.hive_hooks import HiveMetastoreHook
+from airflow.sensors.base_sensor_operator import poke_in_batches
+from airflow.sensors.named_hive_partition_sensor import NamedHivePartitionSensor
+
+FieldSchema = namedtuple('FieldSchema', ['name'])
+Table = namedtuple('Table', ['partitionKeys'])
+Partition = namedtuple('Partition', ['values'])
+
+
+class LocalTransport(object):
+    def __init__(self, metastore):
+        self.metastore = metastore
+
+    def open(self):
+        self.metastore.wait()
+
+    def close(self):
+        pass
+
+
+class LocalProtocol(object):
+    def __init__(self, metastore):
+        self.trans = LocalTransport(metastore)
+
+
+class LocalMetastore(object):
+    """
+    Stand-in for the metastore thrift client, waiting a fixed latency and
+    counting every call.
+    """
+    def __init__(self, partitions, latency):
+        self.partitions = partitions
+        self.latency = latency
+        self.calls = 0
+        self._oprot = LocalProtocol(self)
+
+    def wait(self):
+        self.calls += 1
+        time.sleep(self.latency)
+
+    def get_table(self, dbname, tbl_name):
+        self.wait()
+        return Table([FieldSchema('ds'), FieldSchema('hour')])
+
+    def get_partition_by_name(self, db_name, tbl_name, part_name):
+        self.wait()
+        if part_name not in self.partitions:
+            raise hive_metastore.ttypes.NoSuchObjectException()
+        return Partition([kv.split('=')[1] for kv in part_name.split('/')])
+
+    def get_partitions_by_names(self, db_name, tbl_name, names):
+        self.wait()
+        return [Partition([kv.split('=')[1] for kv in name.split('/')])
+                for name in names if name in self.partitions]
+
+
+def main():
+    num_sensors = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.005
+
+    partition_names = ['ds=2018-01-01/hour={:04d}'.format(i)
+                       for i in range(num_sensors)]
+    # Half of the partitions landed
+    metastore = LocalMetastore(set(partition_names[::2]), latency)
+
+    def hook_init(hook, metastore_conn_id='metastore_default'):
+        # Every hook opens its own connection to the metastore
+        metastore.wait()
+        hook.metastore = metastore
+    HiveMetastoreHook.__init__ = hook_init
+
+    sensors = [NamedHivePartitionSensor(task_id='sensor_{}'.format(i),
+                                        partition_names=['db.events/' + name])
+               for i, name in enumerate(partition_names)]
+
+    start = time.time()
+    met = sum(1 for sensor in sensors if sensor.poke({}))
+    print('Per sensor: poked {} sensors, {} met, in {:.3f}s with {} metastore '
+          'calls'.format(num_sensors, met, time.time() - start, metastore.calls))
+
+    metastore.calls = 0
+    start = time.time()
+    results = poke_in_batches(sensors)
+    met = sum(1 for criteria_met in results.values() if criteria_met)
+    print('Batched: poked {} sensors, {} met, in {:.3f}s with {} metastore '
+          'calls'.format(num_sensors, met, time.time() - start, metastore.calls))
+
+
+if __name__ == "__main__":
+    main()
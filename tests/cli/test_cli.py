@@ -13,6 +13,9 @@
 # limitations under the License.
 #
 
+import os
+import shutil
+import tempfile
 import unittest
 
 from mock import patch, Mock, MagicMock
@@ -21,7 +24,7 @@ from time import sleep
 import psutil
 
 from airflow import settings
-from airflow.bin.cli import get_num_ready_workers_running
+from airflow.bin.cli import get_num_ready_workers_running, get_serve_logs_app
 
 
 class TestCLI(unittest.TestCase):
@@ -69,3 +72,40 @@ class TestCLI(unittest.TestCase):
             "webserver terminated with return code {} in debug mode".format(return_code))
         p.terminate()
         p.wait()
+
+
+class TestServeLogs(unittest.TestCase):
+
+    def setUp(self):
+        self.log_folder = tempfile.mkdtemp()
+        with open(os.path.join(self.log_folder, '1.log'), 'wb') as f:
+            f.write(b'0123456789')
+        self.client = get_serve_logs_app(self.log_folder).test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.log_folder)
+
+    def test_serve_whole_log(self):
+        response = self.client.get('/log/1.log')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b'0123456789')
+
+    def test_serve_log_range(self):
+        response = self.client.get('/log/1.log', headers={'Range': 'bytes=2-5'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, b'2345')
+        self.assertEqual(response.headers['Content-Range'], 'bytes 2-5/10')
+
+        response = self.client.get('/log/1.log', headers={'Range': 'bytes=8-'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, b'89')
+        self.assertEqual(response.headers['Content-Range'], 'bytes 8-9/10')
+
+    def test_serve_log_range_past_end(self):
+        response = self.client.get('/log/1.log', headers={'Range': 'bytes=10-'})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers['Content-Range'], 'bytes */10')
+
+    def test_serve_missing_log_range(self):
+        response = self.client.get('/log/2.log', headers={'Range': 'bytes=0-'})
+        self.assertEqual(response.status_code, 404)
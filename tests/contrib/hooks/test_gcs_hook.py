@@ -14,6 +14,8 @@
 
 import unittest
 
+import mock
+
 from airflow.exceptions import AirflowException
 import airflow.contrib.hooks.gcs_hook as gcs_hook
 
@@ -44,3 +46,67 @@ class TestGCSHookHelperFunctions(unittest.TestCase):
         self.assertEqual(
             gcs_hook._parse_gcs_url('gs://bucket/'),
             ('bucket', ''))
+
+
+class TestGoogleCloudStorageHook(unittest.TestCase):
+
+    def setUp(self):
+        with mock.patch('airflow.contrib.hooks.gcp_api_base_hook.'
+                        'GoogleCloudBaseHook.__init__', return_value=None):
+            self.hook = gcs_hook.GoogleCloudStorageHook()
+        patcher = mock.patch.object(self.hook, 'get_conn')
+        self.objects = patcher.start().return_value.objects.return_value
+        self.addCleanup(patcher.stop)
+
+    def test_download_range(self):
+        request = self.objects.get_media.return_value
+        request.headers = {}
+        request.execute.return_value = b'2345'
+
+        self.assertEqual(self.hook.download_range('bucket', 'object', 2, 4), b'2345')
+        self.objects.get_media.assert_called_once_with(bucket='bucket',
+                                                       object='object')
+        self.assertEqual(request.headers, {'Range': 'bytes=2-5'})
+
+    def test_download_range_to_end(self):
+        request = self.objects.get_media.return_value
+        request.headers = {}
+
+        self.hook.download_range('bucket', 'object', 8)
+        self.assertEqual(request.headers, {'Range': 'bytes=8-'})
+
+    @mock.patch('airflow.contrib.hooks.gcs_hook.MediaFileUpload')
+    def test_upload(self, media_file_upload):
+        self.hook.upload('bucket', 'object', 'file')
+
+        media_file_upload.assert_called_once_with('file', 'application/octet-stream')
+        self.objects.insert.assert_called_once_with(
+            bucket='bucket', name='object',
+            media_body=media_file_upload.return_value)
+        self.objects.insert.return_value.execute.assert_called_once_with()
+
+    @mock.patch('airflow.contrib.hooks.gcs_hook.MediaFileUpload')
+    def test_upload_in_chunks(self, media_file_upload):
+        request = self.objects.insert.return_value
+        request.next_chunk.side_effect = [(mock.Mock(), None),
+                                          (None, {'name': 'object'})]
+
+        self.hook.upload('bucket', 'object', 'file', chunk_size=256 * 1024)
+
+        media_file_upload.assert_called_once_with(
+            'file', 'application/octet-stream', chunksize=256 * 1024,
+            resumable=True)
+        self.assertEqual(request.next_chunk.call_count, 2)
+        request.execute.assert_not_called()
+
+    def test_compose(self):
+        self.hook.compose('bucket', ['a', 'b'], 'a')
+
+        self.objects.compose.assert_called_once_with(
+            destinationBucket='bucket', destinationObject='a',
+            body={'sourceObjects': [{'name': 'a'}, {'name': 'b'}]})
+        self.objects.compose.return_value.execute.assert_called_once_with()
+
+    def test_compose_without_sources(self):
+        with self.assertRaises(ValueError):
+            self.hook.compose('bucket', [], 'a')
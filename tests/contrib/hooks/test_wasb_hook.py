@@ -15,6 +15,7 @@
 
 
 import json
+import tempfile
 import unittest
 
 from airflow import configuration
@@ -138,6 +139,97 @@ class TestWasbHook(unittest.TestCase):
             'container', 'blob', max_connections=1
         )
 
+    @mock.patch('airflow.contrib.hooks.wasb_hook.BlockBlobService',
+                autospec=True)
+    def test_get_blob_size(self, mock_service):
+        mock_instance = mock_service.return_value
+        mock_instance.get_blob_properties.return_value.properties \
+            .content_length = 10
+        hook = WasbHook(wasb_conn_id='wasb_test_sas_token')
+        self.assertEqual(hook.get_blob_size('container', 'blob', timeout=1), 10)
+        mock_instance.get_blob_properties.assert_called_once_with(
+            'container', 'blob', timeout=1
+        )
+
+    @mock.patch('airflow.contrib.hooks.wasb_hook.BlockBlobService',
+                autospec=True)
+    def test_read_file_range(self, mock_service):
+        mock_instance = mock_service.return_value
+        mock_instance.get_blob_to_bytes.return_value.content = b'2345'
+        hook = WasbHook(wasb_conn_id='wasb_test_sas_token')
+        self.assertEqual(hook.read_file_range('container', 'blob', 2, 4), b'2345')
+        mock_instance.get_blob_to_bytes.assert_called_once_with(
+            'container', 'blob', start_range=2, end_range=5
+        )
+
+        hook.read_file_range('container', 'blob', 8)
+        mock_instance.get_blob_to_bytes.assert_called_with(
+            'container', 'blob', start_range=8, end_range=None
+        )
+
+    @mock.patch('airflow.contrib.hooks.wasb_hook.uuid')
+    @mock.patch('airflow.contrib.hooks.wasb_hook.BlockBlobService',
+                autospec=True)
+    def test_append_file(self, mock_service, mock_uuid):
+        mock_instance = mock_service.return_value
+        mock_instance.exists.return_value = True
+        mock_instance.get_block_list.return_value.committed_blocks = [
+            mock.Mock(id='block0')]
+        mock_uuid.uuid4.side_effect = [mock.Mock(hex='block1'),
+                                       mock.Mock(hex='block2')]
+        hook = WasbHook(wasb_conn_id='wasb_test_sas_token')
+
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'0123456789')
+            f.flush()
+            hook.append_file(f.name, 'container', 'blob', chunk_size=5)
+
+        mock_instance.get_blob_to_bytes.assert_not_called()
+        mock_instance.put_block.assert_has_calls([
+            mock.call('container', 'blob', b'01234', 'block1'),
+            mock.call('container', 'blob', b'56789', 'block2')])
+        (container, blob, blocks), _ = mock_instance.put_block_list.call_args
+        self.assertEqual((container, blob), ('container', 'blob'))
+        self.assertEqual([block.id for block in blocks],
+                         ['block0', 'block1', 'block2'])
+
+    @mock.patch('airflow.contrib.hooks.wasb_hook.uuid')
+    @mock.patch('airflow.contrib.hooks.wasb_hook.BlockBlobService',
+                autospec=True)
+    def test_append_file_to_blob_without_blocks(self, mock_service, mock_uuid):
+        mock_instance = mock_service.return_value
+        mock_instance.exists.return_value = True
+        mock_instance.get_block_list.return_value.committed_blocks = []
+        mock_instance.get_blob_to_bytes.return_value.content = b'previous'
+        mock_uuid.uuid4.side_effect = [mock.Mock(hex='block0'),
+                                       mock.Mock(hex='block1')]
+        hook = WasbHook(wasb_conn_id='wasb_test_sas_token')
+
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'text')
+            f.flush()
+            hook.append_file(f.name, 'container', 'blob')
+
+        # The blob uploaded in a single request becomes the first block
+        mock_instance.put_block.assert_has_calls([
+            mock.call('container', 'blob', b'previous', 'block0'),
+            mock.call('container', 'blob', b'text', 'block1')])
+        (_, _, blocks), _ = mock_instance.put_block_list.call_args
+        self.assertEqual([block.id for block in blocks], ['block0', 'block1'])
+
+    @mock.patch('airflow.contrib.hooks.wasb_hook.BlockBlobService',
+                autospec=True)
+    def test_append_file_to_missing_blob(self, mock_service):
+        mock_instance = mock_service.return_value
+        mock_instance.exists.return_value = False
+        hook = WasbHook(wasb_conn_id='wasb_test_sas_token')
+
+        hook.append_file('path', 'container', 'blob')
+
+        mock_instance.create_blob_from_path.assert_called_once_with(
+            'container', 'blob', 'path')
+        mock_instance.put_block_list.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import unittest
+
+from mock import MagicMock, patch
+from six.moves import queue
+
+from airflow.contrib.kubernetes.pod import Pod
+from airflow.contrib.kubernetes.pod_launcher import PodLauncher, PodStatusWatcher
+from airflow.utils.state import State
+
+
+def make_pod(name, phase, resource_version='1'):
+    pod = MagicMock()
+    pod.metadata.name = name
+    pod.metadata.resource_version = resource_version
+    pod.status.phase = phase
+    pod.status.start_time = None
+    return pod
+
+
+class FakeKubeClient(object):
+    """
+    Lists the pods it was given and streams the events put in its queue to
+    the watches of the pods.
+    """
+    def __init__(self, pods=()):
+        self.pods = {pod.metadata.name: pod for pod in pods}
+        self.events = queue.Queue()
+        self.list_calls = 0
+        self.read_calls = 0
+        self.listed = threading.Event()
+
+    def list_namespaced_pod(self, namespace, **kwargs):
+        self.list_calls += 1
+        pod_list = MagicMock()
+        pod_list.items = list(self.pods.values())
+        pod_list.metadata.resource_version = '1'
+        self.listed.set()
+        return pod_list
+
+    def read_namespaced_pod(self, name, namespace):
+        self.read_calls += 1
+        return self.pods[name]
+
+    def create_namespaced_pod(self, body, namespace):
+        return make_pod(body['metadata']['name'], 'Pending')
+
+    def send(self, event_type, pod):
+        self.pods[pod.metadata.name] = pod
+        self.events.put({'type': event_type, 'object': pod})
+
+
+class FakeWatch(object):
+    def stream(self, func, namespace, **kwargs):
+        client = func.__self__
+        while True:
+            yield client.events.get()
+
+
+@patch('airflow.contrib.kubernetes.pod_launcher.watch.Watch', FakeWatch)
+class TestPodStatusWatcher(unittest.TestCase):
+
+    def setUp(self):
+        PodStatusWatcher._watchers = {}
+
+    def test_wait_for_phase(self):
+        client = FakeKubeClient([make_pod('pod', 'Pending')])
+        watcher = PodStatusWatcher.get_watcher(client, 'default')
+        self.assertIs(watcher, PodStatusWatcher.get_watcher(client, 'default'))
+
+        client.send('MODIFIED', make_pod('pod', 'Running', '2'))
+        phase = watcher.wait_for_phase(
+            'pod', lambda phase: phase == 'running', timeout=10)
+        self.assertEqual(phase, 'running')
+        self.assertEqual(client.list_calls, 1)
+
+    def test_wait_for_phase_times_out(self):
+        client = FakeKubeClient([make_pod('pod', 'Pending')])
+        watcher = PodStatusWatcher.get_watcher(client, 'default')
+        self.assertIsNone(watcher.wait_for_phase(
+            'pod', lambda phase: phase == 'running', timeout=0.1))
+
+    def test_deleted_pod_is_failed(self):
+        client = FakeKubeClient([make_pod('pod', 'Running')])
+        watcher = PodStatusWatcher.get_watcher(client, 'default')
+        client.listed.wait(10)
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(watcher.wait_for_phase(
+            'pod', lambda phase: phase != 'running', timeout=10)))
+        waiter.start()
+        client.send('DELETED', make_pod('pod', 'Running', '2'))
+        waiter.join()
+        self.assertEqual(result, ['failed'])
+
+    def test_relist_after_error_event(self):
+        client = FakeKubeClient([make_pod('pod', 'Pending')])
+        watcher = PodStatusWatcher.get_watcher(client, 'default')
+        client.listed.wait(10)
+        client.listed.clear()
+        client.pods['pod'] = make_pod('pod', 'Running')
+        client.events.put({'type': 'ERROR', 'object': {'code': 410}})
+        self.assertTrue(client.listed.wait(10))
+        self.assertEqual(watcher.wait_for_phase(
+            'pod', lambda phase: phase == 'running', timeout=10), 'running')
+        self.assertEqual(client.list_calls, 2)
+
+    def test_launchers_share_the_watch(self):
+        client = FakeKubeClient()
+        launcher = PodLauncher(kube_client=client, watch_pod_status=True)
+        results = {}
+
+        def run(name):
+            pod = Pod(image='busybox', envs={}, cmds=['true'], name=name)
+            results[name] = launcher.run_pod(pod, get_logs=False)
+
+        threads = [threading.Thread(target=run, args=('pod-{}'.format(i),))
+                   for i in range(3)]
+        for thread in threads:
+            thread.start()
+        client.listed.wait(10)
+        for i in range(3):
+            client.send('MODIFIED', make_pod('pod-{}'.format(i), 'Running', '2'))
+        client.send('MODIFIED', make_pod('pod-0', 'Succeeded', '3'))
+        client.send('MODIFIED', make_pod('pod-1', 'Succeeded', '3'))
+        client.send('MODIFIED', make_pod('pod-2', 'Failed', '3'))
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(results, {'pod-0': State.SUCCESS,
+                                   'pod-1': State.SUCCESS,
+                                   'pod-2': State.FAILED})
+        self.assertEqual(client.list_calls, 1)
+        # Each launcher only reads its pod once it finished
+        self.assertEqual(client.read_calls, 3)
+
+    def test_dead_watcher_is_replaced(self):
+        client = FakeKubeClient()
+        watcher = PodStatusWatcher.get_watcher(client, 'default')
+        watcher._thread = MagicMock()
+        watcher._thread.is_alive.return_value = False
+
+        new_watcher = PodStatusWatcher.get_watcher(client, 'default')
+        self.assertIsNot(new_watcher, watcher)
+        self.assertTrue(new_watcher.is_alive())
+
+    def test_run_pod_reads_pod_missed_by_watch(self):
+        client = FakeKubeClient()
+        launcher = PodLauncher(kube_client=client, watch_pod_status=True)
+        launcher.status_check_interval = 0.1
+        pod = Pod(image='busybox', envs={}, cmds=['true'], name='pod')
+        result = []
+        runner = threading.Thread(
+            target=lambda: result.append(launcher.run_pod(pod, get_logs=False)))
+        runner.start()
+        client.listed.wait(10)
+        client.send('MODIFIED', make_pod('pod', 'Running', '2'))
+        # The watch never sees the pod finish
+        client.pods['pod'] = make_pod('pod', 'Succeeded', '3')
+        runner.join(10)
+
+        self.assertEqual(result, [State.SUCCESS])
+
+
+if __name__ == '__main__':
+    unittest.main()
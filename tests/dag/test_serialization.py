@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from datetime import timedelta
+
+from mock import patch
+
+from airflow import configuration
+from airflow.dag.serialization import (
+    SerializedDagBag, deserialize_dag, from_json, serialize_dag, to_json)
+from airflow.models import DAG, SerializedDagModel
+from airflow.operators.bash_operator import BashOperator
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.operators.python_operator import PythonOperator
+from airflow.operators.subdag_operator import SubDagOperator
+from airflow.settings import Session
+from airflow.utils import timezone
+
+configuration.load_test_config()
+
+DEFAULT_DATE = timezone.datetime(2016, 1, 1)
+
+
+def print_context(**kwargs):
+    return kwargs
+
+
+def make_dag(dag_id='test_serialization'):
+    dag = DAG(dag_id, start_date=DEFAULT_DATE,
+              schedule_interval=timedelta(hours=6),
+              default_args={'owner': 'airflow', 'retries': 2})
+    bash = BashOperator(task_id='bash', bash_command='echo {{ ds }}', dag=dag)
+    python = PythonOperator(task_id='python', python_callable=print_context,
+                            dag=dag)
+    subdag = DAG(dag_id + '.section', start_date=DEFAULT_DATE,
+                 default_args={'owner': 'airflow'})
+    DummyOperator(task_id='inner', dag=subdag)
+    section = SubDagOperator(task_id='section', subdag=subdag, dag=dag)
+    bash >> python >> section
+    return dag
+
+
+class SerializationTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        dag = make_dag()
+        restored = deserialize_dag(from_json(to_json(serialize_dag(dag))))
+
+        self.assertEqual(restored.dag_id, dag.dag_id)
+        self.assertEqual(restored.fileloc, dag.fileloc)
+        self.assertEqual(restored.start_date, dag.start_date)
+        self.assertEqual(restored.schedule_interval, timedelta(hours=6))
+        self.assertEqual(restored.following_schedule(DEFAULT_DATE),
+                         dag.following_schedule(DEFAULT_DATE))
+        self.assertEqual(sorted(restored.task_ids), sorted(dag.task_ids))
+
+        bash = restored.get_task('bash')
+        self.assertEqual(bash.task_type, 'BashOperator')
+        self.assertEqual(bash.bash_command, 'echo {{ ds }}')
+        self.assertEqual(bash.retries, 2)
+        self.assertEqual(bash.ui_color, BashOperator.ui_color)
+        self.assertEqual(bash.downstream_task_ids, ['python'])
+        self.assertEqual(restored.get_task('python').upstream_task_ids,
+                         ['bash'])
+        self.assertIn('def print_context',
+                      restored.get_task('python').python_callable)
+
+        subdags = restored.subdags
+        self.assertEqual([subdag.dag_id for subdag in subdags],
+                         ['test_serialization.section'])
+        self.assertTrue(subdags[0].is_subdag)
+        self.assertIs(subdags[0].parent_dag, restored)
+        self.assertEqual(subdags[0].task_ids, ['inner'])
+
+    def test_serialization_is_stable(self):
+        self.assertEqual(to_json(serialize_dag(make_dag())),
+                         to_json(serialize_dag(make_dag())))
+
+    def test_sets_are_sorted(self):
+        dag = make_dag()
+        dag.params = {'tags': {'c', 'a', 'b'}}
+        self.assertEqual(serialize_dag(dag)['params'],
+                         {'tags': ['a', 'b', 'c']})
+
+
+class SerializedDagBagTest(unittest.TestCase):
+
+    def setUp(self):
+        self.session = Session()
+        self.session.query(SerializedDagModel).delete()
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.query(SerializedDagModel).delete()
+        self.session.commit()
+        self.session.close()
+
+    def test_write_dag_only_when_changed(self):
+        dag = make_dag()
+        self.assertTrue(SerializedDagModel.write_dag(dag))
+        self.assertFalse(SerializedDagModel.write_dag(dag))
+
+        DummyOperator(task_id='new', dag=dag)
+        self.assertTrue(SerializedDagModel.write_dag(dag))
+
+    def test_write_dag_stores_source_code(self):
+        dag = make_dag()
+        SerializedDagModel.write_dag(dag)
+
+        self.assertIn('def make_dag',
+                      SerializedDagModel.get_source_code(dag.fileloc))
+        self.assertIsNone(SerializedDagModel.get_source_code('missing.py'))
+
+    def test_get_dag(self):
+        SerializedDagModel.write_dag(make_dag())
+        dagbag = SerializedDagBag(cache_size=10, min_fetch_interval=0)
+
+        self.assertEqual(dagbag.dag_ids, ['test_serialization'])
+        dag = dagbag.get_dag('test_serialization')
+        self.assertEqual(dag.get_task('bash').task_type, 'BashOperator')
+        subdag = dagbag.get_dag('test_serialization.section')
+        self.assertIs(subdag.parent_dag, dag)
+        self.assertIsNone(dagbag.get_dag('missing'))
+
+    def test_get_dag_reads_updated_dag(self):
+        dag = make_dag()
+        SerializedDagModel.write_dag(dag)
+        dagbag = SerializedDagBag(cache_size=10, min_fetch_interval=0)
+        self.assertNotIn('new', dagbag.get_dag(dag.dag_id).task_ids)
+
+        DummyOperator(task_id='new', dag=dag)
+        SerializedDagModel.write_dag(dag)
+        self.assertIn('new', dagbag.get_dag(dag.dag_id).task_ids)
+
+    def test_get_dag_keeps_recently_used_dags(self):
+        for dag_id in ('dag_a', 'dag_b', 'dag_c'):
+            SerializedDagModel.write_dag(make_dag(dag_id))
+        dagbag = SerializedDagBag(cache_size=2, min_fetch_interval=60)
+
+        with patch.object(SerializedDagModel, 'read_dag',
+                          wraps=SerializedDagModel.read_dag) as read_dag:
+            dagbag.get_dag('dag_a')
+            dagbag.get_dag('dag_b')
+            dagbag.get_dag('dag_a')
+            dagbag.get_dag('dag_c')
+            self.assertEqual(read_dag.call_count, 3)
+
+            # dag_b was the least recently used one
+            dagbag.get_dag('dag_a')
+            self.assertEqual(read_dag.call_count, 3)
+            dagbag.get_dag('dag_b')
+            self.assertEqual(read_dag.call_count, 4)
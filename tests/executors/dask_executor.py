@@ -12,21 +12,32 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import shutil
 import unittest
+from tempfile import mkdtemp
+
+import dill
+from mock import MagicMock, Mock, patch
 
 from airflow import configuration
-from airflow.models import DagBag
+from airflow.exceptions import AirflowException
+from airflow.models import DAG, DagBag
 from airflow.jobs import BackfillJob
 from airflow.utils import timezone
+from airflow.utils.state import State
 
 from datetime import timedelta
 
 try:
+    from airflow.executors import dask_executor
     from airflow.executors.dask_executor import DaskExecutor
     from distributed import LocalCluster
     SKIP_DASK = False
+    SKIP_DASK_UNIT = False
 except ImportError:
     SKIP_DASK = True
+    SKIP_DASK_UNIT = True
 
 if 'sqlite' in configuration.get('core', 'sql_alchemy_conn'):
     SKIP_DASK = True
@@ -36,6 +47,16 @@ SKIP_DASK = True
 
 DEFAULT_DATE = timezone.datetime(2017, 1, 1)
 
+TEST_DAG_FILE = """
+from datetime import datetime
+
+from airflow.models import DAG
+from airflow.operators.dummy_operator import DummyOperator
+
+dag = DAG('test_dask_worker_dag', start_date=datetime(2017, 1, 1))
+DummyOperator(task_id='task', dag=dag)
+"""
+
 
 class DaskExecutorTest(unittest.TestCase):
 
@@ -107,3 +128,175 @@ class DaskExecutorTest(unittest.TestCase):
 
     def tearDown(self):
         self.cluster.close(timeout=5)
+
+
+@unittest.skipIf(SKIP_DASK_UNIT, 'Dask is not installed')
+class DaskExecutorUnitTest(unittest.TestCase):
+    """
+    Tests of the DaskExecutor against a mocked Dask client, which don't need
+    a cluster.
+    """
+
+    def setUp(self):
+        patcher = patch.object(dask_executor, 'distributed')
+        self.distributed = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = self.distributed.Client.return_value
+        self.completed = self.distributed.as_completed.return_value
+
+    def get_executor(self, run_in_worker=False):
+        executor = DaskExecutor(cluster_address='tcp://scheduler:8786',
+                                run_in_worker=run_in_worker)
+        executor.start()
+        return executor
+
+    def test_execute_async_run_in_worker(self):
+        executor = self.get_executor(run_in_worker=True)
+        executor.execute_async(key='key', command='airflow run dag task')
+
+        self.client.submit.assert_called_once_with(
+            dask_executor.airflow_run_in_worker, 'airflow run dag task',
+            pure=False)
+        future = self.client.submit.return_value
+        self.assertEqual(executor.futures, {future: 'key'})
+        self.completed.add.assert_called_once_with(future)
+
+    def test_execute_async_shell(self):
+        executor = self.get_executor()
+        executor.execute_async(key='key', command='echo 1')
+
+        self.client.submit.assert_called_once_with(
+            dask_executor.airflow_run, 'echo 1', pure=False)
+
+    def test_execute_async_batch(self):
+        executor = self.get_executor()
+        first, second = MagicMock(), MagicMock()
+        self.client.map.return_value = [first, second]
+
+        with patch('warnings.warn') as warn:
+            executor.execute_async_batch([('first', 'echo 1', None),
+                                          ('second', 'echo 2', None)])
+
+        # A single request to the scheduler for the whole batch
+        self.client.map.assert_called_once_with(
+            dask_executor.airflow_run, ['echo 1', 'echo 2'], pure=False)
+        self.client.submit.assert_not_called()
+        warn.assert_not_called()
+        self.assertEqual(executor.futures, {first: 'first', second: 'second'})
+        self.assertEqual(self.completed.add.call_count, 2)
+
+    def test_execute_async_batch_with_queue(self):
+        executor = self.get_executor(run_in_worker=True)
+        self.client.map.return_value = [MagicMock()]
+
+        with patch('warnings.warn') as warn:
+            executor.execute_async_batch([('key', 'airflow run dag task',
+                                           'queue')])
+
+        warn.assert_called_once()
+        self.client.map.assert_called_once_with(
+            dask_executor.airflow_run_in_worker, ['airflow run dag task'],
+            pure=False)
+
+    def test_sync_processes_completed_futures(self):
+        executor = self.get_executor()
+        success, failure, running = MagicMock(), MagicMock(), MagicMock()
+        success.exception.return_value = None
+        success.cancelled.return_value = False
+        failure.exception.return_value = ValueError()
+        running.done.return_value = False
+        for future, key in ((success, 'success'), (failure, 'failure'),
+                            (running, 'running')):
+            executor._add_future(future, key)
+            executor.running[key] = True
+        self.completed.next_batch.return_value = [success, failure]
+
+        executor.sync()
+
+        self.completed.next_batch.assert_called_once_with(block=False)
+        self.assertEqual(executor.event_buffer,
+                         {'success': State.SUCCESS, 'failure': State.FAILED})
+        self.assertEqual(executor.futures, {running: 'running'})
+        self.assertEqual(list(executor.running), ['running'])
+
+    def test_run_in_worker_spawns_process(self):
+        dag = DAG('test_dask_worker_dag', start_date=DEFAULT_DATE)
+        spawn = MagicMock()
+        process = spawn.Process.return_value
+        process.exitcode = 0
+        with patch.object(dask_executor, '_get_worker_dag', return_value=dag), \
+                patch('airflow.bin.cli.get_parser'), \
+                patch('multiprocessing.get_context',
+                      return_value=spawn) as get_context, \
+                patch('os.fork') as fork:
+            dask_executor.airflow_run_in_worker('airflow run dag task')
+
+            get_context.assert_called_once_with('spawn')
+            fork.assert_not_called()
+            _, kwargs = spawn.Process.call_args
+            self.assertIs(kwargs['target'], dask_executor._run_in_process)
+            command, pickled_dag = kwargs['args']
+            self.assertEqual(command, 'airflow run dag task')
+            self.assertEqual(dill.loads(pickled_dag).dag_id, dag.dag_id)
+            process.start.assert_called_once_with()
+            process.join.assert_called_once_with()
+
+            process.exitcode = 1
+            with self.assertRaises(AirflowException):
+                dask_executor.airflow_run_in_worker('airflow run dag task')
+
+    def test_run_in_worker_without_picklable_dag(self):
+        spawn = MagicMock()
+        spawn.Process.return_value.exitcode = 0
+        with patch.object(dask_executor, '_get_worker_dag', return_value=Mock()), \
+                patch('airflow.bin.cli.get_parser'), \
+                patch('multiprocessing.get_context', return_value=spawn):
+            dask_executor.airflow_run_in_worker('airflow run dag task')
+
+        # The process parses the DAG file itself
+        _, kwargs = spawn.Process.call_args
+        self.assertEqual(kwargs['args'], ('airflow run dag task', None))
+
+    def test_run_in_process(self):
+        dag = DAG('test_dask_worker_dag', start_date=DEFAULT_DATE)
+        args = Mock()
+        with patch('airflow.bin.cli.get_parser') as get_parser:
+            get_parser.return_value.parse_args.return_value = args
+            dask_executor._run_in_process('airflow run dag task', dill.dumps(dag))
+
+        get_parser.return_value.parse_args.assert_called_once_with(
+            ['run', 'dag', 'task'])
+        (_, kwargs) = args.func.call_args
+        self.assertEqual(kwargs['dag'].dag_id, dag.dag_id)
+
+    def test_get_worker_dag_is_cached(self):
+        dag_folder = mkdtemp()
+        self.addCleanup(shutil.rmtree, dag_folder)
+        dag_file = os.path.join(dag_folder, 'test_dask_worker_dag.py')
+        with open(dag_file, 'w') as f:
+            f.write(TEST_DAG_FILE)
+        self.addCleanup(setattr, dask_executor, '_worker_dag_cache', None)
+        args = Mock(subdir=dag_file, pickle=None, dag_id='test_dask_worker_dag')
+
+        dag = dask_executor._get_worker_dag(args)
+        self.assertEqual(dag.dag_id, 'test_dask_worker_dag')
+        with patch('airflow.models.DagBag') as dagbag:
+            self.assertIs(dask_executor._get_worker_dag(args), dag)
+            dagbag.assert_not_called()
+
+        args.pickle = 1
+        self.assertIsNone(dask_executor._get_worker_dag(args))
+
+    def test_get_worker_dag_skips_import_errors(self):
+        dag_folder = mkdtemp()
+        self.addCleanup(shutil.rmtree, dag_folder)
+        dag_file = os.path.join(dag_folder, 'test_dask_worker_dag.py')
+        with open(dag_file, 'w') as f:
+            f.write(TEST_DAG_FILE + 'raise ImportError()\n')
+        self.addCleanup(setattr, dask_executor, '_worker_dag_cache', None)
+        args = Mock(subdir=dag_file, pickle=None, dag_id='test_dask_worker_dag')
+
+        self.assertIsNone(dask_executor._get_worker_dag(args))
+        with patch('airflow.models.DagBag') as dagbag:
+            dask_executor._get_worker_dag(args)
+            dagbag.assert_called_once_with(dag_file, include_examples=False)
@@ -14,7 +14,13 @@
 
 import unittest
 
+from mock import MagicMock, patch
+
+from airflow import settings
 from airflow.executors.base_executor import BaseExecutor
+from airflow.models import DAG, TaskInstance
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.utils import timezone
 from airflow.utils.state import State
 
 from datetime import datetime
@@ -38,3 +44,92 @@ class BaseExecutorTest(unittest.TestCase):
         self.assertEqual(len(executor.get_event_buffer()), 2)
         self.assertEqual(len(executor.event_buffer), 0)
 
+    def test_heartbeat_launches_tasks_by_priority(self):
+        executor = BaseExecutor(parallelism=2)
+        executor.execute_async = MagicMock()
+
+        date = datetime.utcnow()
+        tis = {}
+        for task_id, priority in (('low', 1), ('high', 3), ('running', 2)):
+            ti = MagicMock(key=('my_dag', task_id, date))
+            tis[task_id] = ti
+            executor.queue_command(ti, 'command ' + task_id, priority=priority)
+
+        def refresh_from_db(task_instances):
+            for ti in task_instances:
+                ti.state = State.RUNNING if ti is tis['running'] else None
+
+        with patch.object(BaseExecutor, '_refresh_from_db',
+                          side_effect=refresh_from_db) as refresh:
+            executor.heartbeat()
+
+        refresh.assert_called_once_with([tis['high'], tis['running']])
+        executor.execute_async.assert_called_once_with(
+            tis['high'].key, command='command high', queue=None)
+        self.assertEqual(list(executor.running), [tis['high'].key])
+        self.assertEqual(list(executor.queued_tasks), [tis['low'].key])
+
+    def test_heartbeat_launches_tasks_in_one_batch(self):
+        executor = BaseExecutor(parallelism=0)
+        executor.execute_async_batch = MagicMock()
+
+        date = datetime.utcnow()
+        keys = [('my_dag', 'task_{}'.format(i), date) for i in range(3)]
+        for i, key in enumerate(keys):
+            executor.queue_command(MagicMock(key=key), 'command', priority=i,
+                                   queue='queue')
+
+        with patch.object(BaseExecutor, '_refresh_from_db'):
+            executor.heartbeat()
+
+        executor.execute_async_batch.assert_called_once_with(
+            [(key, 'command', 'queue') for key in reversed(keys)])
+
+    def test_refresh_from_db(self):
+        date = timezone.datetime(2016, 1, 1)
+        dag = DAG('test_base_executor_refresh_from_db', start_date=date)
+        running = TaskInstance(DummyOperator(task_id='running', dag=dag), date)
+        missing = TaskInstance(DummyOperator(task_id='missing', dag=dag), date)
+        session = settings.Session()
+        session.query(TaskInstance).filter(
+            TaskInstance.dag_id == dag.dag_id).delete()
+        stored = TaskInstance(dag.get_task('running'), date, state=State.RUNNING)
+        stored.hostname, stored.pid, stored.start_date = 'worker', 123, date
+        stored.try_number = 1
+        session.merge(stored)
+        session.commit()
+        self.addCleanup(session.close)
+        missing.state = State.QUEUED
+
+        BaseExecutor._refresh_from_db([running, missing])
+
+        self.assertEqual(running.state, State.RUNNING)
+        self.assertEqual(running.hostname, 'worker')
+        self.assertEqual(running.pid, 123)
+        self.assertEqual(running.try_number, 1)
+        self.assertEqual(running.start_date, date)
+        # Like TaskInstance.refresh_from_db, a missing row resets the state
+        self.assertIsNone(missing.state)
+
+        session.query(TaskInstance).filter(
+            TaskInstance.dag_id == dag.dag_id).delete()
+        session.commit()
+
+    def test_heartbeat_launches_task_missing_from_db(self):
+        executor = BaseExecutor(parallelism=0)
+        executor.execute_async = MagicMock()
+        key = ('my_dag', 'my_task', datetime.utcnow())
+        ti = MagicMock(key=key, state=State.QUEUED)
+        executor.queue_command(ti, 'command')
+
+        def refresh_from_db(task_instances):
+            for task_instance in task_instances:
+                task_instance.state = None
+
+        with patch.object(BaseExecutor, '_refresh_from_db',
+                          side_effect=refresh_from_db):
+            executor.heartbeat()
+
+        executor.execute_async.assert_called_once_with(
+            key, command='command', queue=None)
+        self.assertIsNone(ti.state)
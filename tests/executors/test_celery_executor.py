@@ -13,10 +13,14 @@
 # limitations under the License.
 import sys
 import unittest
+from celery import Celery
+from celery import states as celery_states
 from celery.contrib.testing.worker import start_worker
+from mock import MagicMock, call, patch
 
 from airflow.executors.celery_executor import CeleryExecutor
 from airflow.executors.celery_executor import app
+from airflow.executors.celery_executor import fetch_celery_task_state
 from airflow.utils.state import State
 
 # leave this it is used by the test worker
@@ -48,6 +52,50 @@ class CeleryExecutorTest(unittest.TestCase):
         self.assertNotIn('success', executor.tasks)
         self.assertNotIn('fail', executor.tasks)
 
+    def test_fetch_celery_task_state_key_value_backend(self):
+        test_app = Celery('test_fetch_celery_task_state',
+                          backend='cache+memory://')
+        backend = test_app.backend
+        backend.store_result('success', None, celery_states.SUCCESS)
+        backend.store_result('failure', ValueError(), celery_states.FAILURE)
+        async_results = [test_app.AsyncResult(task_id)
+                         for task_id in ('success', 'failure', 'pending')]
+
+        backend.get = MagicMock(side_effect=AssertionError)
+        states = fetch_celery_task_state(async_results, chunk_size=2)
+
+        self.assertEqual(states, {'success': celery_states.SUCCESS,
+                                  'failure': celery_states.FAILURE,
+                                  'pending': celery_states.PENDING})
+
+    def test_fetch_celery_task_state_other_backend(self):
+        async_result = MagicMock(task_id='task', state=celery_states.STARTED)
+        self.assertEqual(fetch_celery_task_state([async_result]),
+                         {'task': celery_states.STARTED})
+
+    def test_execute_async_batch(self):
+        executor = CeleryExecutor()
+        executor.start()
+        tasks = [('first', 'echo 1', 'default'), ('second', 'echo 2', 'other')]
+
+        with patch.object(app, 'producer_or_acquire') as producer_or_acquire, \
+                patch('airflow.executors.celery_executor.execute_command') \
+                as execute_command:
+            executor.execute_async_batch(tasks)
+
+        # The messages are published through a single producer
+        producer_or_acquire.assert_called_once_with()
+        producer = producer_or_acquire.return_value.__enter__.return_value
+        execute_command.apply_async.assert_has_calls([
+            call(args=['echo 1'], queue='default', producer=producer),
+            call(args=['echo 2'], queue='other', producer=producer)])
+        self.assertEqual(
+            executor.tasks,
+            {'first': execute_command.apply_async.return_value,
+             'second': execute_command.apply_async.return_value})
+        self.assertEqual(executor.last_state, {'first': celery_states.PENDING,
+                                               'second': celery_states.PENDING})
+
 
 if __name__ == '__main__':
     unittest.main()
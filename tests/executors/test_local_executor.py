@@ -12,9 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import multiprocessing
 import unittest
 
-from airflow.executors.local_executor import LocalExecutor
+from airflow import settings
+from airflow.executors.local_executor import LocalExecutor, LocalWorker
+from airflow.models import Pool
 from airflow.utils.state import State
 from airflow.utils.timeout import timeout
 
@@ -23,8 +26,8 @@ class LocalExecutorTest(unittest.TestCase):
 
     TEST_SUCCESS_COMMANDS = 5
 
-    def execution_parallelism(self, parallelism=0):
-        executor = LocalExecutor(parallelism=parallelism)
+    def execution_parallelism(self, parallelism=0, fork_tasks=False):
+        executor = LocalExecutor(parallelism=parallelism, fork_tasks=fork_tasks)
         executor.start()
 
         success_key = 'success {}'
@@ -69,6 +72,42 @@ class LocalExecutorTest(unittest.TestCase):
         test_parallelism = 2
         self.execution_parallelism(parallelism=test_parallelism)
 
+    def test_execution_unlimited_parallelism_fork_tasks(self):
+        self.execution_parallelism(parallelism=0, fork_tasks=True)
+
+    def test_execution_limited_parallelism_fork_tasks(self):
+        self.execution_parallelism(parallelism=2, fork_tasks=True)
+
+    def test_execute_airflow_command_in_fork(self):
+        result_queue = multiprocessing.Queue()
+        worker = LocalWorker(result_queue, fork_tasks=True)
+
+        worker.execute_work('success', 'airflow version')
+        self.assertEqual(result_queue.get(timeout=60), ('success', State.SUCCESS))
+
+        worker.execute_work('fail', 'airflow not_a_command')
+        self.assertEqual(result_queue.get(timeout=60), ('fail', State.FAILED))
+
+    def test_execute_airflow_command_in_fork_keeps_connections(self):
+        pool_name = 'test_execute_airflow_command_in_fork'
+        session = settings.Session()
+        self.addCleanup(session.close)
+        # The connection of the worker is in use while the command runs
+        self.assertEqual(session.execute('SELECT 1').scalar(), 1)
+
+        result_queue = multiprocessing.Queue()
+        worker = LocalWorker(result_queue, fork_tasks=True)
+        worker.execute_work('pool', 'airflow pool -s {} 3 test'.format(pool_name))
+        self.assertEqual(result_queue.get(timeout=60), ('pool', State.SUCCESS))
+
+        # The command wrote through its own connection, without closing the
+        # one of the worker
+        self.assertEqual(session.execute('SELECT 1').scalar(), 1)
+        pools = session.query(Pool).filter(Pool.pool == pool_name)
+        self.assertEqual(pools.count(), 1)
+        pools.delete()
+        session.commit()
+
 
 if __name__ == '__main__':
     unittest.main()
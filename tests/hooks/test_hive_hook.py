@@ -15,6 +15,10 @@
 
 import unittest
 
+from mock import MagicMock
+
+import hive_metastore
+
 from airflow.exceptions import AirflowException
 from airflow.hooks.hive_hooks import HiveMetastoreHook
 
@@ -37,3 +41,47 @@ class TestHiveMetastoreHook(unittest.TestCase):
                                                                   'some_key=value3'],
                                                                  'some_key')
         self.assertEqual(max_partition, 'value3')
+
+    def test_check_for_named_partitions(self):
+        hook = HiveMetastoreHook.__new__(HiveMetastoreHook)
+        hook.metastore = MagicMock()
+        ds_key, hour_key = MagicMock(), MagicMock()
+        ds_key.name, hour_key.name = 'ds', 'hour'
+        hook.metastore.get_table.return_value.partitionKeys = [ds_key, hour_key]
+        hook.metastore.get_partitions_by_names.return_value = [
+            MagicMock(values=['2018-01-01', '00'])]
+
+        existing = hook.check_for_named_partitions(
+            'airflow', 'events', ['ds=2018-01-01/hour=00', 'ds=2018-01-01/hour=01'])
+
+        self.assertEqual(existing, {'ds=2018-01-01/hour=00'})
+        hook.metastore.get_partitions_by_names.assert_called_once_with(
+            'airflow', 'events', ['ds=2018-01-01/hour=00', 'ds=2018-01-01/hour=01'])
+
+    def test_check_for_named_partitions_escaped(self):
+        hook = HiveMetastoreHook.__new__(HiveMetastoreHook)
+        hook.metastore = MagicMock()
+        ds_key = MagicMock()
+        ds_key.name = 'ds'
+        hook.metastore.get_table.return_value.partitionKeys = [ds_key]
+        hook.metastore.get_partitions_by_names.return_value = [
+            MagicMock(values=['2018-01-01 00:00:00'])]
+
+        # Escaped values and keys in another case name the same partition
+        existing = hook.check_for_named_partitions(
+            'airflow', 'events',
+            ['ds=2018-01-01 00%3A00%3A00', 'DS=2018-01-01 00%3A00%3A00',
+             'ds=2018-01-01 01%3A00%3A00'])
+
+        self.assertEqual(existing, {'ds=2018-01-01 00%3A00%3A00',
+                                    'DS=2018-01-01 00%3A00%3A00'})
+
+    def test_check_for_named_partitions_of_missing_table(self):
+        hook = HiveMetastoreHook.__new__(HiveMetastoreHook)
+        hook.metastore = MagicMock()
+        hook.metastore.get_table.side_effect = \
+            hive_metastore.ttypes.NoSuchObjectException()
+
+        self.assertEqual(
+            hook.check_for_named_partitions('airflow', 'missing', ['ds=2018-01-01']),
+            set())
@@ -157,6 +157,16 @@ class TestS3Hook(unittest.TestCase):
 
         self.assertEqual(hook.read_key('my_key', 'mybucket'), u'Contént')
 
+    @mock_s3
+    def test_read_key_range(self):
+        hook = S3Hook(aws_conn_id=None)
+        conn = hook.get_conn()
+        conn.create_bucket(Bucket='mybucket')
+        conn.put_object(Bucket='mybucket', Key='my_key', Body=b'0123456789')
+
+        self.assertEqual(hook.read_key_range('my_key', 2, 4, 'mybucket'), b'2345')
+        self.assertEqual(hook.read_key_range('s3://mybucket/my_key', 8), b'89')
+
 
     @mock_s3
     def test_check_for_wildcard_key(self):
@@ -32,10 +32,13 @@ from tempfile import mkdtemp
 from airflow import AirflowException, settings, models
 from airflow.bin import cli
 from airflow.executors import BaseExecutor, SequentialExecutor
-from airflow.jobs import BackfillJob, SchedulerJob, LocalTaskJob
-from airflow.models import DAG, DagModel, DagBag, DagRun, Pool, TaskInstance as TI
+from airflow.jobs import (BackfillJob, DagFileProcessorPool, LocalTaskJob,
+                          PooledDagFileProcessor, SchedulerJob, SensorBatchingJob)
+from airflow.models import (DAG, DagModel, DagBag, DagRun, Pool, TaskInstance as TI,
+                            TaskReschedule)
 from airflow.operators.dummy_operator import DummyOperator
 from airflow.operators.bash_operator import BashOperator
+from airflow.sensors.base_sensor_operator import BaseSensorOperator
 from airflow.task.task_runner.base_task_runner import BaseTaskRunner
 from airflow.utils import timezone
 
@@ -931,6 +934,88 @@ class LocalTaskJobTest(unittest.TestCase):
         session.close()
 
 
+class BatchedTestSensor(BaseSensorOperator):
+    """
+    Sensor waiting for a target to be in met_targets, recording the batches
+    it's poked in.
+    """
+    met_targets = set()
+    poke_batch_calls = []
+
+    def __init__(self, target, **kwargs):
+        super(BatchedTestSensor, self).__init__(**kwargs)
+        self.target = target
+
+    def poke(self, context):
+        return self.target in self.met_targets
+
+    def get_poke_batch_key(self):
+        return 'test_conn'
+
+    def get_poke_targets(self):
+        return [self.target]
+
+    @classmethod
+    def poke_batch(cls, batch_key, targets):
+        cls.poke_batch_calls.append((batch_key, set(targets)))
+        return cls.met_targets & set(targets)
+
+
+class SensorBatchingJobTest(unittest.TestCase):
+    def test_poke_waiting_sensors(self):
+        dag = DAG(
+            'test_sensor_batching',
+            start_date=DEFAULT_DATE,
+            default_args={'owner': 'owner1'})
+        with dag:
+            sensors = [
+                BatchedTestSensor(task_id='sensor_{}'.format(i),
+                                  target='target_{}'.format(i),
+                                  mode='reschedule',
+                                  poke_interval=600,
+                                  timeout=3600)
+                for i in range(3)]
+
+        dag.clear()
+        session = settings.Session()
+        session.query(TaskReschedule).filter(
+            TaskReschedule.dag_id == dag.dag_id).delete()
+        session.commit()
+        session.close()
+        dag.create_dagrun(run_id="test",
+                          state=State.RUNNING,
+                          execution_date=DEFAULT_DATE,
+                          start_date=DEFAULT_DATE)
+
+        BatchedTestSensor.met_targets = set()
+        for sensor in sensors:
+            sensor.run(start_date=DEFAULT_DATE, end_date=DEFAULT_DATE,
+                       ignore_ti_state=True)
+
+        BatchedTestSensor.met_targets = {'target_0'}
+        BatchedTestSensor.poke_batch_calls = []
+        job = SensorBatchingJob(num_runs=1, check_interval=0)
+        before = timezone.utcnow()
+        job.poke_waiting_sensors(Mock(dags={dag.dag_id: dag}))
+
+        # all the sensors are poked at once
+        self.assertEqual(BatchedTestSensor.poke_batch_calls,
+                         [('test_conn', {'target_0', 'target_1', 'target_2'})])
+        for i, sensor in enumerate(sensors):
+            ti = TI(sensor, DEFAULT_DATE)
+            ti.refresh_from_db()
+            self.assertEqual(ti.state, State.UP_FOR_RESCHEDULE)
+            reschedule_date = TaskReschedule.find_for_task_instance(
+                ti)[-1].reschedule_date
+            if i == 0:
+                # the met sensor is ready to run right away
+                self.assertLessEqual(reschedule_date, timezone.utcnow())
+            else:
+                # the others won't poke on their own before the next batch
+                self.assertGreaterEqual(
+                    reschedule_date, before + datetime.timedelta(seconds=600))
+
+
 class SchedulerJobTest(unittest.TestCase):
     # These defaults make the test faster to run
     default_scheduler_args = {"file_process_interval": 0,
@@ -1171,6 +1256,39 @@ class SchedulerJobTest(unittest.TestCase):
         self.assertIn(tis[1].key, res_keys)
         self.assertIn(tis[3].key, res_keys)
 
+    def test_find_executable_task_instances_pool_used_slots(self):
+        dag_id = 'SchedulerJobTest.test_find_executable_task_instances_pool_used_slots'
+        dag = DAG(dag_id=dag_id, start_date=DEFAULT_DATE, concurrency=16)
+        task1 = DummyOperator(dag=dag, task_id='dummy1', pool='used_slots_pool',
+                              priority_weight=1)
+        task2 = DummyOperator(dag=dag, task_id='dummy2', pool='used_slots_pool',
+                              priority_weight=2)
+        task3 = DummyOperator(dag=dag, task_id='dummy3', pool='used_slots_pool')
+        task4 = DummyOperator(dag=dag, task_id='dummy4', pool='used_slots_pool')
+        dagbag = self._make_simple_dag_bag([dag])
+
+        scheduler = SchedulerJob(**self.default_scheduler_args)
+        session = settings.Session()
+
+        dr = scheduler.create_dag_run(dag)
+
+        tis = [TI(task, dr.execution_date) for task in (task1, task2, task3, task4)]
+        for ti, state in zip(tis, [State.SCHEDULED, State.SCHEDULED,
+                                   State.RUNNING, State.QUEUED]):
+            ti.state = state
+            session.merge(ti)
+        session.add(models.Pool(pool='used_slots_pool', slots=3, description='haha'))
+        session.commit()
+
+        res = scheduler._find_executable_task_instances(
+            dagbag,
+            states=[State.SCHEDULED],
+            session=session)
+        session.commit()
+        # the running and the queued task instance use two of the three slots,
+        # the remaining slot goes to the task with the highest priority
+        self.assertEqual([tis[1].key], [ti.key for ti in res])
+
     def test_nonexistent_pool(self):
         dag_id = 'SchedulerJobTest.test_nonexistent_pool'
         task_id = 'dummy_wrong_pool'
@@ -1903,6 +2021,36 @@ class SchedulerJobTest(unittest.TestCase):
         self.assertEqual(
             len(session.query(TI).filter(TI.dag_id == dag_id).all()), 0)
 
+    def test_processor_pool_reuses_and_replaces_workers(self):
+        """
+        Test that the files are processed by long-lived workers that are
+        replaced after processing max_files files
+        """
+        dag_file = os.path.join(TEST_DAGS_FOLDER, 'test_scheduler_dags.py')
+        pool = DagFileProcessorPool(pickle_dags=False,
+                                    dag_id_white_list=[],
+                                    max_files=2,
+                                    max_memory_mb=0)
+
+        def process():
+            processor = PooledDagFileProcessor(dag_file, pool)
+            processor.start()
+            with timeout(seconds=60):
+                while not processor.done:
+                    time.sleep(0.1)
+            self.assertEqual(processor.exit_code, 0)
+            self.assertIn('test_start_date_scheduling',
+                          [simple_dag.dag_id for simple_dag in processor.result])
+            return processor.pid
+
+        try:
+            first_pid = process()
+            self.assertEqual(process(), first_pid)
+            self.assertNotEqual(process(), first_pid)
+            self.assertEqual(len(pool.get_all_pids()), 1)
+        finally:
+            pool.terminate()
+
     def test_scheduler_dagrun_once(self):
         """
         Test if the scheduler does not create multiple dagruns
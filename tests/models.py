@@ -17,6 +17,7 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import copy
 import datetime
 import logging
 import os
@@ -36,6 +37,7 @@ from airflow.models import DagModel, DagStat
 from airflow.models import clear_task_instances
 from airflow.models import XCom
 from airflow.models import Connection
+from airflow.models import TaskReschedule
 from airflow.operators.dummy_operator import DummyOperator
 from airflow.operators.bash_operator import BashOperator
 from airflow.operators.python_operator import PythonOperator
@@ -294,6 +296,33 @@ class DagTest(unittest.TestCase):
             with self.assertRaises(AirflowException):
                 DummyOperator(task_id='should_fail', weight_rule='no rule')
 
+    def test_dag_graph_index_cleared_on_change(self):
+        dag = DAG('dag', start_date=DEFAULT_DATE,
+                  default_args={'owner': 'owner1'})
+        with dag:
+            op1 = DummyOperator(task_id='A')
+            op2 = DummyOperator(task_id='B')
+            op1.set_downstream(op2)
+
+        graph_index = dag.graph_index
+        self.assertIs(dag.graph_index, graph_index)
+        self.assertEqual(dag.topological_sort(), (op1, op2))
+        self.assertEqual(op1.get_flat_relative_ids(), {'B'})
+        self.assertEqual(op1.priority_weight_total, 2)
+
+        op3 = DummyOperator(task_id='C', dag=dag)
+        self.assertIsNot(dag.graph_index, graph_index)
+        op2.set_downstream(op3)
+        self.assertEqual(op1.get_flat_relative_ids(), {'B', 'C'})
+        self.assertEqual(op3.get_flat_relative_ids(upstream=True), {'A', 'B'})
+        self.assertEqual(op1.downstream_list, [op2])
+        self.assertEqual(op1.priority_weight_total, 3)
+
+        # the index isn't pickled nor copied
+        self.assertIsNone(dag.__getstate__()['_graph_index'])
+        sub_dag = dag.sub_dag('B', include_upstream=False)
+        self.assertEqual(sub_dag.topological_sort(), (sub_dag.task_dict['B'],))
+
 
     def test_get_num_task_instances(self):
         test_dag_id = 'test_get_num_task_instances_dag'
@@ -613,6 +642,127 @@ class DagRunTest(unittest.TestCase):
         dr.update_state()
         self.assertEqual(dr.state, State.FAILED)
 
+    def test_dagrun_deadlock_confirmed_against_database(self):
+        session = settings.Session()
+        dag = DAG(
+            'test_dagrun_deadlock_confirmed_against_database',
+            start_date=DEFAULT_DATE,
+            default_args={'owner': 'owner1'})
+
+        with dag:
+            op1 = DummyOperator(task_id='A')
+            op2 = DummyOperator(task_id='B')
+            op2.set_upstream(op1)
+        # An unknown trigger rule is never met, like in test_dagrun_deadlock,
+        # it can only be set after the operator was built
+        op2.trigger_rule = 'invalid'
+
+        dag.clear()
+        now = timezone.utcnow()
+        dr = dag.create_dagrun(run_id='test_dagrun_deadlock_confirmed',
+                               state=State.RUNNING,
+                               execution_date=now,
+                               start_date=now)
+        dr.get_task_instance(task_id=op1.task_id).set_state(State.SUCCESS, session)
+
+        # the task instances are not queried one by one
+        with patch.object(TI, 'current_state') as current_state:
+            # a state changed by another process since the task instances
+            # were loaded prevents the deadlock
+            with patch.object(models.DagRun, '_task_states_changed',
+                              return_value=True):
+                dr.update_state()
+            self.assertEqual(dr.state, State.RUNNING)
+
+            dr.update_state()
+            self.assertEqual(dr.state, State.FAILED)
+            current_state.assert_not_called()
+
+    def test_dagrun_no_deadlock_with_rescheduled_sensor(self):
+        session = settings.Session()
+        dag = DAG(
+            'test_dagrun_no_deadlock_with_rescheduled_sensor',
+            start_date=DEFAULT_DATE,
+            default_args={'owner': 'owner1'})
+
+        with dag:
+            sensor = DummyOperator(task_id='sensor')
+            downstream = DummyOperator(task_id='downstream')
+            downstream.set_upstream(sensor)
+
+        dag.clear()
+        now = timezone.utcnow()
+        dr = dag.create_dagrun(run_id='test_dagrun_no_deadlock_rescheduled',
+                               state=State.RUNNING,
+                               execution_date=now,
+                               start_date=now)
+        ti_sensor = dr.get_task_instance(task_id=sensor.task_id)
+        ti_sensor.set_state(state=State.UP_FOR_RESCHEDULE, session=session)
+        ti_sensor.task = sensor
+        session.add(TaskReschedule(
+            task=sensor,
+            execution_date=ti_sensor.execution_date,
+            try_number=ti_sensor.try_number,
+            start_date=now,
+            end_date=now,
+            reschedule_date=now + datetime.timedelta(hours=1)))
+        session.commit()
+        self.addCleanup(self._clear_task_reschedules, dag.dag_id)
+
+        # The sensor waits for its reschedule date, which is not a deadlock
+        dr.update_state()
+        self.assertEqual(dr.state, State.RUNNING)
+
+    def _clear_task_reschedules(self, dag_id):
+        session = settings.Session()
+        session.query(TaskReschedule).filter(
+            TaskReschedule.dag_id == dag_id).delete()
+        session.commit()
+        session.close()
+
+    def test_dagrun_verify_integrity_skipped_until_dag_changes(self):
+        dag = DAG(
+            'test_dagrun_verify_integrity_skipped_until_dag_changes',
+            start_date=DEFAULT_DATE,
+            default_args={'owner': 'owner1'})
+        with dag:
+            DummyOperator(task_id='A', priority_weight=3, pool='test_pool')
+
+        dag.clear()
+        dr = self.create_dag_run(dag)
+        ti = dr.get_task_instance('A')
+        self.assertEqual(ti.priority_weight, 3)
+        self.assertEqual(ti.pool, 'test_pool')
+        self.assertEqual(ti.try_number, 1)
+
+        with patch.object(models.DagRun, 'get_task_instances') as get_tis:
+            dr.verify_integrity()
+            get_tis.assert_not_called()
+
+        DummyOperator(task_id='B', dag=dag)
+        dr.verify_integrity()
+        self.assertEqual(sorted(ti.task_id for ti in dr.get_task_instances()),
+                         ['A', 'B'])
+
+    def test_dagrun_verify_integrity_forgets_finished_runs(self):
+        dag = DAG(
+            'test_dagrun_verify_integrity_forgets_finished_runs',
+            start_date=DEFAULT_DATE,
+            default_args={'owner': 'owner1'})
+        with dag:
+            DummyOperator(task_id='A')
+
+        dag.clear()
+        dr = self.create_dag_run(dag)
+        self.assertIn(dr.id, dag._verified_integrity)
+        # Copies of the DAG don't know the runs verified against it
+        self.assertEqual(dag.__getstate__()['_verified_integrity'], {})
+        self.assertEqual(copy.deepcopy(dag)._verified_integrity, {})
+
+        dr.get_task_instance('A').set_state(State.SUCCESS)
+        self.assertEqual(dr.update_state(), State.SUCCESS)
+        self.assertNotIn(dr.id, dag._verified_integrity)
+
     def test_dagrun_no_deadlock(self):
         session = settings.Session()
         dag = DAG('test_dagrun_no_deadlock',
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from datetime import timedelta
+
+from freezegun import freeze_time
+
+from airflow import DAG, configuration, settings
+from airflow.exceptions import AirflowException, AirflowSensorTimeout
+from airflow.models import DagRun, TaskInstance, TaskReschedule
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.sensors.base_sensor_operator import BaseSensorOperator, poke_in_batches
+from airflow.ti_deps.deps.ready_to_reschedule_dep import ReadyToRescheduleDep
+from airflow.utils import timezone
+from airflow.utils.state import State
+from airflow.utils.timezone import datetime
+
+configuration.load_test_config()
+
+DEFAULT_DATE = datetime(2015, 1, 1)
+TEST_DAG_ID = 'unit_test_base_sensor_dag'
+SENSOR_OP = 'sensor_op'
+
+
+class DummySensor(BaseSensorOperator):
+    def __init__(self, return_value=False, **kwargs):
+        super(DummySensor, self).__init__(**kwargs)
+        self.return_value = return_value
+
+    def poke(self, context):
+        return self.return_value
+
+
+class BatchedSensor(BaseSensorOperator):
+    poke_batch_calls = []
+
+    def __init__(self, conn_id, targets, **kwargs):
+        super(BatchedSensor, self).__init__(**kwargs)
+        self.conn_id = conn_id
+        self.targets = targets
+
+    def get_poke_batch_key(self):
+        return self.conn_id
+
+    def get_poke_targets(self):
+        return self.targets
+
+    @classmethod
+    def poke_batch(cls, batch_key, targets):
+        cls.poke_batch_calls.append((batch_key, targets))
+        if batch_key == 'broken_conn':
+            raise Exception('Connection refused')
+        return {target for target in targets if target.startswith('met')}
+
+
+class BaseSensorTest(unittest.TestCase):
+    def setUp(self):
+        configuration.load_test_config()
+        args = {
+            'owner': 'airflow',
+            'start_date': DEFAULT_DATE
+        }
+        self.dag = DAG(TEST_DAG_ID, default_args=args)
+
+        session = settings.Session()
+        session.query(TaskReschedule).delete()
+        session.query(DagRun).delete()
+        session.query(TaskInstance).delete()
+        session.commit()
+        session.close()
+
+    def _make_dag_run(self):
+        return self.dag.create_dagrun(
+            run_id='manual__',
+            start_date=timezone.utcnow(),
+            execution_date=DEFAULT_DATE,
+            state=State.RUNNING
+        )
+
+    def _make_sensor(self, return_value, **kwargs):
+        poke_interval = 'poke_interval'
+        timeout = 'timeout'
+        if poke_interval not in kwargs:
+            kwargs[poke_interval] = 0
+        if timeout not in kwargs:
+            kwargs[timeout] = 0
+
+        sensor = DummySensor(
+            task_id=SENSOR_OP,
+            return_value=return_value,
+            dag=self.dag,
+            **kwargs
+        )
+
+        dummy_op = DummyOperator(
+            task_id='dummy_op',
+            dag=self.dag
+        )
+        dummy_op.set_upstream(sensor)
+        return sensor
+
+    def _get_sensor_ti(self, dr):
+        return [ti for ti in dr.get_task_instances()
+                if ti.task_id == SENSOR_OP][0]
+
+    def test_invalid_mode(self):
+        with self.assertRaises(AirflowException):
+            self._make_sensor(return_value=True, mode='foo')
+
+    def test_sensor_deps_include_ready_to_reschedule(self):
+        sensor = self._make_sensor(return_value=True)
+        self.assertIn(ReadyToRescheduleDep(), sensor.deps)
+
+    def test_poke_in_batches(self):
+        BatchedSensor.poke_batch_calls = []
+        sensors = [
+            BatchedSensor(task_id='s0', conn_id='conn_a', targets=['met_1']),
+            BatchedSensor(task_id='s1', conn_id='conn_a',
+                          targets=['met_1', 'unmet_1']),
+            BatchedSensor(task_id='s2', conn_id='conn_b', targets=['met_2']),
+            BatchedSensor(task_id='s3', conn_id='broken_conn', targets=['met_3']),
+        ]
+
+        results = poke_in_batches(sensors)
+
+        self.assertEqual(results, {0: True, 1: False, 2: True})
+        self.assertEqual(sorted(BatchedSensor.poke_batch_calls), [
+            ('broken_conn', {'met_3'}),
+            ('conn_a', {'met_1', 'unmet_1'}),
+            ('conn_b', {'met_2'}),
+        ])
+
+    def test_ok_with_reschedule(self):
+        sensor = self._make_sensor(
+            return_value=None,
+            poke_interval=10,
+            timeout=25,
+            mode='reschedule')
+        sensor.poke = lambda context: False
+        dr = self._make_dag_run()
+
+        # first poke returns False and task is re-scheduled
+        date1 = timezone.utcnow()
+        with freeze_time(date1):
+            self._run(sensor)
+        ti = self._get_sensor_ti(dr)
+        self.assertEqual(ti.state, State.UP_FOR_RESCHEDULE)
+        # the try number is kept for the next poke
+        self.assertEqual(ti.try_number, 1)
+        task_reschedules = TaskReschedule.find_for_task_instance(ti)
+        self.assertEqual(len(task_reschedules), 1)
+        self.assertEqual(task_reschedules[0].start_date, date1)
+        self.assertEqual(task_reschedules[0].reschedule_date,
+                         date1 + timedelta(seconds=sensor.poke_interval))
+
+        # the task isn't ready until the reschedule date passed
+        with freeze_time(date1 + timedelta(seconds=5)):
+            self.assertFalse(ReadyToRescheduleDep().is_met(ti=ti))
+
+        # second poke returns False and task is re-scheduled
+        date2 = date1 + timedelta(seconds=sensor.poke_interval)
+        with freeze_time(date2):
+            self.assertTrue(ReadyToRescheduleDep().is_met(ti=ti))
+            self._run(sensor)
+        ti = self._get_sensor_ti(dr)
+        self.assertEqual(ti.state, State.UP_FOR_RESCHEDULE)
+        task_reschedules = TaskReschedule.find_for_task_instance(ti)
+        self.assertEqual(len(task_reschedules), 2)
+        self.assertEqual(task_reschedules[1].start_date, date2)
+
+        # third poke returns True and task succeeds
+        sensor.poke = lambda context: True
+        date3 = date2 + timedelta(seconds=sensor.poke_interval)
+        with freeze_time(date3):
+            self._run(sensor)
+        ti = self._get_sensor_ti(dr)
+        self.assertEqual(ti.state, State.SUCCESS)
+        self.assertEqual(ti.try_number, 2)
+
+    def test_fail_with_reschedule(self):
+        sensor = self._make_sensor(
+            return_value=False,
+            poke_interval=10,
+            timeout=5,
+            mode='reschedule')
+        dr = self._make_dag_run()
+
+        # first poke returns False and task is re-scheduled
+        date1 = timezone.utcnow()
+        with freeze_time(date1):
+            self._run(sensor)
+        ti = self._get_sensor_ti(dr)
+        self.assertEqual(ti.state, State.UP_FOR_RESCHEDULE)
+
+        # second poke times out as the timeout counts from the first poke
+        date2 = date1 + timedelta(seconds=sensor.poke_interval)
+        with freeze_time(date2):
+            with self.assertRaises(AirflowSensorTimeout):
+                self._run(sensor)
+        ti = self._get_sensor_ti(dr)
+        self.assertEqual(ti.state, State.FAILED)
+
+    def test_clear_removes_task_reschedules(self):
+        sensor = self._make_sensor(
+            return_value=False,
+            poke_interval=10,
+            timeout=25,
+            mode='reschedule')
+        dr = self._make_dag_run()
+        self._run(sensor)
+        ti = self._get_sensor_ti(dr)
+        self.assertEqual(len(TaskReschedule.find_for_task_instance(ti)), 1)
+
+        self.dag.clear()
+        ti = self._get_sensor_ti(dr)
+        self.assertEqual(ti.state, State.NONE)
+        self.assertEqual(TaskReschedule.find_for_task_instance(ti), [])
+
+    def _run(self, task):
+        task.run(start_date=DEFAULT_DATE, end_date=DEFAULT_DATE,
+                 ignore_ti_state=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from mock import patch
+
+from airflow.sensors.s3_key_sensor import S3KeySensor
+
+
+class S3KeySensorPokeBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch('airflow.hooks.S3_hook.S3Hook')
+        self.hook = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_keys_of_a_folder_are_listed_once(self):
+        self.hook.list_keys.return_value = ['data/2018/a.csv', 'data/2018/c.csv']
+        targets = [('bucket', 'data/2018/a.csv', False),
+                   ('bucket', 'data/2018/b.csv', False)]
+
+        met = S3KeySensor.poke_batch('aws_default', targets)
+
+        self.assertEqual(met, {('bucket', 'data/2018/a.csv', False)})
+        self.hook.list_keys.assert_called_once_with(
+            'bucket', prefix='data/2018/', delimiter='/')
+        self.hook.check_for_key.assert_not_called()
+
+    def test_unrelated_keys_are_not_listed_together(self):
+        self.hook.check_for_key.side_effect = lambda key, bucket: key.startswith('data')
+        targets = [('bucket', 'data/2018/a.csv', False),
+                   ('bucket', 'logs/2018/a.log', False)]
+
+        met = S3KeySensor.poke_batch('aws_default', targets)
+
+        self.assertEqual(met, {('bucket', 'data/2018/a.csv', False)})
+        # Never the whole bucket
+        self.hook.list_keys.assert_not_called()
+        self.assertEqual(self.hook.check_for_key.call_count, 2)
+
+    def test_wildcard_keys_are_listed_by_prefix(self):
+        self.hook.list_keys.return_value = ['data/2018/a.csv', 'data/2018/b.json']
+        targets = [('bucket', 'data/2018/*.csv', True),
+                   ('bucket', 'data/2018/*.parquet', True),
+                   ('bucket', 'logs/*.log', True)]
+        self.hook.check_for_wildcard_key.return_value = None
+
+        met = S3KeySensor.poke_batch('aws_default', targets)
+
+        self.assertEqual(met, {('bucket', 'data/2018/*.csv', True)})
+        self.hook.list_keys.assert_called_once_with(
+            'bucket', prefix='data/2018/', delimiter='')
+        self.hook.check_for_wildcard_key.assert_called_once_with(
+            'logs/*.log', 'bucket')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import getpass
+import time
+import unittest
+
+from mock import Mock, patch
+
+from airflow import configuration, settings
+from airflow.bin import cli
+from airflow.jobs import LocalTaskJob
+from airflow.models import DAG, TaskInstance
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.task.task_runner.fork_task_runner import ForkTaskRunner
+from airflow.utils import timezone
+
+configuration.load_test_config()
+
+DEFAULT_DATE = timezone.datetime(2016, 1, 1)
+
+
+class ForkTaskRunnerTest(unittest.TestCase):
+
+    def setUp(self):
+        dag = DAG('test_fork_task_runner', start_date=DEFAULT_DATE)
+        task = DummyOperator(task_id='task', dag=dag)
+        self.ti = TaskInstance(task=task, execution_date=DEFAULT_DATE)
+        self.runner = ForkTaskRunner(LocalTaskJob(self.ti))
+        self.addCleanup(self.runner.on_finish)
+
+    def run_in_fork(self, func):
+        """
+        Starts the runner with the raw task replaced by `func` and waits for
+        its return code.
+        """
+        args = Mock(func=func)
+        with patch.object(cli, 'get_parser') as get_parser:
+            get_parser.return_value.parse_args.return_value = args
+            self.runner.start()
+        return self.wait_for_return_code()
+
+    def wait_for_return_code(self, timeout=30):
+        start = time.time()
+        while time.time() - start < timeout:
+            return_code = self.runner.return_code()
+            if return_code is not None:
+                return return_code
+            time.sleep(0.1)
+        self.fail("The forked process didn't exit")
+
+    def test_start_forks_raw_task(self):
+        dag = self.ti.task.dag
+
+        def raw_task(args, dag=None):
+            # The raw task gets the DAG of the local task job
+            if dag is not self.ti.task.dag:
+                raise ValueError()
+
+        with patch.object(settings.engine, 'dispose',
+                          wraps=settings.engine.dispose) as dispose:
+            self.assertEqual(self.run_in_fork(raw_task), 0)
+        # The pooled connections are closed rather than shared with the fork
+        dispose.assert_called_once_with()
+        self.assertIs(self.ti.task.dag, dag)
+
+    def test_start_raw_task_fails(self):
+        def raw_task(args, dag=None):
+            raise ValueError()
+
+        self.assertEqual(self.run_in_fork(raw_task), 1)
+
+    def test_return_code_is_kept(self):
+        def raw_task(args, dag=None):
+            time.sleep(1)
+
+        self.assertEqual(self.run_in_fork(raw_task), 0)
+        # The return code is kept once the process was waited for
+        self.assertEqual(self.runner.return_code(), 0)
+
+    def test_terminate(self):
+        def raw_task(args, dag=None):
+            time.sleep(60)
+
+        with patch.object(cli, 'get_parser') as get_parser:
+            get_parser.return_value.parse_args.return_value = Mock(func=raw_task)
+            self.runner.start()
+        self.assertIsNone(self.runner.return_code())
+
+        self.runner.terminate()
+        return_code = self.runner.return_code()
+        self.assertIsNotNone(return_code)
+        self.assertNotEqual(return_code, 0)
+
+    @patch('os.fork')
+    def test_start_without_dag_runs_bash(self, fork):
+        self.runner._dag = None
+        with patch.object(self.runner, 'run_command') as run_command:
+            self.runner.start()
+        run_command.assert_called_once_with(['bash', '-c'], join_args=True)
+        fork.assert_not_called()
+
+        run_command.return_value.poll.return_value = 0
+        self.assertEqual(self.runner.return_code(), 0)
+
+    @patch('os.fork')
+    def test_start_as_other_user_runs_bash(self, fork):
+        self.runner.run_as_user = getpass.getuser() + '_other'
+        with patch.object(self.runner, 'run_command') as run_command:
+            self.runner.start()
+        run_command.assert_called_once_with(['bash', '-c'], join_args=True)
+        fork.assert_not_called()
+
+    @patch('os.fork')
+    def test_start_as_current_user_forks(self, fork):
+        fork.return_value = 0
+        self.runner.run_as_user = getpass.getuser()
+        with patch.object(self.runner, '_run_raw_task') as run_raw_task, \
+                patch('os._exit') as exit:
+            self.runner.start()
+        run_raw_task.assert_called_once_with()
+        exit.assert_called_once_with(0)
+
+
+if __name__ == '__main__':
+    unittest.main()
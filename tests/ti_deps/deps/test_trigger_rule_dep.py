@@ -15,8 +15,13 @@
 import unittest
 from datetime import datetime
 
-from airflow.models import BaseOperator, TaskInstance
+from mock import Mock
+
+from airflow import settings
+from airflow.models import BaseOperator, DAG, TaskInstance
+from airflow.operators.dummy_operator import DummyOperator
 from airflow.utils.trigger_rule import TriggerRule
+from airflow.ti_deps.dep_context import DepContext
 from airflow.ti_deps.deps.trigger_rule_dep import TriggerRuleDep
 from airflow.utils.state import State
 
@@ -250,3 +255,106 @@ class TriggerRuleDepTest(unittest.TestCase):
 
         self.assertEqual(len(dep_statuses), 1)
         self.assertFalse(dep_statuses[0].passed)
+
+    def test_get_states_count_upstream_ti(self):
+        """
+        Upstream states are counted in memory from the finished task instances
+        """
+        ti = self._get_task_instance(upstream_task_ids=["a", "b", "c", "d", "e", "f"])
+        finished_task_states = {
+            "a": State.SUCCESS,
+            "b": State.SKIPPED,
+            "c": State.FAILED,
+            "d": State.UPSTREAM_FAILED,
+            "e": State.SHUTDOWN,
+            "not_upstream": State.SUCCESS,
+        }
+        self.assertEqual(
+            TriggerRuleDep._get_states_count_upstream_ti(ti, finished_task_states),
+            (1, 1, 1, 1, 4))
+
+    def _get_dag_task_instances(self, upstream_states):
+        dag = DAG('test_dag', start_date=datetime(2015, 1, 1))
+        task = DummyOperator(task_id='test_task', dag=dag)
+        upstream_tis = []
+        for task_id, state in upstream_states:
+            upstream_task = DummyOperator(task_id=task_id, dag=dag)
+            task.set_upstream(upstream_task)
+            upstream_tis.append(TaskInstance(task=upstream_task, state=state,
+                                             execution_date=None))
+        return TaskInstance(task=task, execution_date=None), upstream_tis
+
+    def test_finished_tasks_in_dep_context(self):
+        """
+        Trigger rules are evaluated without querying the database when the context
+        holds the finished task instances of the DagRun
+        """
+        ti, upstream_tis = self._get_dag_task_instances(
+            [("a", State.SUCCESS), ("b", State.SUCCESS)])
+        session = Mock()
+
+        dep_context = DepContext(finished_tasks=upstream_tis[:1])
+        self.assertFalse(TriggerRuleDep().is_met(ti=ti, session=session,
+                                                 dep_context=dep_context))
+
+        dep_context = DepContext(finished_tasks=upstream_tis)
+        self.assertTrue(TriggerRuleDep().is_met(ti=ti, session=session,
+                                                dep_context=dep_context))
+        session.query.assert_not_called()
+
+    def test_flagged_task_added_to_finished_tasks(self):
+        """
+        Task instances flagged as upstream failed are visible to the task instances
+        evaluated afterwards with the same context
+        """
+        ti, upstream_tis = self._get_dag_task_instances([("a", State.FAILED)])
+        dep_context = DepContext(flag_upstream_failed=True, finished_tasks=upstream_tis)
+
+        self.assertFalse(TriggerRuleDep().is_met(ti=ti, session=Mock(),
+                                                 dep_context=dep_context))
+        self.assertEqual(ti.state, State.UPSTREAM_FAILED)
+        self.assertEqual(dep_context.finished_task_states["test_task"],
+                         State.UPSTREAM_FAILED)
+        self.assertIn(ti, dep_context.finished_tasks)
+
+    def test_finished_tasks_match_database_query(self):
+        """
+        The in-memory evaluation gives the same results as the database query
+        """
+        execution_date = datetime(2016, 1, 1)
+        dag = DAG('test_trigger_rule_dep_finished_tasks', start_date=execution_date)
+        states = [State.SUCCESS, State.SKIPPED, State.FAILED, State.UPSTREAM_FAILED,
+                  State.RUNNING, None]
+        upstream = [DummyOperator(task_id='upstream_{}'.format(i), dag=dag)
+                    for i in range(len(states))]
+        downstream = []
+        for trigger_rule in TriggerRule.all_triggers():
+            task = DummyOperator(task_id='downstream_{}'.format(trigger_rule),
+                                 trigger_rule=trigger_rule, dag=dag)
+            task.set_upstream(upstream)
+            downstream.append(task)
+
+        session = settings.Session()
+        tis = []
+        for task, state in zip(upstream, states):
+            ti = TaskInstance(task=task, execution_date=execution_date, state=state)
+            session.merge(ti)
+            tis.append(ti)
+        session.commit()
+
+        finished_tasks = [ti for ti in tis if ti.state in
+                          State.finished() + [State.UPSTREAM_FAILED]]
+        try:
+            for task in downstream:
+                ti = TaskInstance(task=task, execution_date=execution_date)
+                dep = TriggerRuleDep()
+                from_db = [status.passed for status in dep.get_dep_statuses(
+                    ti, session, DepContext())]
+                in_memory = [status.passed for status in dep.get_dep_statuses(
+                    ti, session, DepContext(finished_tasks=finished_tasks))]
+                self.assertEqual(from_db, in_memory)
+        finally:
+            session.query(TaskInstance).filter(
+                TaskInstance.dag_id == dag.dag_id).delete()
+            session.commit()
+            session.close()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import mock
+
+from airflow import configuration
+from airflow.models import TaskInstance, DAG
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.utils.log.gcs_task_handler import GCSTaskHandler
+from airflow.utils.timezone import datetime
+
+
+class TestGCSTaskHandler(unittest.TestCase):
+
+    def setUp(self):
+        configuration.load_test_config()
+        self.remote_log_location = 'gs://bucket/remote/log/location/1.log'
+        self.gcs_task_handler = GCSTaskHandler(
+            'local/log/location',
+            'gs://bucket/remote/log/location',
+            '{try_number}.log'
+        )
+        self.hook = self.gcs_task_handler._hook = mock.MagicMock()
+
+        date = datetime(2016, 1, 1)
+        self.dag = DAG('dag_for_testing_gcs_task_handler', start_date=date)
+        task = DummyOperator(task_id='task_for_testing_gcs_task_handler', dag=self.dag)
+        self.ti = TaskInstance(task=task, execution_date=date)
+        self.ti.try_number = 1
+
+    def test_read_range(self):
+        self.hook.get_size.return_value = '10'
+        self.hook.download_range.return_value = b'2345'
+
+        header, data, size = self.gcs_task_handler._read_range(self.ti, 1, 2, 4)
+
+        self.assertEqual(
+            header, '*** Reading remote log from {}.\n'.format(self.remote_log_location))
+        self.assertEqual((data, size), (b'2345', 10))
+        self.hook.get_size.assert_called_once_with('bucket', 'remote/log/location/1.log')
+        self.hook.download_range.assert_called_once_with(
+            'bucket', 'remote/log/location/1.log', 2, 4)
+
+    def test_read_range_past_end(self):
+        self.hook.get_size.return_value = '10'
+
+        header, data, size = self.gcs_task_handler._read_range(self.ti, 1, 10, None)
+
+        self.assertEqual((data, size), (b'', 10))
+        self.hook.download_range.assert_not_called()
+
+    def test_read_range_without_remote_log(self):
+        self.hook.get_size.side_effect = ValueError('missing')
+        with mock.patch('airflow.utils.log.file_task_handler.FileTaskHandler._read_range',
+                        return_value=('local\n', b'', None)) as read_range:
+            header, data, size = self.gcs_task_handler._read_range(self.ti, 1, 0, None)
+
+        read_range.assert_called_once_with(self.ti, 1, 0, None)
+        self.assertIn('Unable to read remote log', header)
+        self.assertTrue(header.endswith('local\n'))
+        self.assertEqual((data, size), (b'', None))
+
+    def test_write_file(self):
+        self.hook.exists.return_value = False
+
+        self.gcs_task_handler.gcs_write_file('local.log', self.remote_log_location)
+
+        self.hook.upload.assert_called_once_with(
+            'bucket', 'remote/log/location/1.log', 'local.log',
+            chunk_size=GCSTaskHandler.UPLOAD_CHUNK_SIZE)
+        self.hook.compose.assert_not_called()
+
+    def test_write_file_existing(self):
+        self.hook.exists.return_value = True
+
+        self.gcs_task_handler.gcs_write_file('local.log', self.remote_log_location)
+
+        blob = 'remote/log/location/1.log'
+        self.hook.upload.assert_called_once_with(
+            'bucket', blob + '.append', 'local.log',
+            chunk_size=GCSTaskHandler.UPLOAD_CHUNK_SIZE)
+        self.hook.compose.assert_called_once_with(
+            'bucket', [blob, blob + '.append'], blob)
+        self.hook.delete.assert_called_once_with('bucket', blob + '.append')
+
+    def test_write_file_existing_compose_fails(self):
+        self.hook.exists.return_value = True
+        self.hook.compose.side_effect = ValueError('failed')
+
+        self.gcs_task_handler.gcs_write_file('local.log', self.remote_log_location)
+
+        # The temporary object is removed even if it couldn't be composed
+        self.hook.delete.assert_called_once_with(
+            'bucket', 'remote/log/location/1.log.append')
+
+    def test_write_file_without_append(self):
+        self.gcs_task_handler.gcs_write_file('local.log', self.remote_log_location,
+                                             append=False)
+
+        self.hook.exists.assert_not_called()
+        self.hook.upload.assert_called_once_with(
+            'bucket', 'remote/log/location/1.log', 'local.log',
+            chunk_size=GCSTaskHandler.UPLOAD_CHUNK_SIZE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -65,6 +65,10 @@ class TestS3TaskHandler(unittest.TestCase):
         moto.core.moto_api_backend.reset()
         self.conn.create_bucket(Bucket="bucket")
 
+    def get_remote_log(self):
+        return boto3.resource('s3').Object(
+            'bucket', self.remote_log_key).get()['Body'].read()
+
     def tearDown(self):
         if self.s3_task_handler.handler:
             try:
@@ -112,6 +116,25 @@ class TestS3TaskHandler(unittest.TestCase):
              'Log line\n\n']
         )
 
+    def test_read_range(self):
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key, Body=b'0123456789')
+        header, data, size = self.s3_task_handler._read_range(self.ti, 1, 2, 4)
+        self.assertEqual(
+            header,
+            '*** Reading remote log from s3://bucket/remote/log/location/1.log.\n')
+        self.assertEqual((data, size), (b'2345', 10))
+
+        # Past the end of the log
+        header, data, size = self.s3_task_handler._read_range(self.ti, 1, 10, None)
+        self.assertEqual((data, size), (b'', 10))
+
+    def test_read_range_without_remote_log(self):
+        with mock.patch('airflow.utils.log.file_task_handler.FileTaskHandler._read_range',
+                        return_value=('local', b'', None)) as read_range:
+            self.assertEqual(self.s3_task_handler._read_range(self.ti, 1, 0, None),
+                             ('local', b'', None))
+            read_range.assert_called_once_with(self.ti, 1, 0, None)
+
     def test_read_raises_return_error(self):
         handler = self.s3_task_handler
         url = 's3://nonexistentbucket/foo'
@@ -126,14 +149,14 @@ class TestS3TaskHandler(unittest.TestCase):
             self.s3_task_handler.s3_write('text', self.remote_log_location)
             # We shouldn't expect any error logs in the default working case.
             mock_error.assert_not_called()
-        body = boto3.resource('s3').Object('bucket', self.remote_log_key).get()['Body'].read()
+        body = self.get_remote_log()
 
         self.assertEqual(body, b'text')
 
     def test_write_existing(self):
         self.conn.put_object(Bucket='bucket', Key=self.remote_log_key, Body=b'previous ')
         self.s3_task_handler.s3_write('text', self.remote_log_location)
-        body = boto3.resource('s3').Object('bucket', self.remote_log_key).get()['Body'].read()
+        body = self.get_remote_log()
 
         self.assertEqual(body, b'previous \ntext')
 
@@ -146,6 +169,59 @@ class TestS3TaskHandler(unittest.TestCase):
             mock_error.assert_called_once_with(
                 'Could not write logs to %s', url, exc_info=True)
 
+    def _write_local_log(self, data):
+        local_log_file = os.path.join(self.local_log_location, 'upload.log')
+        if not os.path.exists(self.local_log_location):
+            os.makedirs(self.local_log_location)
+        with open(local_log_file, 'wb') as f:
+            f.write(data)
+        self.addCleanup(os.remove, local_log_file)
+        return local_log_file
+
+    def test_write_file(self):
+        local_log_file = self._write_local_log(b'text')
+        with mock.patch.object(self.s3_task_handler.log, 'error') as mock_error:
+            self.s3_task_handler.s3_write_file(local_log_file,
+                                               self.remote_log_location)
+            mock_error.assert_not_called()
+        body = self.get_remote_log()
+
+        self.assertEqual(body, b'text')
+
+    def test_write_file_existing(self):
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key, Body=b'previous ')
+        local_log_file = self._write_local_log(b'text')
+        self.s3_task_handler.s3_write_file(local_log_file,
+                                           self.remote_log_location)
+        body = self.get_remote_log()
+
+        self.assertEqual(body, b'previous text')
+
+    def test_write_file_existing_large(self):
+        # Large enough to be copied as the first part of the upload
+        previous = b'p' * S3Hook.MIN_PART_SIZE
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key, Body=previous)
+        local_log_file = self._write_local_log(b'text')
+        self.s3_task_handler.s3_write_file(local_log_file,
+                                           self.remote_log_location)
+        body = self.get_remote_log()
+
+        self.assertEqual(body, previous + b'text')
+
+    def test_close_chunked_upload(self):
+        configuration.set('core', 'remote_log_chunked_upload', 'True')
+        self.addCleanup(configuration.set, 'core', 'remote_log_chunked_upload', 'False')
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key, Body=b'previous\n')
+        self.s3_task_handler.set_context(self.ti)
+        self.s3_task_handler.handler.stream.write('text\n')
+
+        with mock.patch.object(self.s3_task_handler, 's3_write') as mock_write:
+            self.s3_task_handler.close()
+            mock_write.assert_not_called()
+        body = self.get_remote_log()
+
+        self.assertEqual(body, b'previous\ntext\n')
+
     def test_close(self):
         self.s3_task_handler.set_context(self.ti)
         self.assertTrue(self.s3_task_handler.upload_on_close)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import mock
+
+from airflow import configuration
+from airflow.models import TaskInstance, DAG
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.utils.timezone import datetime
+
+try:
+    from airflow.utils.log.wasb_task_handler import WasbTaskHandler
+    from azure.common import AzureHttpError
+except ImportError:
+    WasbTaskHandler = None
+
+
+@unittest.skipIf(WasbTaskHandler is None,
+                 "Skipping test because the azure packages are not available")
+class TestWasbTaskHandler(unittest.TestCase):
+
+    def setUp(self):
+        configuration.load_test_config()
+        self.remote_log_location = 'remote/log/location/1.log'
+        self.wasb_task_handler = WasbTaskHandler(
+            'local/log/location',
+            'remote/log/location',
+            'container',
+            '{try_number}.log',
+            delete_local_copy=False
+        )
+        self.hook = self.wasb_task_handler._hook = mock.MagicMock()
+
+        date = datetime(2016, 1, 1)
+        self.dag = DAG('dag_for_testing_wasb_task_handler', start_date=date)
+        task = DummyOperator(task_id='task_for_testing_wasb_task_handler', dag=self.dag)
+        self.ti = TaskInstance(task=task, execution_date=date)
+        self.ti.try_number = 1
+
+    def test_read_range(self):
+        self.hook.check_for_blob.return_value = True
+        self.hook.get_blob_size.return_value = 10
+        self.hook.read_file_range.return_value = b'2345'
+
+        header, data, size = self.wasb_task_handler._read_range(self.ti, 1, 2, 4)
+
+        self.assertEqual(
+            header, '*** Reading remote log from {}.\n'.format(self.remote_log_location))
+        self.assertEqual((data, size), (b'2345', 10))
+        self.hook.read_file_range.assert_called_once_with(
+            'container', self.remote_log_location, 2, 4)
+
+    def test_read_range_past_end(self):
+        self.hook.check_for_blob.return_value = True
+        self.hook.get_blob_size.return_value = 10
+
+        header, data, size = self.wasb_task_handler._read_range(self.ti, 1, 10, None)
+
+        self.assertEqual((data, size), (b'', 10))
+        self.hook.read_file_range.assert_not_called()
+
+    def test_read_range_fails(self):
+        self.hook.check_for_blob.return_value = True
+        self.hook.get_blob_size.side_effect = AzureHttpError('failed', 500)
+
+        header, data, size = self.wasb_task_handler._read_range(self.ti, 1, 0, None)
+
+        self.assertIn('Could not read logs from', header)
+        self.assertEqual((data, size), (b'', None))
+
+    def test_read_range_without_remote_log(self):
+        self.hook.check_for_blob.return_value = False
+        with mock.patch('airflow.utils.log.file_task_handler.FileTaskHandler._read_range',
+                        return_value=('local', b'', None)) as read_range:
+            self.assertEqual(self.wasb_task_handler._read_range(self.ti, 1, 0, None),
+                             ('local', b'', None))
+        read_range.assert_called_once_with(self.ti, 1, 0, None)
+
+    def test_write_file(self):
+        self.wasb_task_handler.wasb_write_file('local.log', self.remote_log_location)
+
+        self.hook.append_file.assert_called_once_with(
+            'local.log', 'container', self.remote_log_location)
+        self.hook.load_file.assert_not_called()
+
+    def test_write_file_without_append(self):
+        self.wasb_task_handler.wasb_write_file('local.log', self.remote_log_location,
+                                               append=False)
+
+        self.hook.load_file.assert_called_once_with(
+            'local.log', 'container', self.remote_log_location)
+        self.hook.append_file.assert_not_called()
+
+    def test_write_file_fails(self):
+        self.hook.append_file.side_effect = AzureHttpError('failed', 500)
+
+        with mock.patch.object(self.wasb_task_handler.log, 'exception') as log:
+            self.wasb_task_handler.wasb_write_file('local.log', self.remote_log_location)
+
+        log.assert_called_once_with('Could not write logs to %s',
+                                    self.remote_log_location)
+
+
+if __name__ == '__main__':
+    unittest.main()
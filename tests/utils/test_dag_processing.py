@@ -12,11 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import shutil
+import tempfile
 import unittest
+from datetime import timedelta
 
-from mock import MagicMock
+from mock import MagicMock, patch
 
-from airflow.utils.dag_processing import DagFileProcessorManager
+from airflow.models import DAG
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.utils import timezone
+from airflow.utils.dag_processing import (DagFileIndex, DagFileParseCache,
+                                          DagFileProcessorManager, DagPickleCache)
 
 
 class TestDagFileProcessorManager(unittest.TestCase):
@@ -49,3 +57,192 @@ class TestDagFileProcessorManager(unittest.TestCase):
 
         manager.set_file_paths(['abc.txt'])
         self.assertDictEqual(manager._processors, {'abc.txt': mock_processor})
+
+    @staticmethod
+    def _processor_factory(file_path):
+        processor = MagicMock()
+        processor.file_path = file_path
+        processor.done = False
+        processor.start_time = timezone.utcnow()
+        return processor
+
+    def test_heartbeat_does_not_wait_for_empty_queue(self):
+        manager = DagFileProcessorManager(dag_directory='directory',
+                                          file_paths=['a.py', 'b.py', 'c.py'],
+                                          parallelism=1, process_file_interval=0,
+                                          max_runs=-1,
+                                          processor_factory=self._processor_factory)
+        manager.heartbeat()
+        self.assertEqual(list(manager._processors.keys()), ['a.py'])
+
+        manager._processors['a.py'].done = True
+        manager._processors['a.py'].result = []
+        manager.heartbeat()
+        # a.py is due again and queued behind the files that waited longer
+        self.assertEqual(list(manager._processors.keys()), ['b.py'])
+        self.assertEqual(sorted(manager._queued_due_times.keys()), ['a.py', 'c.py'])
+
+    def test_heartbeat_moves_idle_files_back(self):
+        manager = DagFileProcessorManager(dag_directory='directory',
+                                          file_paths=['idle.py', 'busy.py'],
+                                          parallelism=1, process_file_interval=0,
+                                          max_runs=-1,
+                                          processor_factory=self._processor_factory)
+        last_finish_time = timezone.utcnow() - timedelta(seconds=30)
+        for file_path in manager.file_paths:
+            manager._last_finish_time[file_path] = last_finish_time
+            manager._last_mtime[file_path] = None
+        manager._idle_file_paths.add('idle.py')
+
+        manager.heartbeat()
+        self.assertEqual(list(manager._processors.keys()), ['busy.py'])
+        self.assertGreaterEqual(manager.get_last_latency('busy.py'), 30)
+
+    def test_heartbeat_terminates_slow_processors(self):
+        manager = DagFileProcessorManager(dag_directory='directory',
+                                          file_paths=['slow.py'],
+                                          parallelism=1, process_file_interval=60,
+                                          max_runs=-1,
+                                          processor_factory=self._processor_factory,
+                                          processor_timeout=10)
+        slow_processor = self._processor_factory('slow.py')
+        slow_processor.start_time = timezone.utcnow() - timedelta(seconds=20)
+        manager._processors['slow.py'] = slow_processor
+
+        manager.heartbeat()
+        slow_processor.terminate.assert_called_once_with(sigkill=True)
+        self.assertEqual(manager._processors, {})
+        self.assertIsNotNone(manager.get_last_finish_time('slow.py'))
+
+
+class TestDagFileParseCache(unittest.TestCase):
+    def setUp(self):
+        fd, self.file_path = tempfile.mkstemp(suffix='.py')
+        os.close(fd)
+        self._write('"airflow DAG"')
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def _write(self, content):
+        with open(self.file_path, 'w') as f:
+            f.write(content)
+
+    def test_get_unchanged_file(self):
+        cache = DagFileParseCache(max_age=60)
+        dagbag = MagicMock()
+        signature = DagFileParseCache.get_file_signature(self.file_path)
+        self.assertIsNone(cache.get(self.file_path, signature))
+
+        cache.set(self.file_path, signature, dagbag)
+        self.assertIs(cache.get(self.file_path,
+                                DagFileParseCache.get_file_signature(self.file_path)),
+                      dagbag)
+
+    def test_get_changed_file(self):
+        cache = DagFileParseCache(max_age=60)
+        signature = DagFileParseCache.get_file_signature(self.file_path)
+        cache.set(self.file_path, signature, MagicMock())
+
+        self._write('"airflow DAG changed"')
+        os.utime(self.file_path, (0, signature[0]))
+        self.assertIsNone(cache.get(self.file_path,
+                                    DagFileParseCache.get_file_signature(self.file_path)))
+
+    def test_get_expired_entry(self):
+        cache = DagFileParseCache(max_age=60)
+        signature = DagFileParseCache.get_file_signature(self.file_path)
+        with patch('airflow.utils.dag_processing.time.time', return_value=1000):
+            cache.set(self.file_path, signature, MagicMock())
+        with patch('airflow.utils.dag_processing.time.time', return_value=1061):
+            self.assertIsNone(cache.get(self.file_path, signature))
+
+    def test_get_deleted_file(self):
+        cache = DagFileParseCache(max_age=60)
+        signature = DagFileParseCache.get_file_signature(self.file_path)
+        cache.set(self.file_path, signature, MagicMock())
+        os.remove(self.file_path)
+        self.assertIsNone(DagFileParseCache.get_file_signature(self.file_path))
+        self.assertIsNone(cache.get(self.file_path, None))
+        self._write('')
+
+
+class TestDagPickleCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.folder, 'dag.py')
+        with open(self.file_path, 'w') as f:
+            f.write('"airflow DAG"')
+        self.cache = DagPickleCache(os.path.join(self.folder, 'cache'))
+        self.dag = DAG('test_dag_pickle_cache',
+                       start_date=timezone.datetime(2017, 1, 1))
+        DummyOperator(task_id='dummy', dag=self.dag)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_get_cached_dag(self):
+        signature = DagFileParseCache.get_file_signature(self.file_path)
+        self.assertIsNone(self.cache.get(self.file_path, self.dag.dag_id, signature))
+
+        self.cache.set(self.file_path, self.dag.dag_id, signature, self.dag)
+        dag = self.cache.get(self.file_path, self.dag.dag_id, signature)
+        self.assertEqual(dag.dag_id, self.dag.dag_id)
+        self.assertEqual(dag.task_ids, ['dummy'])
+
+        self.assertIsNone(self.cache.get(self.file_path, 'other_dag', signature))
+        self.assertIsNone(self.cache.get(self.file_path, self.dag.dag_id,
+                                         (signature[0] + 1, signature[1])))
+
+    def test_unloadable_dag_not_pickled_again(self):
+        signature = DagFileParseCache.get_file_signature(self.file_path)
+        self.cache.set(self.file_path, self.dag.dag_id, signature, self.dag)
+        with patch('airflow.utils.dag_processing.dill.loads',
+                   side_effect=ImportError):
+            self.assertIsNone(
+                self.cache.get(self.file_path, self.dag.dag_id, signature))
+
+        with patch('airflow.utils.dag_processing.dill.dumps') as dumps:
+            self.cache.set(self.file_path, self.dag.dag_id, signature, self.dag)
+            dumps.assert_not_called()
+        self.assertIsNone(self.cache.get(self.file_path, self.dag.dag_id, signature))
+
+
+class TestDagFileIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, file_name, content):
+        file_path = os.path.join(self.directory, file_name)
+        with open(file_path, 'w') as f:
+            f.write(content)
+        return file_path
+
+    def test_list_py_file_paths(self):
+        dag_file = self._write('dag.py', '"airflow DAG"')
+        self._write('no_dag.py', 'print(1)')
+        self._write('ignored_dag.py', '"airflow DAG"')
+        self._write('not_python.txt', '"airflow DAG"')
+        self._write('.airflowignore', 'ignored_.*\n')
+
+        index = DagFileIndex(self.directory)
+        self.assertEqual(index.list_py_file_paths(), [dag_file])
+        self.assertEqual(sorted(index.list_py_file_paths(safe_mode=False)),
+                         sorted([dag_file, os.path.join(self.directory, 'no_dag.py')]))
+
+    def test_rescan_only_reads_changed_files(self):
+        dag_file = self._write('dag.py', '"airflow DAG"')
+        no_dag_file = self._write('no_dag.py', 'print(1)')
+        index = DagFileIndex(self.directory)
+        self.assertEqual(index.list_py_file_paths(), [dag_file])
+
+        with patch('airflow.utils.dag_processing.zipfile.is_zipfile') as is_zipfile:
+            self.assertEqual(index.list_py_file_paths(), [dag_file])
+            is_zipfile.assert_not_called()
+
+        self._write('no_dag.py', '"airflow DAG" # changed')
+        self.assertEqual(sorted(index.list_py_file_paths()),
+                         sorted([dag_file, no_dag_file]))
@@ -12,19 +12,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
 import logging
 import logging.config
 import os
+import shutil
+import tempfile
 import unittest
 import six
 
+import mock
+
 from airflow.models import TaskInstance, DAG, DagRun
 from airflow.config_templates.airflow_local_settings import DEFAULT_LOGGING_CONFIG
 from airflow.operators.dummy_operator import DummyOperator
 from airflow.operators.python_operator import PythonOperator
 from airflow.utils.timezone import datetime
 from airflow.utils.log.logging_mixin import set_context
-from airflow.utils.log.file_task_handler import FileTaskHandler
+from airflow.utils.log.file_task_handler import (
+    FileTaskHandler, trim_partial_character)
 from airflow.utils.db import create_session
 from airflow.utils.state import State
 
@@ -169,3 +175,116 @@ class TestFilenameRendering(unittest.TestCase):
         fth = FileTaskHandler('', '{{ ti.dag_id }}/{{ ti.task_id }}/{{ ts }}/{{ try_number }}.log')
         rendered_filename = fth._render_filename(self.ti, 42)
         self.assertEqual(expected_filename, rendered_filename)
+
+
+class TestReadRange(unittest.TestCase):
+    def setUp(self):
+        dag = DAG('dag_for_testing_read_range', start_date=DEFAULT_DATE)
+        task = DummyOperator(task_id='task_for_testing_read_range', dag=dag)
+        self.ti = TaskInstance(task=task, execution_date=DEFAULT_DATE)
+        self.log_folder = tempfile.mkdtemp()
+        self.fth = FileTaskHandler(self.log_folder, '{try_number}.log')
+        # 2 bytes characters, so that pages can end in the middle of one
+        self.log = u'é' * 10
+        with io.open(os.path.join(self.log_folder, '1.log'), 'w',
+                     encoding='utf-8') as f:
+            f.write(self.log)
+
+    def tearDown(self):
+        shutil.rmtree(self.log_folder)
+
+    def test_read_range_pages(self):
+        log, metadata = self.fth.read_range(self.ti, 1, offset=0, length=5)
+        # The page ends before the character split by the length
+        self.assertEqual(log, self.log[:2])
+        self.assertEqual(metadata['offset'], 4)
+        self.assertEqual(metadata['size'], 20)
+        self.assertFalse(metadata['end_of_log'])
+        self.assertIn('Reading local file', metadata['header'])
+
+        log, metadata = self.fth.read_range(
+            self.ti, 1, offset=metadata['offset'])
+        self.assertEqual(log, self.log[2:])
+        self.assertEqual(metadata['offset'], 20)
+        self.assertTrue(metadata['end_of_log'])
+
+    def test_read_range_always_moves_forward(self):
+        # A length too short for the character at the offset still reads it
+        for length in (0, 1):
+            log, metadata = self.fth.read_range(
+                self.ti, 1, offset=2, length=length)
+            self.assertEqual(log, self.log[1:3])
+            self.assertEqual(metadata['offset'], 6)
+
+    def test_read_range_of_running_try(self):
+        self.ti.state = State.RUNNING
+        self.ti.try_number = 1
+        log, metadata = self.fth.read_range(self.ti, 1, offset=20)
+        self.assertEqual(log, '')
+        self.assertFalse(metadata['end_of_log'])
+
+    def test_read_range_invalid_try_number(self):
+        log, metadata = self.fth.read_range(self.ti, 0)
+        self.assertEqual(log, '')
+        self.assertTrue(metadata['end_of_log'])
+        self.assertIn('Try number 0 is invalid', metadata['header'])
+
+    def get_worker_response(self, status_code, content, headers):
+        response = mock.MagicMock(status_code=status_code, content=content,
+                                  headers=headers)
+        response.iter_content.return_value = [content[i:i + 3]
+                                              for i in range(0, len(content), 3)]
+        return response
+
+    @mock.patch('airflow.utils.log.file_task_handler.requests.get')
+    def test_read_range_from_worker_partial_content(self, get):
+        self.ti.hostname = 'worker'
+        get.return_value = self.get_worker_response(
+            206, b'2345', {'Content-Range': 'bytes 2-5/10'})
+
+        # There is no local file for the second try
+        header, data, size = self.fth._read_range(self.ti, 2, 2, 4)
+
+        self.assertEqual((data, size), (b'2345', 10))
+        self.assertIn('Fetching from: http://worker:', header)
+        self.assertEqual(get.call_args[1]['headers'], {'Range': 'bytes=2-5'})
+        get.return_value.close.assert_called_once_with()
+
+    @mock.patch('airflow.utils.log.file_task_handler.requests.get')
+    def test_read_range_from_worker_past_end(self, get):
+        self.ti.hostname = 'worker'
+        get.return_value = self.get_worker_response(
+            416, b'', {'Content-Range': 'bytes */10'})
+
+        header, data, size = self.fth._read_range(self.ti, 2, 10, None)
+
+        self.assertEqual((data, size), (b'', 10))
+        self.assertEqual(get.call_args[1]['headers'], {'Range': 'bytes=10-'})
+
+    @mock.patch('airflow.utils.log.file_task_handler.requests.get')
+    def test_read_range_from_worker_whole_log(self, get):
+        self.ti.hostname = 'worker'
+        # A worker that ignores the Range header sends the whole log
+        get.return_value = self.get_worker_response(
+            200, b'0123456789', {'Content-Length': '10'})
+
+        header, data, size = self.fth._read_range(self.ti, 2, 2, 4)
+
+        self.assertEqual((data, size), (b'2345', 10))
+
+    @mock.patch('airflow.utils.log.file_task_handler.requests.get')
+    def test_read_range_from_worker_fails(self, get):
+        self.ti.hostname = 'worker'
+        get.side_effect = ValueError('unreachable')
+
+        header, data, size = self.fth._read_range(self.ti, 2, 0, None)
+
+        self.assertEqual((data, size), (b'', None))
+        self.assertIn('Failed to fetch log file from worker. unreachable', header)
+
+    def test_trim_partial_character(self):
+        data = u'aé€'.encode('utf-8')
+        self.assertEqual(trim_partial_character(data), data)
+        self.assertEqual(trim_partial_character(data[:-1]), data[:-3])
+        self.assertEqual(trim_partial_character(data[:-3]), data[:-3])
+        self.assertEqual(trim_partial_character(data[:2]), data[:1])
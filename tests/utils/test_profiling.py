@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import signal
+import tempfile
+import time
+import unittest
+
+from mock import patch
+
+from airflow.utils.profiling import PhaseTimer, SamplingProfiler
+
+
+class TestPhaseTimer(unittest.TestCase):
+
+    @patch('airflow.utils.profiling.Stats')
+    def test_phase(self, mock_stats):
+        timer = PhaseTimer('scheduler.loop')
+        with timer.phase('first'):
+            pass
+        with timer.phase('second'):
+            pass
+
+        self.assertEqual(list(timer.durations.keys()), ['first', 'second'])
+        self.assertEqual(mock_stats.timing.call_count, 2)
+        self.assertEqual(mock_stats.timing.call_args[0][0], 'scheduler.loop.second')
+        self.assertIn('first=', timer.format())
+
+        timer.reset()
+        self.assertEqual(timer.format(), '')
+
+
+class TestSamplingProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _busy_function(self):
+        end_time = time.time() + 0.5
+        while time.time() < end_time:
+            pass
+
+    def test_toggle_writes_folded_stacks(self):
+        output_file = os.path.join(self.directory, 'profile', 'profile.folded')
+        profiler = SamplingProfiler(output_file, interval=0.005)
+
+        profiler.toggle()
+        self.assertTrue(profiler.running)
+        self._busy_function()
+        profiler.toggle()
+        self.assertFalse(profiler.running)
+
+        with open(output_file) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+        self.assertTrue(any('_busy_function (test_profiling.py' in line
+                            for line in lines))
+
+    def test_request_toggle_is_handled_by_the_loop(self):
+        output_file = os.path.join(self.directory, 'profile.folded')
+        profiler = SamplingProfiler(output_file, interval=0.005)
+
+        with patch.object(profiler, 'toggle') as toggle:
+            # As a signal handler, it only records the request
+            profiler.request_toggle(signal.SIGUSR2, None)
+            toggle.assert_not_called()
+
+            profiler.handle_requests()
+            toggle.assert_called_once_with()
+            profiler.handle_requests()
+            toggle.assert_called_once_with()
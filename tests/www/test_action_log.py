@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from airflow import configuration
+from airflow.models import Log
+from airflow.settings import Session
+from airflow.www.action_log import ActionLogWriter
+
+configuration.load_test_config()
+
+EVENT = 'test_action_log'
+
+
+class ActionLogWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.session = Session()
+        self.clear()
+
+    def tearDown(self):
+        self.clear()
+        self.session.close()
+
+    def clear(self):
+        self.session.query(Log).filter(Log.event == EVENT).delete()
+        self.session.commit()
+
+    def count_logs(self):
+        return self.session.query(Log).filter(Log.event == EVENT).count()
+
+    def test_write_without_flush_interval(self):
+        writer = ActionLogWriter(flush_interval=0, max_queue_size=10)
+        writer.write(Log(event=EVENT, task_instance=None))
+        self.assertEqual(self.count_logs(), 1)
+
+    def test_write_queues_until_flush(self):
+        writer = ActionLogWriter(flush_interval=3600, max_queue_size=10)
+        for _ in range(3):
+            writer.write(Log(event=EVENT, task_instance=None))
+        self.assertEqual(self.count_logs(), 0)
+
+        writer.flush()
+        self.assertEqual(self.count_logs(), 3)
+
+    def test_write_full_queue(self):
+        writer = ActionLogWriter(flush_interval=3600, max_queue_size=2)
+        for _ in range(3):
+            writer.write(Log(event=EVENT, task_instance=None))
+        # The log that didn't fit in the queue is written right away
+        self.assertEqual(self.count_logs(), 1)
+
+        writer.flush()
+        self.assertEqual(self.count_logs(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
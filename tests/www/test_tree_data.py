@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from datetime import timedelta
+
+from mock import patch
+
+from airflow import configuration
+from airflow.models import DAG, DagRun, TaskInstance
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.settings import Session
+from airflow.utils.state import State
+from airflow.utils.timezone import datetime
+from airflow.www.tree_data import TreeData, TreeDataCache
+
+configuration.load_test_config()
+
+DEFAULT_DATE = datetime(2017, 1, 1)
+DAG_ID = 'test_tree_data'
+
+
+class TreeDataCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dag = DAG(DAG_ID, start_date=DEFAULT_DATE)
+        first = DummyOperator(task_id='first', dag=self.dag)
+        left = DummyOperator(task_id='left', dag=self.dag)
+        right = DummyOperator(task_id='right', dag=self.dag)
+        last = DummyOperator(task_id='last', dag=self.dag)
+        first >> [left, right] >> last
+        self.session = Session()
+        self.clear()
+
+    def tearDown(self):
+        self.clear()
+        self.session.close()
+
+    def clear(self):
+        self.session.query(DagRun).filter(DagRun.dag_id == DAG_ID).delete()
+        self.session.query(TaskInstance).filter(
+            TaskInstance.dag_id == DAG_ID).delete()
+        self.session.commit()
+
+    def create_run(self, execution_date):
+        dag_run = self.dag.create_dagrun(
+            run_id='scheduled__{}'.format(execution_date.isoformat()),
+            execution_date=execution_date,
+            state=State.RUNNING,
+            session=self.session)
+        self.session.commit()
+        return dag_run
+
+    def get_dag_runs(self):
+        return (self.session.query(DagRun)
+                .filter(DagRun.dag_id == DAG_ID)
+                .order_by(DagRun.execution_date)
+                .all())
+
+    def test_payload(self):
+        self.create_run(DEFAULT_DATE)
+        ti = TaskInstance(self.dag.get_task('left'), DEFAULT_DATE)
+        ti.set_state(State.SUCCESS, session=self.session)
+
+        payload = TreeDataCache(size=2).get_payload(
+            self.dag, self.get_dag_runs(), session=self.session)
+
+        names = [node['name'] for node in payload['nodes']]
+        self.assertEqual(names, ['first', 'left', 'right', 'last'])
+        self.assertEqual(sorted(payload['edges']),
+                         [[0, 1], [0, 2], [1, 3], [2, 3]])
+        self.assertEqual(len(payload['dag_runs']), 1)
+        column = payload['instances'][0]
+        self.assertEqual(column['present'], [1, 1, 1, 1])
+        self.assertEqual(column['state'][names.index('left')], State.SUCCESS)
+        self.assertIsNone(column['state'][names.index('right')])
+
+    def test_payload_reads_changed_runs_only(self):
+        for i in range(3):
+            self.create_run(DEFAULT_DATE + timedelta(days=i))
+        cache = TreeDataCache(size=2)
+
+        with patch.object(TreeData, 'build_column',
+                          autospec=True,
+                          side_effect=TreeData.build_column) as build_column:
+            cache.get_payload(self.dag, self.get_dag_runs(),
+                              session=self.session)
+            self.assertEqual(build_column.call_count, 3)
+
+            cache.get_payload(self.dag, self.get_dag_runs(),
+                              session=self.session)
+            self.assertEqual(build_column.call_count, 3)
+
+            ti = TaskInstance(self.dag.get_task('last'), DEFAULT_DATE)
+            ti.set_state(State.FAILED, session=self.session)
+            self.create_run(DEFAULT_DATE + timedelta(days=3))
+            payload = cache.get_payload(self.dag, self.get_dag_runs(),
+                                        session=self.session)
+            self.assertEqual(build_column.call_count, 5)
+
+        self.assertEqual(payload['instances'][0]['state'][3], State.FAILED)
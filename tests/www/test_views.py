@@ -14,6 +14,7 @@
 
 import io
 import copy
+import json
 import logging.config
 import os
 import shutil
@@ -21,6 +22,8 @@ import tempfile
 import unittest
 import sys
 
+import mock
+from six.moves.urllib.parse import quote_plus
 from werkzeug.test import Client
 
 from airflow import models, configuration, settings
@@ -380,6 +383,62 @@ class TestLogView(unittest.TestCase):
         self.assertIn('Log file does not exist',
                       response.data.decode('utf-8'))
 
+    def get_log_range_endpoint(self, execution_date=DEFAULT_DATE):
+        return ('/admin/airflow/get_log_range?dag_id={}&task_id={}'
+                '&execution_date={}'.format(self.DAG_ID, self.TASK_ID,
+                                            quote_plus(execution_date.isoformat())))
+
+    def test_get_log_range(self):
+        handler = mock.MagicMock()
+        handler.read_range.return_value = ('text', {
+            'header': '*** header\n', 'offset': 14, 'size': 20,
+            'end_of_log': False})
+        with mock.patch('airflow.www.views.get_task_log_reader',
+                        return_value=handler):
+            response = self.app.get(
+                self.get_log_range_endpoint() + '&try_number=1&offset=10&length=4')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data.decode('utf-8')), {
+            'data': 'text', 'header': '*** header\n', 'offset': 14, 'size': 20,
+            'end_of_log': False})
+        (ti, try_number), kwargs = handler.read_range.call_args
+        self.assertEqual((ti.dag_id, ti.task_id), (self.DAG_ID, self.TASK_ID))
+        self.assertEqual(try_number, 1)
+        self.assertEqual(kwargs, {'offset': 10, 'length': 4})
+
+    def test_get_log_range_of_missing_task_instance(self):
+        response = self.app.get(
+            self.get_log_range_endpoint(datetime(2017, 9, 2)) + '&offset=10')
+
+        self.assertEqual(response.status_code, 200)
+        metadata = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(metadata['data'], '')
+        self.assertEqual(metadata['offset'], 10)
+        self.assertTrue(metadata['end_of_log'])
+        self.assertIn('Task instance did not exist in the DB', metadata['header'])
+
+
+class TestCodeView(unittest.TestCase):
+
+    def setUp(self):
+        configuration.load_test_config()
+        app = application.create_app(testing=True)
+        self.app = app.test_client()
+
+    @mock.patch('airflow.www.views.STORE_SERIALIZED_DAGS', True)
+    @mock.patch('airflow.models.SerializedDagModel.get_source_code')
+    def test_code_of_serialized_dag(self, get_source_code):
+        get_source_code.return_value = 'stored_source = 1'
+
+        response = self.app.get(
+            '/admin/airflow/code?dag_id=example_bash_operator')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('stored_source', response.data.decode('utf-8'))
+        self.assertTrue(get_source_code.call_args[0][0].endswith(
+            'example_bash_operator.py'))
+
 
 class TestVarImportView(unittest.TestCase):
 